@@ -53,6 +53,7 @@ from .omegaexpr import *
 from .super import *
 from .printing import *
 from .sym import *
+from .cache import *
 
 
 def show_version():
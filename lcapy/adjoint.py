@@ -0,0 +1,261 @@
+"""This module performs noise analysis of circuits using the adjoint
+(transposed) network.  Rather than solving the MNA equations A x = b
+once for each noise source, the adjoint equations
+
+   A^T y = c
+
+are solved once, where c selects the output voltage V[Np] - V[Nm].
+Since the output is c^T x = y^T b, the transfer function from a
+voltage source in branch m is y[num_nodes + m] and the transfer
+function from a current source flowing into node n1 and out of node
+n2 is y[n1] - y[n2].  Thus the transfer functions from every noise
+source to the output are found from a single factorisation and a
+single solve.
+
+The noise sources are assumed to be uncorrelated so their
+contributions to the output noise are added on a power basis.
+
+Copyright 2019 Michael Hayes, UCECE
+
+"""
+
+from __future__ import division
+from .sym import ssym, omegasym, symsimplify
+import numpy as np
+import sympy as sym
+
+__all__ = ('NoiseResult', 'adjoint_noise')
+
+
+class NoiseResult(object):
+    """This class stores the results of an adjoint noise analysis.  The
+    attribute sources is a list of the names of the noise sources,
+    transfers is a dictionary of the transfer functions from each
+    source to the output, contributions is a dictionary of the output
+    noise amplitude spectral density due to each source, and total is
+    the total output noise amplitude spectral density.
+
+    For a symbolic analysis, the transfer functions are s-domain
+    expressions and the noise spectral densities are Vn expressions.
+    For a numerical analysis, they are NumPy arrays with one element
+    for each of the frequencies in the attribute f.
+
+    """
+
+    def __init__(self, sources, transfers, contributions, total, f=None):
+
+        self.sources = sources
+        self.transfers = transfers
+        self.contributions = contributions
+        self.total = total
+        self.f = f
+
+    @property
+    def is_numeric(self):
+
+        return self.f is not None
+
+    def __getitem__(self, name):
+        """Return output noise amplitude spectral density due to source
+        name."""
+
+        if name not in self.contributions:
+            raise ValueError('Unknown noise source %s' % name)
+        return self.contributions[name]
+
+    def __repr__(self):
+
+        if self.is_numeric:
+            return '%s(%d sources, %d frequencies)' % (
+                self.__class__.__name__, len(self.sources), len(self.f))
+        return '%s(%d sources)' % (self.__class__.__name__,
+                                   len(self.sources))
+
+
+def _noise_components(cct):
+    """Return dictionary of the noise components of each independent
+    source, keyed by the source name."""
+
+    components = {}
+    for name, elt in cct.elements.items():
+        if not elt.independent_source:
+            continue
+        value = elt.cpt.Voc if elt.type == 'V' else elt.cpt.Isc
+        noise = [component for kind, component in value.decompose().items()
+                 if isinstance(kind, str) and kind[0] == 'n']
+        if noise != []:
+            components[name] = noise
+    return components
+
+
+def _output_vector(sub, Np, Nm):
+    """Return list of (index, coefficient) selecting V[Np] - V[Nm]."""
+
+    c = []
+    for node, sign in ((Np, 1), (Nm, -1)):
+        node = '%s' % node
+        if node not in sub.node_map:
+            raise ValueError('Unknown node %s' % node)
+        index = sub._node_index(sub.node_map[node])
+        if index >= 0:
+            c.append((index, sign))
+    return c
+
+
+def _source_rows(sub, name):
+    """Return list of (index, coefficient) of the adjoint solution
+    giving the transfer function from source name."""
+
+    elt = sub.elements[name]
+    if elt.type == 'V':
+        num_nodes = len(sub.node_list) - 1
+        return [(num_nodes + elt.branch_index, 1)]
+    n1, n2 = elt.node_indexes
+    return [(index, sign) for index, sign in ((n1, 1), (n2, -1))
+            if index >= 0]
+
+
+def _symbolic(cct, sub, components, c):
+
+    from .solver import solver_make
+    from .sexpr import sExpr
+    from .noiseexpr import Vn
+
+    N = sub._A.rows
+    Z = sym.zeros(N, 1)
+    for index, sign in c:
+        Z[index] += sign
+
+    try:
+        solver = solver_make(sub._A.T, cct.solver)
+    except ValueError:
+        raise ValueError('The MNA A matrix is not invertible for noise'
+                         ' analysis')
+    Y = solver.solution(Z)
+
+    policy, budget = cct.simplify_policy, cct.simplify_budget
+    transfers = {}
+    contributions = {}
+    total = Vn(0)
+    for name, noise in components.items():
+        H = 0
+        for index, sign in _source_rows(sub, name):
+            H += sign * Y[index][0]
+        H = symsimplify(sym.cancel(H), policy, budget)
+        transfers[name] = sExpr(H)
+
+        Hjw = H.subs(ssym, sym.I * omegasym)
+        result = Vn(0)
+        for component in noise:
+            value = symsimplify(Hjw * component.expr, policy, budget)
+            result += Vn(value, nid=component.nid)
+        contributions[name] = result
+        total += result
+
+    return NoiseResult(list(components), transfers, contributions, total)
+
+
+def _spectrum(component, name, omega, params):
+    """Return power spectral density of noise component of source name
+    for each angular frequency in omega."""
+
+    if params:
+        component = component.subs(params)
+    expr = component.expr
+    if omegasym not in expr.free_symbols:
+        # White noise, say from a resistor, does not need to be
+        # evaluated for each frequency.
+        try:
+            return np.ones(len(omega)) * abs(complex(expr))**2
+        except TypeError:
+            pass
+    try:
+        return np.abs(component.evaluate(omega))**2
+    except (TypeError, ValueError, RuntimeError):
+        raise ValueError('Cannot evaluate noise spectrum %s of %s;'
+                         ' specify the symbol values with params'
+                         % (component, name))
+
+
+def _numeric(cct, sub, components, c, omega, params):
+
+    from scipy.sparse import csc_matrix
+    from scipy.sparse.linalg import splu
+    from .sweep import _split_matrix
+
+    svector = 1j * omega
+    G, C, extra = _split_matrix(sub, svector)
+    G, C = csc_matrix(G), csc_matrix(C)
+
+    N = G.shape[0]
+    c0 = np.zeros(N, dtype=complex)
+    for index, sign in c:
+        c0[index] += sign
+
+    # The sparse A matrix is factored for each frequency and A^T y =
+    # c is solved with the factors.
+    Y = np.zeros((N, len(svector)), dtype=complex)
+    for k, s0 in enumerate(svector):
+        A = G + s0 * C
+        if extra != []:
+            A = A.tolil()
+            for i, j, values in extra:
+                A[i, j] += values[k]
+        try:
+            lu = splu(csc_matrix(A))
+        except RuntimeError:
+            raise ValueError('The MNA A matrix is singular for s = %s' % s0)
+        Y[:, k] = lu.solve(c0, trans='T')
+
+    transfers = {}
+    contributions = {}
+    power = np.zeros(len(svector))
+    for name, noise in components.items():
+        H = np.zeros(len(svector), dtype=complex)
+        for index, sign in _source_rows(sub, name):
+            H += sign * Y[index]
+        transfers[name] = H
+
+        psd = np.zeros(len(svector))
+        for component in noise:
+            psd += _spectrum(component, name, omega, params)
+        contributions[name] = np.abs(H) * np.sqrt(psd)
+        power += contributions[name]**2
+
+    return NoiseResult(list(components), transfers, contributions,
+                       np.sqrt(power), omega / (2 * np.pi))
+
+
+def adjoint_noise(cct, Np, Nm=0, f=None, omega=None, params=None):
+    """Find the noise at the output V[Np] - V[Nm] of circuit cct due to
+    each of the noise sources of cct using the adjoint network and
+    return a NoiseResult object.
+
+    If the frequencies f (or the angular frequencies omega) are
+    specified, the analysis is performed numerically; the component
+    values must be numerical.  params is an optional dictionary of
+    values for the symbols in the noise spectra, say {'k':
+    1.380649e-23, 'T': 300} for the noise sources created by noisy.
+    Otherwise the analysis is performed symbolically."""
+
+    from .netlist import GroupNetlist
+
+    if f is not None and omega is not None:
+        raise ValueError('Cannot specify both f and omega')
+
+    components = _noise_components(cct)
+    if components == {}:
+        raise ValueError('There are no noise sources; see noisy')
+
+    # All the sources are zeroed; only their positions are needed.
+    sub = GroupNetlist(cct, (), 's')
+    sub._analyse()
+    c = _output_vector(sub, Np, Nm)
+
+    if f is None and omega is None:
+        return _symbolic(cct, sub, components, c)
+
+    if omega is None:
+        omega = 2 * np.pi * np.asarray(f, dtype=float)
+    omega = np.atleast_1d(np.asarray(omega, dtype=float))
+    return _numeric(cct, sub, components, c, omega, params)
@@ -0,0 +1,320 @@
+"""This module provides bounded least recently used (LRU) caches for the
+results of the Laplace and Fourier transforms and of the MNA solutions.  Each cache is limited
+by its number of entries and optionally by an estimate of the memory
+used by the entries.  The hits, misses, and evictions are counted.
+
+For example, the statistics for all the caches can be found with
+cache_info() and they can be emptied with clear_caches().
+
+The caches can also be stored in a SQLite database so that results
+can be reused by later runs.  This is enabled with
+set_cache_dir(directory).  The values are stored using srepr and the
+keys are hashed with the Lcapy and SymPy versions.  Note, the values
+are evaluated when they are read and so the cache directory should
+not be writable by others.
+
+Copyright 2019 Michael Hayes, UCECE
+
+"""
+
+from collections import OrderedDict, namedtuple
+import sympy as sym
+import hashlib
+import sqlite3
+import sys
+import os
+
+__all__ = ('cache_info', 'clear_caches', 'set_cache_limits',
+           'set_cache_dir')
+
+# Dictionary of the caches keyed by name.
+caches = OrderedDict()
+
+# Persistent cache shared by all the caches; see set_cache_dir.
+persistent = None
+
+CacheInfo = namedtuple('CacheInfo', ('hits', 'misses', 'evictions',
+                                     'size', 'maxsize', 'nbytes',
+                                     'maxbytes', 'persistent_hits'))
+
+
+def _sizeof(obj):
+    """Estimate the number of bytes used by obj.  The nodes of SymPy
+    expressions are counted separately even if they are shared."""
+
+    if isinstance(obj, (tuple, list)):
+        return sys.getsizeof(obj) + sum([_sizeof(arg) for arg in obj])
+    if isinstance(obj, sym.Basic):
+        return sum([sys.getsizeof(node) for node in
+                    sym.preorder_traversal(obj)])
+    return sys.getsizeof(obj)
+
+
+def _serialise(obj):
+
+    if isinstance(obj, (tuple, list)):
+        return '(' + ', '.join([_serialise(arg) for arg in obj]) + ')'
+    if isinstance(obj, sym.Basic):
+        return sym.srepr(obj)
+    return repr(obj)
+
+
+_namespace = {}
+
+
+def _evaluate(string):
+    """Convert string created by srepr to a SymPy expression."""
+
+    if _namespace == {}:
+        from sympy.functions.elementary.piecewise import ExprCondPair
+        _namespace.update(vars(sym))
+        _namespace['ExprCondPair'] = ExprCondPair
+    return eval(string, dict(_namespace))
+
+
+class PersistentCache(object):
+    """Cache stored in the SQLite database filename.  The entries for
+    each in-memory cache are distinguished by the cache name."""
+
+    def __init__(self, filename):
+
+        import lcapy
+
+        self.filename = filename
+        self.version = 'lcapy %s, sympy %s' % (lcapy.__version__,
+                                               sym.__version__)
+        self._connection = None
+        self._pid = None
+
+    @property
+    def connection(self):
+
+        # A connection cannot be shared with a forked process.
+        if self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.filename,
+                                               check_same_thread=False)
+            self._pid = os.getpid()
+            with self._connection:
+                self._connection.execute(
+                    'CREATE TABLE IF NOT EXISTS cache (name TEXT, key TEXT,'
+                    ' value TEXT, PRIMARY KEY (name, key))')
+        return self._connection
+
+    def _hash(self, key):
+
+        string = self.version + '\n' + _serialise(key)
+        return hashlib.sha256(string.encode('utf-8')).hexdigest()
+
+    def get(self, name, key):
+        """Return value for key in cache name or None if not found."""
+
+        row = self.connection.execute(
+            'SELECT value FROM cache WHERE name = ? AND key = ?',
+            (name, self._hash(key))).fetchone()
+        if row is None:
+            return None
+        try:
+            return _evaluate(row[0])
+        except Exception:
+            return None
+
+    def set(self, name, key, value):
+
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO cache VALUES (?, ?, ?)',
+                (name, self._hash(key), sym.srepr(value)))
+
+    def clear(self):
+
+        with self.connection:
+            self.connection.execute('DELETE FROM cache')
+
+    def close(self):
+
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+        self._pid = None
+
+
+class Cache(object):
+    """Least recently used cache with at most maxsize entries (None for
+    no limit).  If maxbytes is not None, the least recently used
+    entries are also evicted when the estimated size of the entries
+    exceeds maxbytes.  If store is False, the entries are never
+    written to the persistent cache, say if they cannot be serialised
+    with srepr."""
+
+    def __init__(self, name, maxsize=1000, maxbytes=None, store=True):
+
+        self.name = name
+        self.store = store
+        self._data = OrderedDict()
+        self._sizes = {}
+        self.set_limits(maxsize, maxbytes)
+        self.clear()
+        caches[name] = self
+
+    def set_limits(self, maxsize=1000, maxbytes=None):
+
+        if maxsize is not None and maxsize < 0:
+            raise ValueError('maxsize must be non-negative')
+        if maxbytes is not None and maxbytes < 0:
+            raise ValueError('maxbytes must be non-negative')
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        # The sizes are only estimated if required.
+        if maxbytes is None:
+            self._sizes.clear()
+        else:
+            for key, value in self._data.items():
+                if key not in self._sizes:
+                    self._sizes[key] = _sizeof(key) + _sizeof(value)
+        self.nbytes = sum(self._sizes.values())
+        self._evict()
+
+    def clear(self):
+        """Remove all the entries and reset the counters."""
+
+        self._data.clear()
+        self._sizes.clear()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.persistent_hits = 0
+
+    @property
+    def persistent(self):
+        """True if the entries are also stored in the persistent cache."""
+
+        return self.store and persistent is not None
+
+    def get(self, key, default=None):
+        """Return value for key or default if key is not cached."""
+
+        try:
+            value = self._data.pop(key)
+        except KeyError:
+            value = None
+            if self.persistent:
+                value = persistent.get(self.name, key)
+            if value is None:
+                self.misses += 1
+                return default
+            self.persistent_hits += 1
+            self._add(key, value)
+            return value
+
+        # Mark as the most recently used.
+        self._data[key] = value
+        self.hits += 1
+        return value
+
+    def __setitem__(self, key, value):
+
+        self._add(key, value)
+        if self.persistent:
+            persistent.set(self.name, key, value)
+
+    def _add(self, key, value):
+
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = value
+        if self.maxbytes is not None:
+            self._sizes[key] = _sizeof(key) + _sizeof(value)
+            self.nbytes += self._sizes[key]
+        self._evict()
+
+    def __contains__(self, key):
+
+        return key in self._data
+
+    def __len__(self):
+
+        return len(self._data)
+
+    def _remove(self, key):
+
+        self._data.pop(key)
+        self.nbytes -= self._sizes.pop(key, 0)
+
+    def _evict(self):
+
+        while self._data and (
+                (self.maxsize is not None and
+                 len(self._data) > self.maxsize) or
+                (self.maxbytes is not None and self.nbytes > self.maxbytes)):
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
+
+    def info(self):
+        """Return CacheInfo named tuple of the statistics."""
+
+        return CacheInfo(self.hits, self.misses, self.evictions,
+                         len(self._data), self.maxsize, self.nbytes,
+                         self.maxbytes, self.persistent_hits)
+
+    def __repr__(self):
+
+        return '%s(%s, %s)' % (self.__class__.__name__, self.name,
+                               self.info())
+
+
+def cache_info():
+    """Return dictionary of CacheInfo named tuples, keyed by cache name,
+    with the hits, misses, evictions, and number of entries of each
+    cache.  The estimated bytes are only found for a cache with a
+    memory bound.  The hits for entries found in the persistent
+    cache are counted separately."""
+
+    return OrderedDict([(name, cache.info())
+                        for name, cache in caches.items()])
+
+
+def clear_caches(persistent_cache=False):
+    """Empty all the caches and reset their counters.  If
+    persistent_cache is True, the persistent cache is also emptied."""
+
+    for cache in caches.values():
+        cache.clear()
+    if persistent_cache and persistent is not None:
+        persistent.clear()
+
+
+def set_cache_dir(directory=None, filename='lcapy-cache.sqlite'):
+    """Store the cached results in the SQLite database filename in
+    directory so that they can be reused by later runs.  The directory
+    is created if necessary.  If directory is None, the persistent
+    cache is disabled."""
+
+    global persistent
+
+    if persistent is not None:
+        persistent.close()
+        persistent = None
+    if directory is None:
+        return
+
+    directory = os.path.expanduser(directory)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    persistent = PersistentCache(os.path.join(directory, filename))
+
+
+def set_cache_limits(maxsize=1000, maxbytes=None, name=None):
+    """Set the maximum number of entries and the maximum estimated
+    bytes (None for no limit) for the cache called name or for all
+    the caches if name is None."""
+
+    if name is None:
+        selected = caches.values()
+    elif name in caches:
+        selected = [caches[name]]
+    else:
+        raise ValueError('Unknown cache %s, expecting one of %s' %
+                         (name, ', '.join(caches.keys())))
+    for cache in selected:
+        cache.set_limits(maxsize, maxbytes)
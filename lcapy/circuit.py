@@ -99,11 +99,18 @@ class Circuit(Netlist):
     The s-domain model can be drawn using:
     cct.s_model().draw()
 
+    For DC, AC, and resistive circuits with numerical component values,
+    the MNA equations can be solved numerically using:
+    cct = Circuit(numeric=True)
+    This is the default if any component value is given in floating
+    point notation.
+
     """
 
-    def __init__(self, filename=None):
+    def __init__(self, filename=None, numeric=None):
 
         super(Circuit, self).__init__(filename)
+        self.numeric = numeric
 
     def netfile_add(self, filename):
         """Add the nets from file with specified filename"""
@@ -0,0 +1,197 @@
+"""This module converts continuous-time transfer functions into
+discrete-time filters for simulating their responses to sampled
+signals.
+
+A rational transfer function N(s) / D(s) is discretised using impulse
+invariance, i.e., the impulse response of the digital filter is
+dt * h(n * dt).  The samples of the impulse response are found
+exactly from the state-space realisation of the transfer function so
+the filter can be applied with scipy.signal.lfilter.
+
+A delay that is not a multiple of the sampling interval is applied
+with a Lagrange interpolating fractional-delay filter.
+
+A transfer function can also be discretised using the bilinear
+transform or a zero-order hold.  The resulting DigitalFilter objects
+keep their state so that a signal can be processed in chunks.
+
+Copyright 2019 Michael Hayes, UCECE
+
+"""
+
+from __future__ import division
+import numpy as np
+import sympy as sym
+
+__all__ = ('DigitalFilter', )
+
+methods = ('bilinear', 'zoh', 'impulse')
+
+
+def poly_coeffs(expr, var):
+    """Return NumPy array of the coefficients of polynomial expr in var,
+    highest power first.  A ValueError is raised if a coefficient is
+    not a number."""
+
+    coeffs = sym.Poly(expr, var).all_coeffs()
+    try:
+        coeffs = [complex(coeff) for coeff in coeffs]
+    except TypeError:
+        raise ValueError('Cannot discretise %s with symbolic coefficients'
+                         % expr)
+    coeffs = np.array(coeffs)
+    if np.allclose(coeffs.imag, 0.0):
+        coeffs = coeffs.real
+    return coeffs
+
+
+def impulse_invariant(b, a, dt):
+    """Return coefficients (bz, az) of the digital filter with the impulse
+    response dt * h(n * dt), where h(t) is the impulse response of
+    the strictly proper transfer function with numerator coefficients
+    b and denominator coefficients a."""
+
+    from scipy.signal import tf2ss, ss2tf
+    from scipy.linalg import expm
+
+    if len(a) < 2:
+        # There are no poles.
+        return np.zeros(1), np.ones(1)
+
+    A, B, C, D = tf2ss(b, a)
+    Ad = expm(A * dt)
+
+    # The system (Ad, Ad B, C, C B) has the impulse response
+    # C Ad^n B = h(n * dt) for n >= 0.
+    bz, az = ss2tf(Ad, np.dot(Ad, B), C, np.dot(C, B))
+    return bz[0] * dt, az
+
+
+def lagrange_delay(delay, order=3):
+    """Return coefficients of the Lagrange interpolating FIR filter for
+    a delay of delay samples.  This is most accurate when the delay
+    is close to order / 2."""
+
+    k = np.arange(order + 1)
+    h = np.ones(order + 1)
+    for i in range(order + 1):
+        mask = k != i
+        h[mask] *= (delay - i) / (k[mask] - i)
+    return h
+
+
+def shift(x, m):
+    """Shift x by m samples, padding with zeros.  If m is negative, x is
+    advanced."""
+
+    N = len(x)
+    y = np.zeros_like(x)
+    if abs(m) >= N:
+        return y
+    if m >= 0:
+        y[m:] = x[0:N - m]
+    else:
+        y[0:N + m] = x[-m:]
+    return y
+
+
+def fractional_delay(x, delay, order=3):
+    """Delay x by delay samples (not necessarily an integer)."""
+
+    from scipy.signal import lfilter
+
+    m = int(np.floor(delay))
+    frac = delay - m
+    if np.isclose(frac, 0.0) or np.isclose(frac, 1.0):
+        return shift(x, int(np.round(delay)))
+
+    # Use an integer shift so that the filter's delay is between
+    # (order - 1) / 2 and (order + 1) / 2 samples.
+    m -= (order - 1) // 2
+    h = lagrange_delay(delay - m, order)
+    return shift(lfilter(h, [1], x), m)
+
+
+def discretise(b, a, delay, dt, method='bilinear'):
+    """Return coefficients (bz, az) of the digital filter approximating
+    the transfer function with numerator coefficients b and
+    denominator coefficients a, followed by a delay of delay seconds,
+    for the sampling interval dt."""
+
+    from scipy.signal import bilinear, cont2discrete
+
+    if method not in methods:
+        raise ValueError('Unknown method %s, expecting one of %s' %
+                         (method, ', '.join(methods)))
+    if len(b) > len(a):
+        raise ValueError('Cannot discretise improper transfer function')
+    if delay < 0:
+        raise ValueError('Cannot discretise non-causal transfer function')
+
+    b = np.hstack((np.zeros(len(a) - len(b)), b)) / a[0]
+    a = a / a[0]
+
+    if method == 'bilinear':
+        bz, az = bilinear(b, a, 1 / dt)
+    elif method == 'zoh':
+        bz, az, _ = cont2discrete((b, a), dt, method='zoh')
+        bz = bz[0]
+    else:
+        # Separate the direct feedthrough.
+        c = b[0]
+        bz, az = impulse_invariant(b[1:] - c * a[1:], a, dt)
+        bz = np.hstack((bz, np.zeros(len(az) - len(bz)))) + c * az
+
+    if delay != 0:
+        delay = delay / dt
+        m = int(np.floor(delay))
+        frac = delay - m
+        if np.isclose(frac, 1.0):
+            m, frac = m + 1, 0.0
+        if not np.isclose(frac, 0.0):
+            # Use the Lagrange filter where it is most accurate, if
+            # the delay is long enough.
+            m = max(m - 1, 0)
+            bz = np.convolve(bz, lagrange_delay(delay - m))
+        bz = np.hstack((np.zeros(m), bz))
+
+    return bz, az
+
+
+class DigitalFilter(object):
+    """Digital filter with numerator coefficients b and denominator
+    coefficients a.  The state of the filter is kept between calls of
+    process so that a signal can be filtered in chunks."""
+
+    def __init__(self, b, a, fs=None):
+
+        self.b = np.asarray(b)
+        self.a = np.asarray(a)
+        self.fs = fs
+        self.reset()
+
+    def reset(self):
+        """Zero the state of the filter."""
+
+        order = max(len(self.a), len(self.b)) - 1
+        self.zi = np.zeros(order)
+
+    def process(self, x):
+        """Filter the chunk of samples x and return the output samples."""
+
+        from scipy.signal import lfilter
+
+        x = np.asarray(x)
+        if len(self.zi) == 0:
+            return lfilter(self.b, self.a, x)
+        y, self.zi = lfilter(self.b, self.a, x, zi=self.zi)
+        return y
+
+    def __call__(self, x):
+
+        return self.process(x)
+
+    def __repr__(self):
+
+        return '%s(%s, %s, fs=%s)' % (self.__class__.__name__,
+                                      self.b, self.a, self.fs)
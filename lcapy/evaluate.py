@@ -0,0 +1,225 @@
+"""This module evaluates SymPy expressions numerically using NumPy.
+The expressions are converted to Python functions with lambdify.
+These functions are cached, keyed by the expression and the variable,
+so that an expression is only converted once.  The functions operate
+on NumPy arrays so that all the samples are evaluated with a single
+call.
+
+Expressions with symbolic parameters are compiled with compile_expr.
+Common subexpressions are found with SymPy's cse so that they are
+only evaluated once.  The resulting CompiledExpr objects can be
+pickled, say to send them to worker processes; they are recompiled
+when they are unpickled.
+
+Copyright 2019 Michael Hayes, UCECE
+
+"""
+
+from __future__ import division
+from .cache import Cache
+from .sym import canonical_name
+from sympy.utilities.lambdify import lambdify
+import numpy as np
+import sympy as sym
+
+__all__ = ('CompiledExpr', )
+
+backends = ('numpy', 'math')
+
+# The functions cannot be serialised with srepr so they are not
+# stored in the persistent cache.
+lambdify_cache = Cache('lambdify', store=False)
+compile_cache = Cache('compile', store=False)
+
+
+def exp(arg):
+
+    # Hack to handle exp(-a * t) * Heaviside(t) for t < 0 by trying
+    # to avoid inf when number overflows float.
+    arg = np.asarray(arg)
+    if np.iscomplexobj(arg):
+        arg = np.where(arg.real > 500, 500 + 1j * arg.imag, arg)
+    else:
+        arg = np.minimum(arg, 500)
+    return np.exp(arg)
+
+
+def dirac(arg):
+
+    return np.where(np.asarray(arg) == 0.0, np.inf, 0.0)
+
+
+def heaviside(arg):
+
+    return np.where(np.asarray(arg) >= 0.0, 1.0, 0.0)
+
+
+def sqrt(arg):
+
+    # For negative arguments, np.sqrt returns nan.
+    return np.lib.scimath.sqrt(arg)
+
+
+def lambdify_expr(expr, var, backend='numpy'):
+    """Return function that evaluates SymPy expression expr for values of
+    the symbol var (None if expr is a constant).  var can also be a
+    tuple of symbols.  The functions are cached."""
+
+    key = (expr, var, backend)
+    func = lambdify_cache.get(key)
+    if func is not None:
+        return func
+
+    if backend == 'numpy':
+        modules = ({'DiracDelta' : dirac,
+                    'Heaviside' : heaviside,
+                    'sqrt' : sqrt, 'exp' : exp},
+                   "numpy", "sympy", "math")
+    elif backend == 'math':
+        modules = ("math", "mpmath", "sympy")
+    else:
+        raise ValueError('Unknown backend %s, expecting one of %s' %
+                         (backend, ', '.join(backends)))
+
+    func = lambdify(var, expr, modules)
+    lambdify_cache[key] = func
+    return func
+
+
+def _response(result, shape):
+
+    # A constant expression is not broadcast by the function.
+    response = np.asarray(result, dtype=complex)
+    if response.shape != shape:
+        response = np.broadcast_to(response, shape).copy()
+    return response
+
+
+def evaluate_expr(expr, var, arg):
+    """Evaluate SymPy expression expr for the values arg of the symbol var.
+    arg may be a scalar or an array.  The result is an array of complex
+    values with the shape of arg.  A TypeError is raised if the
+    expression cannot be evaluated numerically."""
+
+    func = lambdify_expr(expr, var)
+    arg = np.asarray(arg)
+    if not np.iscomplexobj(arg):
+        # Integers cannot be raised to negative powers.
+        arg = arg.astype(float)
+
+    try:
+        return _response(func(arg), arg.shape)
+    except (TypeError, ValueError, AttributeError):
+        if arg.ndim == 0:
+            raise
+
+    # Some functions, say those from the math module, only operate
+    # on scalars.
+    response = np.array([complex(func(arg0)) for arg0 in arg.flat])
+    return response.reshape(arg.shape)
+
+
+class CompiledExpr(object):
+    """Function that evaluates SymPy expression expr for values of the
+    symbol var and the symbols named params.  It is called as
+    func(x, R1=..., C1=...), where the arguments are broadcast.  The
+    common subexpressions are evaluated first, in turn."""
+
+    def __init__(self, expr, var=None, params=(), backend='numpy'):
+
+        if backend not in backends:
+            raise ValueError('Unknown backend %s, expecting one of %s' %
+                             (backend, ', '.join(backends)))
+        self.expr = expr
+        self.var = var
+        self.params = tuple(params)
+        self.backend = backend
+        self._compile()
+
+    def _compile(self):
+
+        # The parameters can be named R1 or R_1.
+        names = {}
+        for name in self.params:
+            names[canonical_name(name)] = name
+
+        symbols = {}
+        for symbol in self.expr.free_symbols:
+            symbols[names.get(symbol.name, symbol.name)] = symbol
+
+        undefined = set(symbols.keys()) - set(self.params)
+        if self.var is not None:
+            undefined -= set((self.var.name, ))
+        if undefined != set():
+            raise ValueError('Undefined symbols %s in expression %s' %
+                             (tuple(undefined), self.expr))
+
+        # A parameter that is not in the expression is ignored.
+        args = [self.var if self.var is not None else sym.Symbol('_x')]
+        args += [symbols.get(name, sym.Symbol(name)) for name in self.params]
+
+        replacements, reduced = sym.cse(
+            self.expr, symbols=sym.numbered_symbols('_cse'))
+
+        self._stages = []
+        for symbol, subexpr in replacements:
+            self._stages.append(lambdify_expr(subexpr, tuple(args),
+                                              self.backend))
+            args.append(symbol)
+        self._func = lambdify_expr(reduced[0], tuple(args), self.backend)
+
+    def __call__(self, arg, **params):
+
+        unknown = set(params.keys()) - set(self.params)
+        if unknown != set():
+            raise ValueError('Unknown parameters %s, expecting %s' %
+                             (', '.join(unknown), ', '.join(self.params)))
+        try:
+            values = [arg] + [params[name] for name in self.params]
+        except KeyError as e:
+            raise ValueError('No value for parameter %s' % e.args[0])
+
+        if self.backend == 'numpy':
+            values = [np.asarray(value) for value in values]
+            values = [value if np.iscomplexobj(value) else
+                      value.astype(float) for value in values]
+
+        for stage in self._stages:
+            values.append(stage(*values))
+        result = self._func(*values)
+
+        if self.backend != 'numpy':
+            return result
+        # A constant expression is not broadcast by the function.
+        shape = np.broadcast(*values).shape
+        result = np.asarray(result)
+        if result.shape != shape:
+            result = np.broadcast_to(result, shape).copy()
+        return result
+
+    def __getstate__(self):
+
+        # The lambdified functions cannot be pickled.
+        return (self.expr, self.var, self.params, self.backend)
+
+    def __setstate__(self, state):
+
+        self.expr, self.var, self.params, self.backend = state
+        self._compile()
+
+    def __repr__(self):
+
+        return '%s(%s, %s, %s)' % (self.__class__.__name__, self.expr,
+                                   self.var, self.params)
+
+
+def compile_expr(expr, var=None, params=(), backend='numpy'):
+    """Return CompiledExpr object for SymPy expression expr.  These
+    objects are cached."""
+
+    key = (expr, var, tuple(params), backend)
+    func = compile_cache.get(key)
+    if func is None:
+        func = CompiledExpr(expr, var, params, backend)
+        compile_cache[key] = func
+    return func
@@ -17,9 +17,9 @@ from .sym import capitalize_name, tsym, symsymbol
 from .context import context
 from .printing import pprint, pretty, print_str, latex
 from .functions import sqrt, log10, atan2, gcd
+from .evaluate import evaluate_expr, compile_expr
 import numpy as np
 import sympy as sym
-from sympy.utilities.lambdify import lambdify
 
 class Exprdict(dict):
 
@@ -730,58 +730,19 @@ class Expr(object):
         There can be no symbols in the expression except for the variable.
         """
 
-        def evaluate_expr(expr, var, arg):
+        def evaluate(expr, var, arg):
 
-            # For some reason the new lambdify will convert a float
-            # argument to complex
-            
-            def exp(arg):
-
-                # Hack to handle exp(-a * t) * Heaviside(t) for t < 0
-                # by trying to avoid inf when number overflows float.
-
-                if isinstance(arg, complex):
-                    if arg.real > 500:
-                        arg = 500 + 1j * arg.imag
-                elif arg > 500:
-                    arg = 500;                        
-
-                return np.exp(arg)
-
-            def dirac(arg):
-                return np.inf if arg == 0.0 else 0.0
-
-            def heaviside(arg):
-
-                return 1.0 if arg >= 0.0 else 0.0
-
-            def sqrt(arg):
-                if not isinstance(arg, complex) and arg < 0:
-                    arg = arg + 0j
-                return np.sqrt(arg)
+            scalar = np.ndim(arg) == 0
 
             try:
-                arg0 = arg[0]
-                scalar = False
-            except:
-                arg0 = arg
-                scalar = True
-
-            # For negative arguments, np.sqrt will return Nan.
-            # np.lib.scimath.sqrt converts to complex but cannot be used
-            # for lamdification!
-            func = lambdify(var, expr,
-                            ({'DiracDelta' : dirac,
-                              'Heaviside' : heaviside,
-                              'sqrt' : sqrt, 'exp' : exp},
-                             "numpy", "sympy", "math"))
-
-            try:
-                result = func(arg0)
-                response = complex(result)
+                response = evaluate_expr(expr, var, arg)
             except NameError:
                 raise RuntimeError('Cannot evaluate expression %s' % self)
             except (AttributeError, TypeError):
+                if not scalar:
+                    raise TypeError(
+                        'Cannot evaluate expression %s,'
+                        ' probably have undefined symbols' % self)
                 if expr.is_Piecewise:
                     raise RuntimeError(
                         'Cannot evaluate expression %s,'
@@ -791,20 +752,10 @@ class Expr(object):
                     'Cannot evaluate expression %s,'
                     ' probably have a mysterious function' % self)
 
-            if scalar:
-                if np.allclose(response.imag, 0.0):
-                    response = response.real
-                return response
-
-            try:
-                response = np.array([complex(func(arg0)) for arg0 in arg])
-            except TypeError:
-                raise TypeError(
-                    'Cannot evaluate expression %s,'
-                    ' probably have undefined symbols' % self)
-
             if np.allclose(response.imag, 0.0):
                 response = response.real
+            if scalar:
+                return response.item()
             return response
 
         expr = self.expr
@@ -835,7 +786,7 @@ class Expr(object):
             pass
 
         if not (expr.is_Piecewise and expr.args[0].args[1].has(tsym >= 0)):
-            return evaluate_expr(expr, var, arg)
+            return evaluate(expr, var, arg)
 
         try:
             arg0 = arg[0]
@@ -848,13 +799,26 @@ class Expr(object):
             
         if scalar:
             if arg0 >= 0:
-                return evaluate_expr(expr, var, arg)
+                return evaluate(expr, var, arg)
             else:
                 return sym.nan
-        result =  evaluate_expr(expr, var, arg)
-        result[arg < 0] = sym.nan
+        result = evaluate(expr, var, arg)
+        result[arg < 0] = np.nan
         return result
 
+    def compile(self, params=(), backend='numpy'):
+        """Return function that evaluates the expression for values of
+        the variable and of the symbols named in params.  For example,
+
+        >>> func = expr('exp(-t / (R1 * C1))').compile(('R1', 'C1'))
+        >>> func(tv, R1=1e3, C1=np.array([1e-6, 2e-6])[:, None])
+
+        The arguments are broadcast.  backend can be 'numpy' or 'math'.
+        The functions are cached and can be pickled, say for use with
+        multiprocessing."""
+
+        return compile_expr(self.expr, self.var, params, backend)
+
     def has(self, subexpr):
         """Test whether the sub-expression is contained.  For example,
          V.has(exp(t)) 
@@ -983,10 +947,11 @@ class Expr(object):
             return self.__class__(ret, **self.assumptions)
         return self.__class__(ret)
 
-    def simplify(self):
-        """Simplify expression."""
+    def simplify(self, policy=None, budget=None):
+        """Simplify expression.  policy and budget default to the
+        global simplification policy; see set_simplify_policy."""
         
-        ret = symsimplify(self.expr)
+        ret = symsimplify(self.expr, policy, budget)
         return self.__class__(ret, **self.assumptions)
 
     def subs(self, *args, **kwargs):
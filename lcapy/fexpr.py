@@ -1,5 +1,5 @@
 from __future__ import division
-from .fourier import inverse_fourier_transform
+from .fourier import inverse_fourier_transform, inverse_fourier_fft
 from .sfwexpr import sfwExpr
 from .sym import fsym, ssym, tsym
 #import .texpr as texpr
@@ -26,8 +26,15 @@ class fExpr(sfwExpr):
             raise ValueError(
                 'f-domain expression %s cannot depend on t' % self.expr)
 
-    def inverse_fourier(self):
-        """Attempt inverse Fourier transform."""
+    def inverse_fourier(self, tvector=None, window='rectangular', pad=4):
+        """Attempt inverse Fourier transform.  If tvector is specified,
+        the transform is evaluated numerically using the FFT at the
+        equally spaced times tvector and a NumPy array is returned.
+        See fourier.inverse_fourier_fft for the window and pad
+        arguments."""
+
+        if tvector is not None:
+            return inverse_fourier_fft(self.evaluate, tvector, window, pad)
 
         result = inverse_fourier_transform(self.expr, self.var, tsym)
         if hasattr(self, '_fourier_conjugate_class'):
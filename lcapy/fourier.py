@@ -8,6 +8,13 @@ It also allows functions that strictly do not have a Fourier transform
 by using Dirac deltas.  For example, a, cos(a * t), sin(a * t), exp(j
 * a * t).
 
+Inverse Fourier transforms can also be found numerically with
+inverse_fourier_fft.  The spectrum is sampled at the frequencies of an
+FFT grid matching the equally spaced times and the integral is
+approximated by a scaled inverse FFT.  The spectrum is optionally
+tapered by a window to reduce the ringing due to truncating the
+spectrum at half the sampling frequency.
+
 
 Copyright 2016--2019 Michael Hayes, UCECE
 
@@ -19,10 +26,15 @@ Copyright 2016--2019 Michael Hayes, UCECE
 # This should give 2 * sin(2 * pi * t)
 
 
+import numpy as np
 import sympy as sym
 from .utils import factor_const, scale_shift
+from .sym import symsimplify
+from .cache import Cache
+
+fourier_cache = Cache('fourier')
 
-fourier_cache = {}
+windows = ('rectangular', 'hann', 'hamming', 'blackman')
 
 def fourier_sympy(expr, t, f):
 
@@ -191,8 +203,9 @@ def fourier_transform(expr, t, f, inverse=False):
     """
 
     key = (expr, t, f, inverse)
-    if key in fourier_cache:
-        return fourier_cache[key]
+    result = fourier_cache.get(key)
+    if result is not None:
+        return result
 
     if not inverse and expr.has(f):
         raise ValueError('Cannot Fourier transform for expression %s that depends on %s' % (expr, f))
@@ -243,7 +256,76 @@ def inverse_fourier_transform(expr, f, t):
         raise ValueError('Cannot inverse Fourier transform for expression %s that depends on %s' % (expr, t))
     
     result = fourier_transform(expr, t, f, inverse=True)
-    return sym.simplify(result)
+    return symsimplify(result)
+
+
+def spectral_window(x, window='rectangular'):
+    """Return the values of the window for the normalised frequencies
+    x, where x = 1 corresponds to half the sampling frequency."""
+
+    x = np.asarray(x)
+    if window == 'rectangular':
+        return np.ones(x.shape)
+    elif window == 'hann':
+        return 0.5 + 0.5 * np.cos(np.pi * x)
+    elif window == 'hamming':
+        return 0.54 + 0.46 * np.cos(np.pi * x)
+    elif window == 'blackman':
+        return (0.42 + 0.5 * np.cos(np.pi * x) +
+                0.08 * np.cos(2 * np.pi * x))
+    raise ValueError('Unknown window %s, expecting one of %s' %
+                     (window, ', '.join(windows)))
+
+
+def inverse_fourier_fft(func, tvector, window='rectangular', pad=4):
+    """Evaluate the inverse Fourier transform
+
+       x(t) = \int_{-\infty}^{\infty} X(f) e^{j * 2 * \pi * f * t} df
+
+    at the equally spaced times tvector using the FFT.  func is a
+    function that returns the values of X(f) for an array of
+    frequencies.  The spectrum is sampled up to half the sampling
+    frequency, 1 / (2 * dt), and tapered by window.
+
+    The FFT computes a periodic extension of x(t).  To reduce the
+    overlap of the periods, the spectrum is sampled with pad times
+    the resolution set by the duration of tvector.  The result is a
+    NumPy array that is real if the imaginary parts are negligible."""
+
+    if window not in windows:
+        raise ValueError('Unknown window %s, expecting one of %s' %
+                         (window, ', '.join(windows)))
+
+    tvector = np.asarray(tvector, dtype=float)
+    N = len(tvector)
+    if N < 2:
+        raise ValueError('Require at least 2 times')
+    td = np.diff(tvector)
+    dt = td[0]
+    if dt <= 0 or not np.allclose(td, dt):
+        raise ValueError('Require uniform, increasing times')
+
+    # With an odd number of samples there is no Nyquist frequency
+    # sample, so the spectrum of a real signal stays Hermitian.
+    M = int(np.ceil(N * max(pad, 1)))
+    M += (M + 1) % 2
+    fvector = np.fft.fftfreq(M, dt)
+
+    X = np.asarray(func(fvector), dtype=complex)
+    if X.shape != fvector.shape:
+        X = np.broadcast_to(X, fvector.shape).copy()
+    X = np.where(np.isfinite(X), X, 0)
+    X *= spectral_window(fvector * 2 * dt, window)
+
+    # Shift the times to start at tvector[0].
+    X *= np.exp(2j * np.pi * fvector * tvector[0])
+
+    # The integral is approximated by df * sum, where df = 1 / (M * dt),
+    # and np.fft.ifft divides the sum by M.
+    x = np.fft.ifft(X)[0:N] / dt
+    if np.allclose(x.imag, 0, atol=1e-12 * max(np.abs(x).max(), 1e-300)):
+        x = x.real
+    return x
 
 
 def test():
@@ -23,10 +23,21 @@ Copyright 2016--2019 Michael Hayes, UCECE
 
 from .ratfun import Ratfun
 from .utils import factor_const, scale_shift
+from .sym import symsimplify, get_simplify_policy
+from .cache import Cache
+import numpy as np
 import sympy as sym
 
-laplace_cache = {}
-inverse_laplace_cache = {}
+laplace_cache = Cache('laplace')
+inverse_laplace_cache = Cache('inverse_laplace')
+
+# The roots of a repeated pole of multiplicity m are spread by about
+# eps**(1 / m) when found numerically.  Thus poles are treated as a
+# repeated pole of multiplicity m if they are within cluster_tol *
+# eps**(1 / m) of their mean, relative to the largest pole.  This
+# relative distance is limited to cluster_max.
+cluster_tol = 10
+cluster_max = 0.1
 
 
 def laplace_limits(expr, t, s, tmin, tmax):
@@ -170,9 +181,11 @@ def laplace_transform(expr, t, s):
 
     """
 
-    key = (expr, t, s)
-    if key in laplace_cache:
-        return laplace_cache[key]
+    # The result depends on the simplification policy.
+    key = (expr, t, s) + get_simplify_policy()
+    result = laplace_cache.get(key)
+    if result is not None:
+        return result
 
     if expr.has(s):
         raise ValueError('Cannot Laplace transform for expression %s that depends on %s' % (expr, s))
@@ -203,18 +216,200 @@ def laplace_transform(expr, t, s):
     except ValueError:
         raise
 
-    result = result.simplify()
+    result = symsimplify(result)
     laplace_cache[key] = result
     return result
 
 
-def inverse_laplace_ratfun(expr, s, t):
+def _numeric_coeffs(poly):
+    """Return NumPy array of the coefficients of poly or None if they
+    are not all numbers."""
+
+    try:
+        return np.array([complex(c) for c in poly.all_coeffs()])
+    except TypeError:
+        return None
+
+
+def _cluster_poles(poles, scale, real):
+    """Group the numerically found poles into a list of (pole,
+    multiplicity) tuples.  A group of m poles is treated as a repeated
+    pole if they are within the tolerance for multiplicity m of their
+    mean; this is used for the pole."""
+
+    eps = np.finfo(float).eps
+    remaining = np.asarray(poles, dtype=complex)
+    clusters = []
+    while len(remaining):
+        order = np.argsort(np.abs(remaining - remaining[0]))
+        for m in range(len(remaining), 0, -1):
+            tol = cluster_tol * eps ** (1 / m)
+            if m > 1 and tol > cluster_max:
+                continue
+            group = remaining[order[0:m]]
+            pole = np.mean(group)
+            if m == 1 or np.abs(group - pole).max() <= tol * scale:
+                break
+        if real and abs(pole.imag) <= tol * scale:
+            pole = complex(pole.real)
+        clusters.append((pole, m))
+        remaining = remaining[order[m:]]
+    return clusters
+
+
+def _residues(b, a, clusters):
+    """Return list of (residue, pole, n) tuples for the partial
+    fraction expansion of the strictly proper rational function b / a
+    with the term residue / (s - pole)**n.  The residues are found by
+    solving a linear system for the coefficients of the numerator."""
+
+    N = len(a) - 1
+    columns = []
+    terms = []
+    for i, (p, m) in enumerate(clusters):
+        for n in range(1, m + 1):
+            roots = []
+            for j, (q, k) in enumerate(clusters):
+                roots += [q] * (k - n if j == i else k)
+            column = a[0] * np.atleast_1d(np.poly(roots))
+            columns.append(np.concatenate((np.zeros(N - len(column)),
+                                           column)))
+            terms.append((p, n))
+
+    b = np.trim_zeros(b, 'f')
+    b = np.concatenate((np.zeros(N - len(b)), b))
+    R = np.linalg.solve(np.array(columns).T, b)
+    return [(r, p, n) for r, (p, n) in zip(R, terms)]
+
+
+def inverse_laplace_ratfun_numeric(b, a, t):
+    """Return the inverse Laplace transform of the strictly proper
+    rational function with numerator coefficients b and denominator
+    coefficients a, highest power first.  The poles are found as the
+    eigenvalues of the companion matrix and are clustered into
+    repeated poles (see cluster_tol).  The residues are found by
+    solving a linear system.  The coefficients of the result are
+    floats."""
+
+    real = np.allclose(b.imag, 0) and np.allclose(a.imag, 0)
+    if real:
+        b, a = b.real, a.real
+
+    poles = np.roots(a)
+    scale = max(1.0, np.abs(poles).max()) if len(poles) else 1.0
+
+    result = sym.S.Zero
+    for r, p, n in _residues(b, a, _cluster_poles(poles, scale, real)):
+        r, p = complex(r), complex(p)
+        tn = t ** (n - 1) / sym.factorial(n - 1)
+        if r == 0:
+            continue
+        if real and p.imag == 0:
+            result += sym.Float(r.real) * sym.exp(sym.Float(p.real) * t) * tn
+        elif real:
+            if p.imag < 0:
+                # This is included with its conjugate.
+                continue
+            et = sym.exp(sym.Float(p.real) * t)
+            wt = sym.Float(p.imag) * t
+            result += 2 * et * tn * (sym.Float(r.real) * sym.cos(wt) -
+                                     sym.Float(r.imag) * sym.sin(wt))
+        else:
+            result += (sym.Float(r.real) + sym.I * sym.Float(r.imag)) * \
+                sym.exp((sym.Float(p.real) + sym.I * sym.Float(p.imag)) * t) * tn
+    return result
+
+
+def _talbot(expr, s, t, M):
+
+    from .evaluate import evaluate_expr
+
+    theta = np.pi * np.arange(1, M) / M
+    cot = 1 / np.tan(theta)
+    sigma = theta + (theta * cot - 1) * cot
+
+    r = 2 * M / (5 * t)
+    # The nodes of the contour with shape (M - 1, len(t)).
+    S = r * theta[:, None] * (cot[:, None] + 1j)
+    F = evaluate_expr(expr, s, np.vstack((r[None, :], S)))
+    # expr is assumed to tend to zero as s tends to infinity but its
+    # evaluation may overflow, say for 1 / cosh(s).
+    F[~np.isfinite(F)] = 0
+
+    terms = np.exp(S * t) * F[1:] * (1 + 1j * sigma[:, None])
+    value = 0.5 * F[0] * np.exp(r * t) + np.sum(terms, axis=0)
+    return (r / M * value).real
+
+
+def inverse_laplace_talbot(expr, s, tvector, M=32):
+    """Evaluate the inverse Laplace transform of expr for the times in
+    tvector numerically using the fixed Talbot method of Abate and
+    Valko.  expr is integrated along a deformed Bromwich contour with
+    M nodes so that it is only evaluated for M values of s per time.
+    The result is assumed to be zero for t < 0.
+
+    The relative accuracy is roughly 10**(-0.6 M) but is limited by
+    rounding errors to about 1e-10.  expr should tend to zero as s
+    tends to infinity; the Dirac deltas of the result cannot be
+    found."""
+
+    tvector = np.asarray(tvector, dtype=float)
+    result = np.zeros(tvector.shape)
+
+    # The contour cannot be used for delays since exp(-s T) grows
+    # rapidly along the contour for t < T.  Thus the delays are
+    # factored out and the terms are shifted.
+    terms = {}
+    N, D = expr, sym.S.One
+    if expr.has(sym.exp):
+        N, D = sym.fraction(sym.together(expr), exact=True)
+    for term in sym.Add.make_args(sym.expand(N)):
+        term, delay = delay_factor(term / D, s)
+        try:
+            delay = float(delay)
+        except TypeError:
+            raise ValueError('Cannot evaluate inverse Laplace transform'
+                             ' with symbolic delay %s' % delay)
+        terms[delay] = terms.get(delay, sym.S.Zero) + term
+
+    # The value at t = 0 is approximated by the value at a much
+    # smaller time than the largest time, to give the limit as t
+    # tends to 0 from above.
+    tmin = 1e-9 * np.abs(tvector).max() if tvector.size else 0
+
+    for delay, term in terms.items():
+        t = tvector - delay
+        mask = t >= 0
+        if np.any(mask) and tmin > 0:
+            result[mask] += _talbot(term, s, np.maximum(t[mask], tmin), M)
+    return result
+
+
+def inverse_laplace_ratfun(expr, s, t, numeric=False):
+    """Return the inverse Laplace transform of rational function expr
+    as a tuple of the parts due to the Dirac deltas and due to the
+    poles.  If numeric is True, or if the coefficients are numbers
+    and SymPy cannot find all the roots of the denominator, the poles
+    and residues are found numerically."""
 
     N, D, delay = Ratfun(expr, s).as_ratfun_delay()
     # The delay should be zero
 
     Q, M = sym.div(N, D, s)
 
+    if not numeric:
+        Dpoly = sym.Poly(D, s)
+        coeffs = Dpoly.all_coeffs() + sym.Poly(N, s).all_coeffs()
+        if all([c.is_number for c in coeffs]):
+            numeric = sum(sym.roots(Dpoly).values()) < Dpoly.degree()
+
+    if numeric:
+        b = _numeric_coeffs(sym.Poly(M, s))
+        a = _numeric_coeffs(sym.Poly(D, s))
+        if b is None or a is None:
+            raise ValueError('Cannot find numerical inverse Laplace transform'
+                             ' of %s with symbolic coefficients' % expr)
+
     result1 = sym.S.Zero
 
     if Q:
@@ -223,6 +418,9 @@ def inverse_laplace_ratfun(expr, s, t):
         for n, c in enumerate(C):
             result1 += c * sym.diff(sym.DiracDelta(t), t, len(C) - n - 1)
 
+    if numeric:
+        return result1, inverse_laplace_ratfun_numeric(b, a, t)
+
     expr = M / D
     for factor in expr.as_ordered_factors():
         if factor == sym.oo:
@@ -272,7 +470,7 @@ def inverse_laplace_ratfun(expr, s, t):
             m = N - n
             r = sym.limit(
                 sym.diff(expr2, s, m), s, p) / sym.factorial(m)
-            result2 += r * sym.exp(p * t) * t**(n - 1)
+            result2 += r * sym.exp(p * t) * t**(n - 1) / sym.factorial(n - 1)
 
     # result1 is a sum of Dirac deltas and its derivatives so is known
     # to be causal.
@@ -339,7 +537,7 @@ def inverse_laplace_sympy(expr, s, t):
     return result
 
 
-def inverse_laplace_term1(expr, s, t):
+def inverse_laplace_term1(expr, s, t, numeric=False):
 
     const, expr = factor_const(expr, s)
 
@@ -354,7 +552,7 @@ def inverse_laplace_term1(expr, s, t):
 
     try:
         # This is the common case.
-        result1, result2 = inverse_laplace_ratfun(expr, s, t)
+        result1, result2 = inverse_laplace_ratfun(expr, s, t, numeric)
         return const * result1, const * result2
     except:
         pass
@@ -370,9 +568,10 @@ def inverse_laplace_term1(expr, s, t):
     
 def inverse_laplace_term(expr, s, t, **assumptions):
 
-    expr, delay = delay_factor(sym.simplify(expr), s)
+    expr, delay = delay_factor(symsimplify(expr), s)
 
-    result1, result2 = inverse_laplace_term1(expr, s, t)
+    result1, result2 = inverse_laplace_term1(
+        expr, s, t, assumptions.get('numeric', False))
 
     if delay != 0:
         result1 = result1.subs(t, t - delay)
@@ -412,15 +611,20 @@ def inverse_laplace_transform(expr, s, t, **assumptions):
     dc -- x(t) = constant so X(s) must have the form constant / s
     causal -- x(t) = 0 for t < 0.
     ac -- x(t) = A cos(a * t) + B * sin(b * t)
+
+    If numeric is True, the poles and residues of rational functions
+    are found numerically.
     """
 
     # TODO, simplify
     key = (expr, s, t, assumptions.get('dc', False),
            assumptions.get('ac', False),
-           assumptions.get('causal', False))
+           assumptions.get('causal', False),
+           assumptions.get('numeric', False)) + get_simplify_policy()
     
-    if key in inverse_laplace_cache:
-        return inverse_laplace_cache[key]
+    result = inverse_laplace_cache.get(key)
+    if result is not None:
+        return result
 
     if expr.has(t):
         raise ValueError('Cannot inverse Laplace transform for expression %s that depends on %s' % (expr, t))
@@ -12,10 +12,15 @@ from .phasor import Iphasor, Vphasor
 from .noiseexpr import In, Vn
 from .vector import Vector
 from .matrix import Matrix
-from .sym import symsimplify
+from .sym import symsimplify, ssym, get_simplify_policy
+from .solver import solver_make
+from .numeric import NumericSolver, is_numeric_matrix, all_float_values
 from .expr import Exprdict
+from .cache import Cache
 import sympy as sym
 
+mna_cache = Cache('mna')
+
 # Note, all the maths is performed using sympy expressions and the
 # values and converted to Expr when required.  This is more
 # efficient and, more importantly, overcomes some of the wrapping
@@ -42,7 +47,57 @@ def _Itype_select(kind):
         return Iphasor
 
     
-class Nodedict(Exprdict):
+def _sparse_zeros(rows, cols):
+    """Create an empty sparse (dictionary of keys) matrix."""
+
+    return sym.SparseMatrix(rows, cols, {})
+
+
+class _Lazy(object):
+    """Placeholder for a value that is found when it is required."""
+
+    def __init__(self, func):
+        self.func = func
+
+
+class Lazydict(Exprdict):
+    """Dictionary where the values can be evaluated when they are first
+    accessed."""
+
+    def lazy_set(self, key, func):
+        """Set value for key to be the result of calling func when
+        required."""
+
+        super(Lazydict, self).__setitem__(key, _Lazy(func))
+
+    def __getitem__(self, key):
+
+        value = super(Lazydict, self).__getitem__(key)
+        if isinstance(value, _Lazy):
+            value = value.func()
+            super(Lazydict, self).__setitem__(key, value)
+        return value
+
+    def get(self, key, default=None):
+
+        if key in self:
+            return self[key]
+        return default
+
+    def values(self):
+
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+
+        return [(key, self[key]) for key in self.keys()]
+
+    def __repr__(self):
+
+        return repr(dict(self.items()))
+
+
+class Nodedict(Lazydict):
 
     def __getitem__(self, name):
         """Return node by name or number."""
@@ -53,7 +108,7 @@ class Nodedict(Exprdict):
         return super(Nodedict, self).__getitem__(name)
 
 
-class Branchdict(Exprdict):
+class Branchdict(Lazydict):
     pass
     
 
@@ -84,7 +139,9 @@ class MNA(object):
     """
 
     def _invalidate(self):
-        for attr in ('_A', '_Vdict', '_Idict', '_node_list'):
+        for attr in ('_A', '_Asolver', '_solution', '_Vdict', '_Idict',
+                     '_node_list', '_node_indexes', '_branch_indexes',
+                     '_shared', '_pencil'):
             if hasattr(self, attr):
                 delattr(self, attr)
 
@@ -101,20 +158,41 @@ class MNA(object):
         node_list.insert(0, node_list.pop(node_list.index('0')))
 
         self._node_list = node_list
+        self._node_indexes = dict([(node, m - 1)
+                                   for m, node in enumerate(node_list)])
         return node_list
 
     def _node_index(self, node):
         """Return node index; ground is -1"""
-        return self.node_list.index(self.node_map[node]) - 1
+
+        if not hasattr(self, '_node_indexes'):
+            self.node_list
+        return self._node_indexes[self.node_map[node]]
 
     def _branch_index(self, cpt_name):
 
         try:
-            index = self.unknown_branch_currents.index(cpt_name)
-            return index
-        except ValueError:
+            return self._branch_indexes[cpt_name]
+        except KeyError:
             raise ValueError('Unknown component name %s for branch current' % cpt_name)
 
+    def _use_numeric(self):
+        """Determine if the numeric solver is to be used.  This
+        requires a numerical A matrix so Laplace analysis is always
+        performed symbolically."""
+
+        self._analyse()
+        if self.numeric is False:
+            return False
+        if not is_numeric_matrix(self._A):
+            return False
+        if self.numeric:
+            return True
+        float_values = getattr(self, '_float_values', None)
+        if float_values is None:
+            float_values = all_float_values(self.elements)
+        return float_values
+
     def _analyse(self):
         """Analyse network."""
 
@@ -145,52 +223,134 @@ class MNA(object):
             if elt.need_extra_branch_current:
                 self.unknown_branch_currents.append(elt.name + 'X')
 
+        self._branch_indexes = dict([(name, m) for m, name in
+                                     enumerate(self.unknown_branch_currents)])
+
         # Generate stamps.
         num_nodes = len(self.node_list) - 1
         num_branches = len(self.unknown_branch_currents)
 
-        self._G = sym.zeros(num_nodes, num_nodes)
-        self._B = sym.zeros(num_nodes, num_branches)
-        self._C = sym.zeros(num_branches, num_nodes)
-        self._D = sym.zeros(num_branches, num_branches)
-
-        self._Is = sym.zeros(num_nodes, 1)
-        self._Es = sym.zeros(num_branches, 1)
+        # The matrices are stored sparsely (as a dictionary of keys)
+        # since each component only touches a few entries.  A dense
+        # view is only created if the user asks for the A matrix.
+        self._G = _sparse_zeros(num_nodes, num_nodes)
+        self._B = _sparse_zeros(num_nodes, num_branches)
+        self._C = _sparse_zeros(num_branches, num_nodes)
+        self._D = _sparse_zeros(num_branches, num_branches)
+
+        self._Is = _sparse_zeros(num_nodes, 1)
+        self._Es = _sparse_zeros(num_branches, 1)
+
+        # For Laplace analysis, the capacitors, inductors, and mutual
+        # inductances stamp the coefficients of s into As rather than
+        # stamping their admittances (or impedances) into A.  Thus A
+        # = A0 + s As, where A0 only has the frequency-independent
+        # stamps and the admittances of general impedances.
+        self._As = _sparse_zeros(num_nodes + num_branches,
+                                 num_nodes + num_branches)
 
         # Iterate over circuit elements and fill in matrices.
         for elt in self.elements.values():
             elt.stamp(self)
 
         # Augment the admittance matrix to form A matrix.
-        self._A = self._G.row_join(self._B).col_join(self._C.row_join(self._D))
+        self._A0 = self._G.row_join(self._B).col_join(
+            self._C.row_join(self._D))
+        if self._As._smat == {}:
+            self._A = self._A0
+        else:
+            self._A = self._A0 + ssym * self._As
         # Augment the known current vector with known voltage vector
         # to form Z vector.
         self._Z = self._Is.col_join(self._Es)
 
-    def _solve(self):
-        """Solve network."""
-        
-        if hasattr(self, '_Vdict'):
-            return
-        self._analyse()
-
-        # Solve for the nodal voltages
-        try:
-            Ainv = self._A.inv()
-        except ValueError:
-            comment = ''
-            if self.kind == 'dc':
-                comment = '  Check there is a DC path between all nodes.'
-            raise ValueError(
+    def _factor(self):
+        """Return Solution object for the MNA equations.  The A matrix
+        is factored rather than inverted; the factors are kept so that
+        they can be reused for other right hand side vectors."""
+
+        if hasattr(self, '_solution'):
+            return self._solution
+
+        numeric = self._use_numeric()
+
+        # The superposition groups of a netlist can share the
+        # factorisation of the s-domain A matrix; see superposition.py.
+        solution = None
+        if not numeric and hasattr(self, '_shared'):
+            solution = self._shared.solution(self)
+
+        if solution is None:
+            try:
+                if numeric:
+                    self._Asolver = NumericSolver(self._A)
+                else:
+                    self._Asolver = solver_make(self._A, self.solver)
+            except ValueError:
+                comment = ''
+                if self.kind == 'dc':
+                    comment = '  Check there is a DC path between all nodes.'
+                raise ValueError(
 """The MNA A matrix is not invertible for %s analysis because:
 1. there may be capacitors in series;
 2. a voltage source might be short-circuited;
 3. a current source might be open-circuited.
 %s""" % (self.kind, comment))
+            solution = self._Asolver.solution(self._Z)
+
+        self._solution = solution
+        return solution
 
-        results = symsimplify(Ainv * self._Z)
+    def _solve(self):
+        """Solve network."""
+        
+        if hasattr(self, '_Vdict'):
+            return
+        self._analyse()
 
-        results = results.subs(self.context.symbols)
+        numeric = self._use_numeric()
+
+        # With a persistent cache, the symbolic unknowns are cached,
+        # keyed by the netlist and the assumptions of the symbols in
+        # the MNA matrices, so that a warm run does not need to factor
+        # the A matrix.
+        cached = not numeric and mna_cache.persistent
+        if cached:
+            policy, budget = get_simplify_policy()
+            if self.simplify_policy is not None:
+                policy = self.simplify_policy
+            if self.simplify_budget is not None:
+                budget = self.simplify_budget
+            free = self._A.free_symbols | self._Z.free_symbols
+            symbols = tuple(sorted([sym.srepr(symbol) for symbol in free]))
+            cache_key = (self.netlist(), symbols, str(self.kind),
+                         self.solver, policy, budget)
+        else:
+            self._factor()
+
+        # The unknowns are only found and simplified when they are
+        # required.
+        results = {}
+
+        policy = self.simplify_policy
+        budget = self.simplify_budget
+
+        def result(index):
+            if index in results:
+                return results[index]
+            if cached:
+                value = mna_cache.get(cache_key + (index, ))
+                if value is not None:
+                    results[index] = value
+                    return value
+            value = self._factor()[index][0]
+            if not numeric:
+                value = symsimplify(value, policy, budget)
+            value = value.subs(self.context.symbols)
+            if cached:
+                mna_cache[cache_key + (index, )] = value
+            results[index] = value
+            return value
 
         branchdict = {}
         for elt in self.elements.values():
@@ -199,7 +359,15 @@ class MNA(object):
             n1, n2 = self.node_map[elt.nodes[0]], self.node_map[elt.nodes[1]]
             branchdict[elt.name] = (n1, n2)
 
-        self.context.switch()
+        def lazy(func, *args):
+            # The values are evaluated later so need to switch context.
+            def evaluate():
+                self.context.switch()
+                try:
+                    return func(*args)
+                finally:
+                    self.context.restore()
+            return evaluate
 
         vtype = _Vtype_select(self.kind)
         itype = _Itype_select(self.kind)
@@ -212,14 +380,31 @@ class MNA(object):
                            'causal' : self.is_causal}
         elif isinstance(self.kind, str) and self.kind[0] == 'n':
             assumptions = {'nid' : self.kind}
-       
+
+        def node_voltage(index):
+            return vtype(result(index), **assumptions)
+
+        def branch_current(index):
+            return itype(result(index), **assumptions)
+
+        def cpt_current(elt):
+            n1 = self.node_map[elt.nodes[0]]
+            n2 = self.node_map[elt.nodes[1]]
+            V1, V2 = self._Vdict[n1], self._Vdict[n2]
+            I = (V1.expr - V2.expr) / elt.Z.expr
+            if not numeric:
+                I = symsimplify(I, policy, budget)
+            return itype(I, **assumptions)
+
+        self.context.switch()
+
         # Create dictionary of node voltages
         self._Vdict = Nodedict()
         self._Vdict['0'] = vtype(0, **assumptions)
         for n in self.nodes:
             index = self._node_index(n)
             if index >= 0:
-                self._Vdict[n] = vtype(results[index], **assumptions).simplify()
+                self._Vdict.lazy_set(n, lazy(node_voltage, index))
             else:
                 self._Vdict[n] = vtype(0, **assumptions)
 
@@ -228,17 +413,12 @@ class MNA(object):
         # Create dictionary of branch currents through elements
         self._Idict = Branchdict()
         for m, key in enumerate(self.unknown_branch_currents):
-            self._Idict[key] = itype(results[m + num_nodes], **assumptions).simplify()
+            self._Idict.lazy_set(key, lazy(branch_current, m + num_nodes))
 
-        # Calculate the branch currents.  These should be lazily
-        # evaluated as required.
+        # Calculate the branch currents.
         for elt in self.elements.values():
             if elt.type in ('R', 'C'):
-                n1 = self.node_map[elt.nodes[0]]
-                n2 = self.node_map[elt.nodes[1]]                
-                V1, V2 = self._Vdict[n1], self._Vdict[n2]
-                I = (V1.expr - V2.expr) / elt.Z.expr
-                self._Idict[elt.name] = itype(I, **assumptions).simplify()
+                self._Idict.lazy_set(elt.name, lazy(cpt_current, elt))
             elif elt.type in ('I', ):
                 self._Idict[elt.name] = elt.Isc
 
@@ -249,14 +429,89 @@ class MNA(object):
         """Return A matrix for MNA"""
 
         self._analyse()
-        return Matrix(self._A)
+        return Matrix(sym.Matrix(self._A))
+
+    def _split_pencil(self):
+        """Return SymPy sparse matrices (G, C) where A = G + s C for
+        Laplace analysis.  The elements of G that are not linear in s,
+        due to general impedances, are kept in G."""
+
+        if hasattr(self, '_pencil'):
+            return self._pencil
+
+        if self.kind in ('s', 'ivp'):
+            sub = self
+        else:
+            # All the sources are zeroed since they do not affect A.
+            from .netlist import GroupNetlist
+            sub = GroupNetlist(self, (), 's')
+        sub._analyse()
+
+        G = _sparse_zeros(sub._A0.rows, sub._A0.cols)
+        C = sub._As.copy()
+        for (i, j), expr in sub._A0._smat.items():
+            expr = sym.sympify(expr)
+            if ssym in expr.free_symbols:
+                # Split the admittances of the Y and Z components if
+                # they are linear in s.
+                poly = sym.expand(expr)
+                if poly.is_polynomial(ssym) and sym.degree(poly, ssym) <= 1:
+                    C[i, j] += poly.coeff(ssym, 1)
+                    expr = poly.coeff(ssym, 0)
+            G[i, j] = expr
+
+        self._pencil = G, C
+        return self._pencil
+
+    def _pencil_matrix(self, M, name):
+
+        for expr in M._smat.values():
+            if ssym in sym.sympify(expr).free_symbols:
+                raise ValueError('Cannot find %s matrix since admittance %s'
+                                 ' is not linear in s' % (name, expr))
+
+        try:
+            values = dict([(key, complex(expr))
+                           for key, expr in M._smat.items()])
+        except TypeError:
+            # There are symbolic component values.
+            return M
+
+        from scipy.sparse import dok_matrix
+
+        dtype = float
+        if any([value.imag != 0 for value in values.values()]):
+            dtype = complex
+        N = dok_matrix(M.shape, dtype=dtype)
+        for (i, j), value in values.items():
+            N[i, j] = value if dtype == complex else value.real
+        return N.tocsr()
+
+    @property
+    def G_matrix(self):
+        """Return frequency-independent part G of the MNA A matrix for
+        Laplace analysis, where A = G + s C.  This is a SciPy sparse
+        matrix if the component values are numerical; otherwise it is
+        a SymPy sparse matrix."""
+
+        return self._pencil_matrix(self._split_pencil()[0], 'G')
+
+    @property
+    def C_matrix(self):
+        """Return part C of the MNA A matrix proportional to s for
+        Laplace analysis, where A = G + s C.  C contains the
+        capacitances and the self and mutual inductances.  This is a
+        SciPy sparse matrix if the component values are numerical;
+        otherwise it is a SymPy sparse matrix."""
+
+        return self._pencil_matrix(self._split_pencil()[1], 'C')
 
     @property
     def ZV(self):
         """Return Z vector for MNA"""
 
         self._analyse()
-        return Vector(self._Z)
+        return Vector(sym.Matrix(self._Z))
 
     @property
     def X(self):
@@ -11,9 +11,10 @@ from .cexpr import cExpr
 from .omegaexpr import omegaExpr
 from .symbols import j, omega, jomega
 from .functions import sqrt
-from .sym import capitalize_name, omegasym
+from .sym import capitalize_name, omegasym, canonical_name
 from .grammar import delimiters
 import lcapy
+from copy import copy
 import inspect
 import sys
 
@@ -45,6 +46,16 @@ def _YZtype_select(expr, kind):
     return omegaExpr(expr.subs(j * kind))
     
 
+def _only_kind(value, kind):
+    """Return True if the source value only has a DC, AC, or noise
+    component of the transform domain kind.  The component can then
+    be copied rather than regenerated for the kind."""
+
+    if kind is None or kind in ('s', 'ivp', 'time', 'super', 't'):
+        return False
+    return list(value.decompose().keys()) == [kind]
+
+
 class Cpt(object):
 
     dependent_source = False
@@ -76,26 +87,30 @@ class Cpt(object):
                     node = node[len(self.namespace):]
                 self.relnodes.append(node)
 
-        self.net = string.split(';')[0]
+        self._net = string.split(';')[0]
         # This is the initial opts_string from which the opts attribute
         # is derived.
         self.opts_string = opts_string
-        self.args = args
-        self.explicit_args = args        
         self.classname = self.__class__.__name__
         self.keyword = keyword
         self.opts = {}
+        self._set_args(args)
+
+    def _set_args(self, args):
+
+        self.args = args
+        self.explicit_args = args        
 
         if self.type in ('W', 'O', 'P'):
             return
 
-        if args is () or (self.type in ('F', 'H') and len(args) == 1):
+        if args == () or (self.type in ('F', 'H') and len(args) == 1):
             # Default value is the component name
             value = self.type
             if self.id != '':
                 value += '_' + self.id
 
-            if self.type in ('V', 'I') and keyword[1] == '':
+            if self.type in ('V', 'I') and self.keyword[1] == '':
                 value = value[0].lower() + value[1:] + '(t)'
 
             args += (value, )
@@ -111,6 +126,16 @@ class Cpt(object):
                 
         self.cpt = newclass(*args)
 
+    @property
+    def net(self):
+        """Net description without the options.  For a component
+        copied with new args or nodes, this is only regenerated when
+        required."""
+
+        if self._net is None:
+            self._net = self.netmake().split(';')[0].strip()
+        return self._net
+
     def __repr__(self):
         return self.__str__()
 
@@ -123,10 +148,31 @@ class Cpt(object):
     def stamp(self, cct):
         raise NotImplementedError('stamp method not implemented for %s' % self)
 
+    def _clone(self, args=None, nodes=None):
+        """Copy the component without re-parsing its net description.
+        If args is not None, these replace the explicit args.  If
+        nodes is not None, these replace the nodes.  The copy is
+        added to a netlist with its _add method."""
+
+        new = copy(self)
+        new.cct = None
+        if nodes is not None:
+            new.nodes = tuple(nodes)
+            new.relnodes = new.nodes
+            new._net = None
+        if args is not None:
+            new._net = None
+            self.cct.context.switch()
+            try:
+                new._set_args(tuple(args))
+            finally:
+                self.cct.context.restore()
+        return new
+
     def copy(self):
-        """Make copy of net."""
+        """Make copy of component."""
         
-        return str(self)
+        return self._clone()
     
     def kill_initial(self):
         """Kill implicit sources due to initial conditions."""
@@ -138,9 +184,10 @@ class Cpt(object):
 
         raise ValueError('component not a source: %s' % self)
 
-    def netmake(self, node_map=None, zero=False):
+    def netmake(self, node_map=None, zero=False, args=None):
         """Create a new net description.  If node_map is not None,
-        rename the nodes.  If zero is True, set args to zero."""
+        rename the nodes.  If zero is True, set args to zero.  If
+        args is not None, use these args instead."""
 
         string = self.name
         field = 0
@@ -153,7 +200,9 @@ class Cpt(object):
             if field == self.keyword[0]:
                 string += ' ' + self.keyword[1]
                 field += 1                
-        for arg in self.explicit_args:
+        if args is None:
+            args = self.explicit_args
+        for arg in args:
             if zero:
                 arg = 0
             string += ' ' + arg_format(arg)
@@ -166,7 +215,9 @@ class Cpt(object):
     def rename_nodes(self, node_map):
         """Rename the nodes using dictionary node_map."""
 
-        return self.netmake(node_map)
+        if self.namespace != '':
+            return self.netmake(node_map)
+        return self._clone(nodes=[node_map[node] for node in self.relnodes])
 
     def select(self, kind=None):
         """Select domain kind for component."""
@@ -387,7 +438,7 @@ class IndependentSource(Cpt):
         current for CCVS and CCCS components.
 
         """
-        return self.netmake(zero=True)
+        return self._clone(args=['0'] * len(self.explicit_args))
 
 class DependentSource(Dummy):
 
@@ -402,7 +453,7 @@ class DependentSource(Dummy):
         current for CCVS and CCCS components.
 
         """
-        return self.netmake(zero=True)    
+        return self._clone(args=['0'] * len(self.explicit_args))    
 
     
 class RLC(Cpt):
@@ -481,18 +532,23 @@ class RC(RLC):
         # through the L.
         n1, n2 = self.node_indexes
 
+        M = cct._G
         if self.type == 'C' and cct.kind == 'dc':
             Y = 0
+        elif self.type == 'C' and cct.kind in ('s', 'ivp'):
+            # Stamp C rather than s C.
+            M = cct._As
+            Y = self.cpt.C.expr
         else:
             Y = self.Y.expr
 
         if n1 >= 0 and n2 >= 0:
-            cct._G[n1, n2] -= Y
-            cct._G[n2, n1] -= Y
+            M[n1, n2] -= Y
+            M[n2, n1] -= Y
         if n1 >= 0:
-            cct._G[n1, n1] += Y
+            M[n1, n1] += Y
         if n2 >= 0:
-            cct._G[n2, n2] += Y
+            M[n2, n2] += Y
 
         if cct.kind == 'ivp' and self.cpt.hasic and n1 >= 0:
             I = self.Isc.expr            
@@ -505,9 +561,10 @@ class C(RC):
     
     def kill_initial(self):
         """Kill implicit sources due to initial conditions."""
-        return '%s %s %s %s; %s' % (
-            self.name, self.relnodes[0], self.relnodes[1],
-            arg_format(self.args[0]), self.opts)
+
+        if len(self.explicit_args) <= 1:
+            return self.copy()
+        return self._clone(args=self.args[0:1])
 
     def pre_initial_model(self):
 
@@ -679,6 +736,8 @@ class I(IndependentSource):
     def select(self, kind=None):
         """Select domain kind for component."""
 
+        if _only_kind(self.cpt.Isc, kind):
+            return self.copy()
         return '%s %s %s %s; %s' % (
             self.name, self.relnodes[0], self.relnodes[1],
             self.cpt.Isc.netval(kind), self.opts)
@@ -717,7 +776,11 @@ class I(IndependentSource):
 
 
 class K(Cpt):
-    
+
+    # A mutual inductance does not have initial conditions.
+    zeroic = True
+    hasic = None
+
     def __init__(self, cct, name, cpt_type, cpt_id, string,
                  opts_string, nodes, keyword, *args):
 
@@ -726,6 +789,16 @@ class K(Cpt):
         super (K, self).__init__(cct, name, cpt_type, cpt_id, string,
                                  opts_string, nodes, keyword, *args)
 
+    def _set_args(self, args):
+
+        self.args = args
+        self.explicit_args = args
+        if len(args) > 2:
+            self.k = cExpr(args[2])
+        else:
+            # Default value is the component name
+            self.k = cExpr(canonical_name(self.name))
+
     def stamp(self, cct):
 
         if cct.kind == 'dc':
@@ -735,16 +808,27 @@ class K(Cpt):
             raise RuntimeError('Should not be evaluating mutual inductance in'
                                ' time domain')
 
-        L1 = self.nodes[0]
-        L2 = self.nodes[1]
+        L1 = self.Lname1
+        L2 = self.Lname2
+
+        m1 = cct._branch_index(L1)
+        m2 = cct._branch_index(L2)
+
+        if cct.kind in ('s', 'ivp'):
+            # Stamp M = k sqrt(L1 L2) rather than s M.
+            LL1 = cct.elements[L1].cpt.L
+            LL2 = cct.elements[L2].cpt.L
+            M = self.k * LL1 * sqrt(LL2 / LL1).simplify()
+            num_nodes = cct._G.rows
+            cct._As[num_nodes + m1, num_nodes + m2] += -M.expr
+            cct._As[num_nodes + m2, num_nodes + m1] += -M.expr
+            return
 
         ZL1 = cct.elements[L1].Z
         ZL2 = cct.elements[L2].Z
 
-        ZM = self.cpt.k * sqrt(ZL1 * ZL2).simplify()
-
-        m1 = cct._branch_index(L1)
-        m2 = cct._branch_index(L2)
+        # ZM = k sqrt(L1 L2) s; this avoids sqrt(s**2).
+        ZM = self.k * ZL1 * sqrt(ZL2 / ZL1).simplify()
 
         cct._D[m1, m2] += -ZM.expr
         cct._D[m2, m1] += -ZM.expr
@@ -757,9 +841,10 @@ class L(RLC):
 
     def kill_initial(self):
         """Kill implicit sources due to initial conditions."""
-        return '%s %s %s %s; %s' % (
-            self.name, self.relnodes[0], self.relnodes[1],
-            arg_format(self.args[0]), self.opts)
+
+        if len(self.explicit_args) <= 1:
+            return self.copy()
+        return self._clone(args=self.args[0:1])
 
     def stamp(self, cct):
 
@@ -777,10 +862,16 @@ class L(RLC):
 
         if cct.kind == 'dc':
             Z = 0
+        elif cct.kind in ('s', 'ivp'):
+            # Stamp L rather than s L.
+            num_nodes = cct._G.rows
+            cct._As[num_nodes + m, num_nodes + m] += -self.cpt.L.expr
+            Z = 0
         else:
             Z = self.Z.expr
 
-        cct._D[m, m] += -Z
+        if Z != 0:
+            cct._D[m, m] += -Z
 
         if cct.kind == 'ivp' and self.cpt.hasic:
             V = self.Voc.expr            
@@ -980,6 +1071,8 @@ class V(IndependentSource):
     def select(self, kind=None):
         """Select domain kind for component."""
 
+        if _only_kind(self.cpt.Voc, kind):
+            return self.copy()
         return '%s %s %s %s; %s' % (
             self.name, self.relnodes[0], self.relnodes[1],
             self.cpt.Voc.netval(kind), self.opts)        
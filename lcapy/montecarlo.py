@@ -0,0 +1,188 @@
+"""This module performs Monte Carlo tolerance analysis of circuits.
+The component values are drawn at random about their nominal values
+and the outputs are evaluated for all the samples using the numerical
+parameter sweep.  The samples can be split between a pool of
+processes.
+
+Copyright 2019 Michael Hayes, UCECE
+
+"""
+
+from __future__ import division
+from .paramsweep import param_sweep
+from fnmatch import fnmatchcase
+import numpy as np
+import sympy as sym
+
+__all__ = ('MonteCarloResult', 'monte_carlo')
+
+
+def _nominal_value(cpt):
+
+    args = cpt.explicit_args
+    if args == ():
+        raise ValueError('Component %s does not have a value' % cpt.name)
+    try:
+        return float(sym.sympify(args[0]))
+    except (TypeError, ValueError, sym.SympifyError):
+        raise ValueError('Component %s does not have a numerical value: %s'
+                         % (cpt.name, args[0]))
+
+
+def _draw(distribution, nominal, tolerance, n, rng):
+    """Draw n values about the nominal value.  For a uniform
+    distribution the values are within the tolerance; for a normal
+    distribution the tolerance is three standard deviations."""
+
+    if distribution == 'uniform':
+        deviation = rng.uniform(-1, 1, n)
+    elif distribution == 'normal':
+        deviation = rng.normal(0, 1 / 3, n)
+    elif callable(distribution):
+        deviation = distribution(n, rng)
+    else:
+        raise ValueError('Unknown distribution %s, expecting uniform or normal'
+                         % distribution)
+    return nominal * (1 + tolerance * deviation)
+
+
+def _sweep_worker(netlist, params, outputs, kind):
+    """Evaluate outputs for a chunk of the samples.  This is run in a
+    separate process and so the circuit is passed as a string."""
+
+    from .circuit import Circuit
+
+    cct = Circuit()
+    cct.add(netlist)
+    return param_sweep(cct, params, outputs, grid=False, kind=kind,
+                       method='numeric')
+
+
+class MonteCarloResult(object):
+    """This class stores the results of a Monte Carlo analysis.  The
+    attribute values is a dictionary of the arrays of the sampled
+    component values and the attribute results is a list of arrays of
+    the output values, one for each output."""
+
+    def __init__(self, outputs, values, results):
+
+        self.outputs = outputs
+        self.values = values
+        self.results = results
+
+    def __getitem__(self, index):
+        """Return array of output values for the specified output
+        index."""
+
+        return self.results[index]
+
+    def percentile(self, q):
+        """Return list of the q-th percentiles of each output.  The
+        magnitude is used for complex outputs."""
+
+        return [np.percentile(np.abs(result) if np.iscomplexobj(result)
+                              else result, q) for result in self.results]
+
+    def summary(self, percentiles=(0.5, 2.5, 50, 97.5, 99.5)):
+        """Return list of dictionaries of statistics for each output.
+        The magnitude is used for complex outputs."""
+
+        summaries = []
+        for result in self.results:
+            if np.iscomplexobj(result):
+                result = np.abs(result)
+            summary = {'mean': np.mean(result), 'std': np.std(result),
+                       'min': np.min(result), 'max': np.max(result)}
+            for q, value in zip(percentiles,
+                                np.percentile(result, percentiles)):
+                summary['p%s' % q] = value
+            summaries.append(summary)
+        return summaries
+
+    def yield_fraction(self, index, lower=None, upper=None):
+        """Return fraction of samples where the specified output is
+        within the bounds lower and upper."""
+
+        result = self.results[index]
+        if np.iscomplexobj(result):
+            result = np.abs(result)
+        ok = np.ones(len(result), dtype=bool)
+        if lower is not None:
+            ok &= result >= lower
+        if upper is not None:
+            ok &= result <= upper
+        return np.mean(ok)
+
+    def __repr__(self):
+
+        return '%s(%d outputs, %d samples)' % (
+            self.__class__.__name__, len(self.results),
+            len(self.results[0]) if self.results != [] else 0)
+
+
+def monte_carlo(cct, tolerances, n, outputs, distribution='uniform',
+                seed=None, kind=None, f=None, workers=None):
+    """Perform Monte Carlo analysis of circuit cct.  tolerances is a
+    dictionary of relative tolerances keyed by component name
+    patterns, for example, {'R*': 0.01, 'C*': 0.05}.  A tolerance can
+    also be a tuple (tolerance, distribution) to override the default
+    distribution ('uniform' or 'normal').  For a normal distribution,
+    the tolerance is three standard deviations.
+
+    n is the number of samples and outputs are specified as for
+    param_sweep.  If f is not None, s-domain outputs, such as transfer
+    functions, are evaluated at the frequency f.  seed sets the random
+    number generator seed.
+
+    If workers is not None, the samples are split between this many
+    processes.  The outputs must then be picklable.
+
+    A MonteCarloResult object is returned."""
+
+    rng = np.random.RandomState(seed)
+
+    params = {}
+    for name, cpt in cct.elements.items():
+        for pattern, tolerance in tolerances.items():
+            if not fnmatchcase(name, pattern):
+                continue
+            dist = distribution
+            if isinstance(tolerance, tuple):
+                tolerance, dist = tolerance
+            params[name] = _draw(dist, _nominal_value(cpt), tolerance, n,
+                                 rng)
+            break
+
+    if params == {}:
+        raise ValueError('No components match %s' %
+                         ', '.join(tolerances.keys()))
+
+    values = params.copy()
+    if f is not None:
+        params['f'] = np.ones(n) * f
+
+    if workers is None:
+        results = param_sweep(cct, params, outputs, grid=False, kind=kind,
+                              method='numeric')
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        netlist = cct.netlist()
+        chunks = np.array_split(np.arange(n), workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_sweep_worker, netlist,
+                                       dict([(key, value[chunk]) for
+                                             key, value in params.items()]),
+                                       outputs, kind)
+                       for chunk in chunks if len(chunk) != 0]
+            parts = [future.result() for future in futures]
+        if isinstance(outputs, list):
+            results = [np.concatenate([part[m] for part in parts])
+                       for m in range(len(outputs))]
+        else:
+            results = np.concatenate(parts)
+
+    if not isinstance(outputs, list):
+        outputs = [outputs]
+        results = [results]
+    return MonteCarloResult(outputs, values, results)
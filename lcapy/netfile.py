@@ -19,6 +19,16 @@ class NetfileMixin(object):
         self._anon[kind] += 1        
         return 'anon' + str(self._anon[kind])
 
+    def _keep_anon(self, kind, relname):
+        """Advance the anonymous identifiers for kind past that of a
+        component, with name relname, copied from another netlist."""
+
+        try:
+            number = int(relname[len(kind) + len('anon'):])
+        except ValueError:
+            return
+        self._anon[kind] = max(self._anon.get(kind, 0), number)
+
     def _include(self, string):
 
         parts = string.split(' ')
@@ -16,6 +16,17 @@ from .context import global_context
 from .super import Vsuper, Isuper
 from .schematic import Schematic, Opts, SchematicOpts
 from .mna import MNA, Nodedict, Branchdict
+from .solver import solvers
+from .numeric import all_float_values
+from .sym import simplify_policies, get_simplify_policy
+from .sweep import frequency_sweep
+from .transient import transient
+from .statespace import state_space
+from .polezero import circuit_poles, transfer_zeros
+from .adjoint import adjoint_noise
+from .paramsweep import param_sweep
+from .montecarlo import monte_carlo
+from .superposition import SuperpositionSolver
 from .netfile import NetfileMixin
 from . import mnacpts
 from copy import copy
@@ -170,8 +181,67 @@ class SubNetlist(object):
         return cct.sch.draw(filename=filename, opts=self._netlist.opts, **kwargs)
     
         
+class _NodeSets(object):
+    """Disjoint sets of nodes with path compression and union by size."""
+
+    def __init__(self, nodes):
+
+        self.order = list(nodes)
+        self.parent = dict([(node, node) for node in self.order])
+        self.size = dict([(node, 1) for node in self.order])
+        self.key = dict([(node, node) for node in self.order])
+
+    def find(self, node):
+
+        root = node
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[node] != root:
+            self.parent[node], node = root, self.parent[node]
+        return root
+
+    def union(self, n1, n2):
+        """Merge the sets containing n1 and n2.  The merged set keeps
+        the key of the set containing n1."""
+
+        r1, r2 = self.find(n1), self.find(n2)
+        if r1 == r2:
+            return
+        key = self.key[r1]
+        if self.size[r1] < self.size[r2]:
+            r1, r2 = r2, r1
+        self.parent[r2] = r1
+        self.size[r1] += self.size[r2]
+        self.key[r1] = key
+
+    def groups(self):
+        """Return dictionary of lists of nodes keyed by the set key.
+        The keys are in the order that the nodes were given."""
+
+        members = {}
+        for node in self.order:
+            members.setdefault(self.find(node), []).append(node)
+
+        groups = OrderedDict()
+        for node in self.order:
+            root = self.find(node)
+            if self.key[root] == node:
+                groups[node] = members[root]
+        return groups
+
+
 class NetlistMixin(object):
 
+    # Method used to solve the MNA equations; see solver.py.
+    _solver = 'bareiss'
+    # Use numerical solver: True, False, or None to decide
+    # automatically; see numeric.py.
+    _numeric = None
+    # Simplification policy and time budget for the results of
+    # analysis; None to use the global values, see sym.py.
+    _simplify_policy = None
+    _simplify_budget = None
+
     def __init__(self, filename=None, context=None):
 
         self._elements = OrderedDict()
@@ -269,6 +339,27 @@ class NetlistMixin(object):
         for node in cpt.nodes:
             self._node_add(node, cpt)
 
+    def _add(self, net, namespace=''):
+        """Add net description or component copied from another netlist
+        with the component _clone method.  The latter avoids re-parsing
+        the net description."""
+
+        if not isinstance(net, mnacpts.Cpt):
+            return super(NetlistMixin, self)._add(net, namespace)
+
+        if net.id == '' and net.name in self._elements:
+            # The name of the anonymous component has already been
+            # used by a component created by the parser.
+            net.relname = net.type + self._make_anon(net.type)
+            net.name = net.namespace + net.relname
+            net._net = None
+        elif net.id == '':
+            # Keep the original name so that the components copied by
+            # select and kill match, and keep the parser in step.
+            self._keep_anon(net.type, net.relname)
+        net.cct = self
+        self._cpt_add(net)
+
     def copy(self):
         """Create a copy of the netlist"""
 
@@ -288,7 +379,91 @@ class NetlistMixin(object):
         if self.__class__ == 'Circuit':
             return Circuit(context=context)
         # If have OnePort, Network, etc., treat as Netlist
-        return Netlist(context=context)
+        new = Netlist(context=context)
+        new._solver = self._solver
+        new._numeric = self._numeric
+        new._simplify_policy = self._simplify_policy
+        new._simplify_budget = self._simplify_budget
+        return new
+
+    @property
+    def solver(self):
+        """Method used to solve the MNA equations: 'bareiss'
+        (fraction-free LU, default), 'lu', or 'inv' (matrix inversion)."""
+
+        return self._solver
+
+    @solver.setter
+    def solver(self, method):
+
+        if method not in solvers:
+            raise ValueError('Unknown solver %s, expecting one of %s' %
+                             (method, ', '.join(sorted(solvers.keys()))))
+        self._solver = method
+        self._invalidate()
+
+    @property
+    def numeric(self):
+        """True to solve the MNA equations numerically, False to solve
+        them symbolically, or None (default) to use the numerical
+        solver if any component value is given in floating point
+        notation.  The numerical solver is only used when the MNA A
+        matrix is numerical, for example, for DC, AC, or resistive
+        circuits with numerical component values."""
+
+        return self._numeric
+
+    @numeric.setter
+    def numeric(self, numeric):
+
+        if numeric not in (True, False, None):
+            raise ValueError('numeric must be True, False, or None')
+        self._numeric = numeric
+        self._invalidate()
+
+    @property
+    def simplify_policy(self):
+        """Simplification policy for the analysis results: 'none',
+        'cancel', 'factor', 'full', or None (default) to use the
+        global policy; see sym.set_simplify_policy."""
+
+        return self._simplify_policy
+
+    @simplify_policy.setter
+    def simplify_policy(self, policy):
+
+        if policy is not None and policy not in simplify_policies:
+            raise ValueError('Unknown simplify policy %s, expecting one of %s'
+                             % (policy, ', '.join(simplify_policies)))
+        self._simplify_policy = policy
+        self._invalidate()
+
+    def _canonical(self, result):
+        """Convert result to canonical form unless the simplification
+        policy is 'none' or 'cancel'."""
+
+        policy = self.simplify_policy
+        if policy is None:
+            policy = get_simplify_policy()[0]
+        if policy in ('none', 'cancel'):
+            return result
+        return result.canonical()
+
+    @property
+    def simplify_budget(self):
+        """Time in seconds allowed to simplify each analysis result
+        before falling back to cancelling it, or None (default) to use
+        the global budget; see sym.set_simplify_policy."""
+
+        return self._simplify_budget
+
+    @simplify_budget.setter
+    def simplify_budget(self, budget):
+
+        if budget is not None and budget <= 0:
+            raise ValueError('Simplify budget must be positive')
+        self._simplify_budget = budget
+        self._invalidate()
 
     def remove(self, name):
         """Remove specified element."""
@@ -307,27 +482,17 @@ class NetlistMixin(object):
         This returns a dictionary keyed by the unique node names with
         values being lists of nodes of the same potential."""
 
-        enodes = {}
-        for key in self.nodes.keys():
-            enodes[key] = [key]
-
-        # Then augment with nodes connected by wires.
-        for m, elt in enumerate(self.elements.values()):
-            if elt.type not in ('W', ):
-                continue
-
-            n1, n2 = elt.nodes
-
-            for key1, nodes in enodes.items():
-                if n1 in nodes:
-                    break
+        # Note, accessing elements can add nodes.
+        elements = self.elements
 
-            for key2, nodes in enodes.items():
-                if n2 in nodes:
-                    break
-
-            if key1 != key2:
-                enodes[key1].extend(enodes.pop(key2))
+        # Merge the nodes connected by wires using disjoint sets.  A
+        # merged set keeps the key of the set containing the first
+        # node of the wire.
+        sets = _NodeSets(self.nodes.keys())
+        for elt in elements.values():
+            if elt.type in ('W', ):
+                sets.union(*elt.nodes)
+        enodes = sets.groups()
 
         # Alter keys to avoid underscore and to ensure that have a '0'
         # key if possible.
@@ -1043,7 +1208,7 @@ class Netlist(NetlistMixin, NetfileMixin):
     def _invalidate(self):
 
         for attr in ('_sch', '_sub', '_Vdict', '_Idict', '_analysis',
-                     '_node_map'):
+                     '_node_map', '_pencil_sub'):
             try:
                 delattr(self, attr)
             except:
@@ -1100,6 +1265,11 @@ class Netlist(NetlistMixin, NetfileMixin):
         for key, sources in groups.items():
             self._sub[key] = GroupNetlist(self, sources, key)
 
+        # The groups share a single factorisation of the A matrix.
+        shared = SuperpositionSolver(self, self._sub)
+        for key in shared.kinds:
+            self._sub[key]._shared = shared
+
         return self._sub
 
     @property
@@ -1151,8 +1321,7 @@ class Netlist(NetlistMixin, NetfileMixin):
         for sub in self.sub.values():
             I = sub.get_I(name)
             result.add(I)
-        result = result.canonical()            
-        return result
+        return self._canonical(result)
 
     def get_i(self, name):
         """Time-domain current through component"""
@@ -1171,14 +1340,151 @@ class Netlist(NetlistMixin, NetfileMixin):
         for sub in self.sub.values():
             Vd = sub.get_Vd(Np, Nm)
             result.add(Vd)
-        result = result.canonical()
-        return result
+        return self._canonical(result)
 
     def get_vd(self, Np, Nm):
         """Time-domain voltage drop between nodes"""
 
         return self.get_Vd(Np, Nm).time()
 
+    def sweep(self, f=None, omega=None):
+        """Solve the circuit numerically for each frequency in the array
+        f (or each angular frequency in omega).  This returns a
+        SweepResult object with attributes V (node voltages) and I
+        (branch currents); these are complex arrays with shape
+        (nodes, frequencies) and (branches, frequencies).
+
+        The circuit is excited by the AC and s-domain components of
+        the independent sources; AC sources are applied at every
+        frequency.  The component values must be numerical.
+
+        For example, cct.sweep(f=np.logspace(1, 9, 2000))[2] gives
+        the voltage at node 2."""
+
+        return frequency_sweep(self, f=f, omega=omega)
+
+    def transient(self, t_stop, dt, method='trapezoidal'):
+        """Simulate the circuit numerically from t = 0 to t_stop with the
+        time step dt.  This returns a TransientResult object with
+        attributes t (times), V (node voltages), and I (branch
+        currents); the latter are arrays with shape (nodes, times) and
+        (branches, times).  The method can be 'trapezoidal' or
+        'backward-euler'.  The component values must be numerical.
+
+        For example, cct.transient(1e-3, 1e-6)[2] gives the voltage at
+        node 2."""
+
+        return transient(self, t_stop, dt, method=method)
+
+    def ss(self, inputs=None, outputs=None):
+        """Return StateSpace object for the state-space model of the
+        circuit.  inputs is a list of the names of the independent
+        sources (by default all of them) and outputs is a list of
+        node names, tuples of two node names (voltage drops), or
+        component names (currents).  By default, the outputs are the
+        node voltages.  For example,
+
+        A, B, C, D = cct.ss(['V1'], [2, 'L1'])
+
+        The matrices are NumPy arrays if the component values are
+        numerical; use the scipy method to convert to a
+        scipy.signal.StateSpace object.  See statespace.state_space
+        for details."""
+
+        return state_space(self, inputs, outputs)
+
+    def poles(self):
+        """Return NumPy array of the poles (natural frequencies) of the
+        circuit with the independent sources killed.  These are found
+        numerically as the generalised eigenvalues of the matrix
+        pencil G + s C; see G_matrix and C_matrix.  The component
+        values must be numerical."""
+
+        return circuit_poles(self)
+
+    def zeros(self, N1p, N1m, N2p, N2m):
+        """Return NumPy array of the zeros of the voltage transfer
+        function V2 / V1 found with the transfer method, where V1 is
+        V[N1p] - V[N1m] and V2 is V[N2p] - V[N2m].  These are found
+        numerically as generalised eigenvalues.  The component values
+        must be numerical."""
+
+        return transfer_zeros(self, N1p, N1m, N2p, N2m)
+
+    def noise_analysis(self, Np, Nm=0, f=None, omega=None, params=None):
+        """Find the noise at the output V[Np] - V[Nm] due to each noise
+        source using a single solve of the adjoint network.  This
+        returns a NoiseResult object with attributes transfers (the
+        transfer function from each source), contributions (the output
+        noise due to each source), and total (the total output noise).
+
+        If the frequencies f (or angular frequencies omega) are
+        specified, the analysis is numerical.  For example,
+
+        cct.noisy().noise_analysis(2, f=fv, params={'k': 1.38e-23, 'T': 300})
+
+        See adjoint.adjoint_noise for details."""
+
+        return adjoint_noise(self, Np, Nm, f=f, omega=omega, params=params)
+
+    @property
+    def _pencil_netlist(self):
+        """Return s-domain netlist with all the sources zeroed that is used
+        to find the G and C matrices."""
+
+        if not hasattr(self, '_pencil_sub'):
+            self._pencil_sub = GroupNetlist(self, (), 's')
+        return self._pencil_sub
+
+    @property
+    def G_matrix(self):
+        """Return frequency-independent part G of the MNA A matrix for
+        Laplace analysis, where A = G + s C.  This is a SciPy sparse
+        matrix if the component values are numerical; otherwise it is
+        a SymPy sparse matrix."""
+
+        return self._pencil_netlist.G_matrix
+
+    @property
+    def C_matrix(self):
+        """Return part C of the MNA A matrix proportional to s for
+        Laplace analysis, where A = G + s C.  This is a SciPy sparse
+        matrix if the component values are numerical; otherwise it is
+        a SymPy sparse matrix."""
+
+        return self._pencil_netlist.C_matrix
+
+    def param_sweep(self, params, outputs, grid=True, kind=None,
+                    method='auto'):
+        """Evaluate outputs for each of the parameter values specified
+        by the dictionary params.  For example,
+
+        cct.param_sweep({'R1': R1values, 'C1': C1values}, [2, (3, 0)])
+
+        returns a list of arrays of the voltage at node 2 and the
+        voltage drop between nodes 3 and 0 for every combination of
+        the R1 and C1 values.  If grid is False, the values are taken
+        in turn from each array.  See paramsweep.param_sweep for
+        details."""
+
+        return param_sweep(self, params, outputs, grid=grid, kind=kind,
+                           method=method)
+
+    def monte_carlo(self, tolerances, n, outputs, distribution='uniform',
+                    seed=None, kind=None, f=None, workers=None):
+        """Perform Monte Carlo tolerance analysis.  For example,
+
+        cct.monte_carlo({'R*': 0.01, 'C*': 0.05}, 10000, [2])
+
+        draws 10000 sets of values for all the resistors (1%%
+        tolerance) and capacitors (5%% tolerance) and evaluates the
+        voltage at node 2.  A MonteCarloResult object is returned;
+        see montecarlo.monte_carlo for details."""
+
+        return monte_carlo(self, tolerances, n, outputs,
+                           distribution=distribution, seed=seed, kind=kind,
+                           f=f, workers=workers)
+
     
 class GroupNetlist(NetlistMixin, MNA):
 
@@ -1190,6 +1496,9 @@ class GroupNetlist(NetlistMixin, MNA):
         obj.kind = kind
         obj.__class__ = cls
         obj._analysis = obj.analyse(sourcenames)
+        # Select rewrites the source values, say 10.0 as 10, so check
+        # the values the user entered.
+        obj._float_values = all_float_values(netlist.elements)
         return obj
 
     def __init__(cls, netlist, sources, kind):
@@ -1199,7 +1508,7 @@ class GroupNetlist(NetlistMixin, MNA):
         """Current through component"""
 
         self._solve()
-        return self._Idict[name].canonical()
+        return self._canonical(self._Idict[name])
 
     def get_i(self, name):
         """Time-domain current through component"""
@@ -1210,7 +1519,7 @@ class GroupNetlist(NetlistMixin, MNA):
         """Voltage drop between nodes"""
 
         self._solve()
-        return (self._Vdict[Np] - self._Vdict[Nm]).canonical()
+        return self._canonical(self._Vdict[Np] - self._Vdict[Nm])
 
     def get_vd(self, Np, Nm):
         """Time-domain voltage drop between nodes"""
@@ -4,6 +4,7 @@ from .functions import sqrt
 from .sym import pi
 from .context import context
 from .omegaexpr import omegaExpr
+from .fourier import inverse_fourier_fft
 import sympy as sym
 import numpy as np
 
@@ -167,9 +168,26 @@ class noiseExpr(omegaExpr):
               ', assumed zero')
         return 0    
 
-    def autocorrelation(self):
+    def autocorrelation(self, tvector=None, window='rectangular', pad=4):
+        """Return autocorrelation of the noise process.  This is the
+        inverse Fourier transform of the two-sided power spectral
+        density, A(|omega|)**2 / 2, where A is the one-sided amplitude
+        spectral density, so that the autocorrelation at zero lag is
+        the mean square value.
+
+        If tvector is specified, the autocorrelation is evaluated
+        numerically using the FFT for the equally spaced lags tvector
+        and a NumPy array is returned.  See fourier.inverse_fourier_fft
+        for the window and pad arguments."""
+
+        if tvector is not None:
+            def psd(f):
+                return np.abs(self.evaluate(2 * np.pi * np.abs(f)))**2 / 2
+
+            return inverse_fourier_fft(psd, tvector, window, pad)
+
         # Convert to two-sided spectrum
-        S = self.subs(self.var, abs(self.var)) / sqrt(2)
+        S = omegaExpr(self.expr.subs(self.var, abs(self.var))**2 / 2)
         return S.inverse_fourier()
 
     def plot(self, fvector=None, **kwargs):
@@ -0,0 +1,162 @@
+"""This module provides a numerical solver for the MNA equations.  It
+is used when all the elements of the A matrix are numbers, say for
+DC, AC, or resistive circuits with numerical component values.  The
+A matrix is converted to a SciPy sparse matrix and factored with
+scipy.sparse.linalg.splu.
+
+The Z vector can contain symbolic expressions, such as a source
+voltage that is a function of time.  Each element of Z is split into
+numerical coefficients of a few basis expressions and the equations
+are solved for each basis expression.
+
+Copyright 2019 Michael Hayes, UCECE
+
+"""
+
+from __future__ import division
+from .solver import Solver, RowSolution
+import numpy as np
+import sympy as sym
+
+__all__ = ('NumericSolver', 'is_numeric_matrix', 'all_float_values')
+
+
+def is_numeric_matrix(A):
+    """Return True if all the elements of SymPy matrix A are numbers."""
+
+    if hasattr(A, '_smat'):
+        values = A._smat.values()
+    else:
+        values = list(A)
+    for value in values:
+        if not sym.sympify(value).is_number:
+            return False
+    return True
+
+
+def _is_float_string(arg):
+
+    arg = str(arg)
+    try:
+        float(arg)
+    except ValueError:
+        return False
+    return '.' in arg or 'e' in arg or 'E' in arg
+
+
+def all_float_values(elements):
+    """Return True if every component value is written in floating
+    point notation, such as 4.7e3.  These values are approximate and
+    so an exact solution is not warranted.  A single exact value,
+    such as 220, keeps the exact solution."""
+
+    found = False
+    for elt in elements.values():
+        for arg in elt.args:
+            if not _is_float_string(arg):
+                return False
+            found = True
+    return found
+
+
+def _split(expr):
+    """Split expression into a list of (coefficient, basis) pairs where
+    coefficient is a number."""
+
+    parts = []
+    for term in sym.Add.make_args(sym.sympify(expr)):
+        if term == 0:
+            continue
+        coeff, basis = term.as_independent(*term.free_symbols,
+                                           as_Add=False)
+        parts.append((complex(coeff), basis))
+    return parts
+
+
+def _sympify_number(value):
+
+    if value == 0:
+        return sym.S.Zero
+    if value.imag == 0:
+        return sym.Float(value.real)
+    return sym.Float(value.real) + sym.I * sym.Float(value.imag)
+
+
+class NumericSolver(Solver):
+    """Solver using sparse LU factorisation of a numerical A matrix."""
+
+    def _factor(self, A):
+
+        from scipy.sparse import csc_matrix
+        from scipy.sparse.linalg import splu
+
+        N = self.size
+        if hasattr(A, '_smat'):
+            items = A._smat.items()
+        else:
+            items = [((i, j), A[i, j]) for i in range(N) for j in range(N)
+                     if A[i, j] != 0]
+
+        rows, cols, values = [], [], []
+        for (i, j), value in items:
+            rows.append(i)
+            cols.append(j)
+            values.append(complex(value))
+
+        values = np.array(values, dtype=complex)
+        self.real = np.all(values.imag == 0)
+        if self.real:
+            values = values.real
+
+        Anum = csc_matrix((values, (rows, cols)), shape=(N, N))
+        try:
+            self.lu = splu(Anum)
+        except RuntimeError:
+            raise ValueError('Matrix is singular')
+
+        # splu does not always detect a singular matrix.
+        if not np.all(np.isfinite(self.lu.U.data)) or \
+           np.any(self.lu.U.diagonal() == 0):
+            raise ValueError('Matrix is singular')
+
+    def solution(self, Z):
+
+        # The numerical solution is cheap so all the rows are found.
+        results = self.solve(Z)
+        return RowSolution(self.size, Z.cols, lambda i: list(results[i, :]))
+
+    def solve(self, Z):
+
+        N = self.size
+        results = sym.zeros(N, Z.cols)
+
+        for m in range(Z.cols):
+            bases = []
+            entries = []
+            for i in range(N):
+                for coeff, basis in _split(Z[i, m]):
+                    if basis not in bases:
+                        bases.append(basis)
+                    entries.append((i, bases.index(basis), coeff))
+
+            if bases == []:
+                continue
+
+            b = np.zeros((N, len(bases)), dtype=complex)
+            for i, k, coeff in entries:
+                b[i, k] += coeff
+
+            if not self.real:
+                x = self.lu.solve(b)
+            elif np.any(b.imag != 0):
+                # The real factors cannot be used with a complex vector.
+                x = self.lu.solve(b.real) + 1j * self.lu.solve(b.imag)
+            else:
+                x = self.lu.solve(b.real)
+            x = x.reshape(N, len(bases))
+
+            for i in range(N):
+                results[i, m] = sym.Add(*[_sympify_number(x[i, k]) * basis
+                                          for k, basis in
+                                          enumerate(bases)])
+        return results
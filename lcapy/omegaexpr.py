@@ -1,7 +1,8 @@
 from __future__ import division
-from .fourier import inverse_fourier_transform
+from .fourier import inverse_fourier_transform, inverse_fourier_fft
 from .sfwexpr import sfwExpr
 from .sym import fsym, ssym, tsym, omegasym, j, pi
+import numpy as np
 
 
 class omegaExpr(sfwExpr):
@@ -25,8 +26,16 @@ class omegaExpr(sfwExpr):
             raise ValueError(
                 'omega-domain expression %s cannot depend on t' % self.expr)
 
-    def inverse_fourier(self):
-        """Attempt inverse Fourier transform."""
+    def inverse_fourier(self, tvector=None, window='rectangular', pad=4):
+        """Attempt inverse Fourier transform.  If tvector is specified,
+        the transform is evaluated numerically using the FFT at the
+        equally spaced times tvector and a NumPy array is returned.
+        See fourier.inverse_fourier_fft for the window and pad
+        arguments."""
+
+        if tvector is not None:
+            return inverse_fourier_fft(lambda f: self.evaluate(2 * np.pi * f),
+                                       tvector, window, pad)
 
         expr = self.subs(2 * pi * fsym)
         result = inverse_fourier_transform(expr, fsym, tsym)
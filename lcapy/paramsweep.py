@@ -0,0 +1,352 @@
+"""This module evaluates circuit quantities, such as node voltages
+or transfer functions, for many values of the component values.
+
+The circuit is solved symbolically once with the swept component
+values replaced by symbols.  The results are then converted into
+NumPy functions that are evaluated for all the parameter values at
+once.  For large circuits, where the symbolic solution is too
+expensive, the MNA matrices are evaluated numerically for each set of
+parameter values and solved using batched matrix operations.
+
+Copyright 2019 Michael Hayes, UCECE
+
+"""
+
+from __future__ import division
+from .sym import canonical_name, ssym, fsym, omegasym, symsimplify
+from .super import Super
+from .expr import Expr
+from .sweep import batched_solve
+from copy import copy
+import numpy as np
+import sympy as sym
+
+__all__ = ('param_sweep', )
+
+# Largest MNA system (number of unknowns) that is solved symbolically
+# when method is 'auto'.
+max_symbolic_size = 12
+
+
+def _value_name(cpt):
+    """Return name of the symbol used for a component value."""
+
+    name = cpt.type
+    if cpt.id != '':
+        name += '_' + cpt.id
+    return canonical_name(name)
+
+
+def _param_names(cct, params):
+    """Return list of (param, component name, symbol name)."""
+
+    names = []
+    for param in params:
+        if param in cct.elements:
+            cpt = cct.elements[param]
+            names.append((param, cpt.name, _value_name(cpt)))
+        else:
+            names.append((param, None, canonical_name(param)))
+    return names
+
+
+def _substitute(cct, values, numeric=None):
+    """Create a new netlist with the first argument of the components in
+    dictionary values replaced."""
+
+    new = cct._new()
+    new.opts = copy(cct.opts)
+    if numeric is not None:
+        new.numeric = numeric
+
+    for cpt in cct._elements.values():
+        if cpt.name not in values:
+            new._add(cpt.copy())
+            continue
+        args = cpt.explicit_args
+        if args == () and cpt.args != ():
+            args = cpt.args
+        if args == ():
+            raise ValueError('Component %s has no value to sweep' % cpt.name)
+        args = (values[cpt.name], ) + tuple(args[1:])
+        new._add(cpt._clone(args=[str(arg) for arg in args]))
+    return new
+
+
+def _output_value(cct, output):
+    """Evaluate an output for circuit cct.  An output can be a node
+    name, a tuple of two nodes (voltage drop), a tuple of four nodes
+    (transfer function), or a function of the circuit."""
+
+    if callable(output):
+        return output(cct)
+    if isinstance(output, tuple):
+        if len(output) == 2:
+            return cct.get_Vd(*output)
+        if len(output) == 4:
+            return cct.transfer(*output)
+        raise ValueError('Output %s must be a tuple of 2 or 4 nodes' %
+                         (output, ))
+    return cct[output].V
+
+
+def _output_expr(value, kind):
+    """Convert an output value to a SymPy expression, selecting the
+    transform domain kind if the value is a superposition."""
+
+    if isinstance(value, Super):
+        if kind is None:
+            if len(value) != 1:
+                raise ValueError('Need to specify kind for output with kinds %s'
+                                 % ', '.join([str(k) for k in value.keys()]))
+            kind = list(value.keys())[0]
+        value = value.select(kind)
+    if isinstance(value, Expr):
+        value = value.expr
+    return sym.sympify(value)
+
+
+def _subs_frequency(expr, names):
+    """If expr is in the s-domain and the frequency or angular
+    frequency is a parameter, substitute for s."""
+
+    if not expr.has(ssym) or 's' in names:
+        return expr
+    if 'f' in names:
+        return expr.subs(ssym, sym.I * 2 * sym.pi * fsym)
+    if 'omega' in names:
+        return expr.subs(ssym, sym.I * omegasym)
+    return expr
+
+
+def _lambdify(expr, names):
+    """Convert expr into a NumPy function of the symbols with the
+    specified names."""
+
+    symbols = dict([(symbol.name, symbol) for symbol in expr.free_symbols])
+    unknown = set(symbols.keys()) - set(names)
+    if unknown != set():
+        raise ValueError('Output %s depends on %s that are not swept' %
+                         (expr, ', '.join(sorted(unknown))))
+    args = [symbols.get(name, sym.Symbol(name)) for name in names]
+    return sym.lambdify(args, expr, modules='numpy')
+
+
+def _evaluate_symbolic(cct, outputs, names, arrays, kind):
+
+    values = dict([(cptname, symname) for param, cptname, symname in names
+                   if cptname is not None])
+    symcct = _substitute(cct, values)
+
+    symnames = [symname for param, cptname, symname in names]
+    results = []
+    for output in outputs:
+        expr = _output_expr(_output_value(symcct, output), kind)
+        expr = _subs_frequency(expr, symnames)
+        expr = symsimplify(expr, cct.simplify_policy, cct.simplify_budget)
+        func = _lambdify(expr, symnames)
+        result = np.broadcast_arrays(func(*arrays), *arrays)[0]
+        results.append(np.array(result))
+    return results
+
+
+def _evaluate_points(expr, env, P):
+    """Evaluate expr for each of the P sets of values in the dictionary
+    env, keyed by symbol name."""
+
+    expr = sym.sympify(expr)
+    names = sorted(env.keys())
+    func = _lambdify(expr, names)
+    # If expr is a constant, func returns a scalar.
+    return np.ones(P, dtype=complex) * func(*[env[name] for name in names])
+
+
+def _solve_numeric(cct, kind, env, P):
+    """Solve circuit cct numerically for each of the P sets of values
+    in the dictionary env.  The MNA subcircuit for the domain kind and
+    the array of unknowns, with one column for each set of values, are
+    returned."""
+
+    subs = cct.sub
+    if kind is None:
+        if len(subs) != 1:
+            raise ValueError('Need to specify kind for circuit with kinds %s'
+                             % ', '.join([str(k) for k in subs.keys()]))
+        kind = list(subs.keys())[0]
+    sub = subs[kind]
+    sub._analyse()
+
+    env = env.copy()
+    if sub.kind in ('s', 'ivp'):
+        if 'f' in env:
+            env['s'] = 2j * np.pi * env['f']
+        elif 'omega' in env:
+            env['s'] = 1j * env['omega']
+        elif 's' not in env:
+            raise ValueError('Need to sweep f, omega, or s for s-domain'
+                             ' analysis')
+
+    N = sub._A.rows
+    extra = [(i, j, _evaluate_points(expr, env, P))
+             for (i, j), expr in sub._A._smat.items()]
+    Z = np.zeros((N, P), dtype=complex)
+    for (i, j), expr in sub._Z._smat.items():
+        Z[i] = _evaluate_points(expr, env, P)
+
+    zeros = np.zeros((N, N), dtype=complex)
+    try:
+        X = batched_solve(zeros, zeros, extra, Z, np.zeros(P))
+    except ValueError:
+        raise ValueError('The MNA A matrix is singular for some of the'
+                         ' parameter values')
+    return sub, X
+
+
+def _node_drop(sub, X, Np, Nm):
+    """Return the voltage drop between nodes Np and Nm from the array of
+    unknowns X found by _solve_numeric."""
+
+    result = np.zeros(X.shape[1], dtype=complex)
+    for node, sign in ((Np, 1), (Nm, -1)):
+        if isinstance(node, int):
+            node = '%d' % node
+        index = sub._node_index(node)
+        if index >= 0:
+            result += sign * X[index]
+    return result
+
+
+def _evaluate_numeric(cct, outputs, names, arrays, kind):
+
+    values = dict([(cptname, symname) for param, cptname, symname in names
+                   if cptname is not None])
+    symcct = _substitute(cct, values)
+
+    shape = np.broadcast(*arrays).shape
+    P = int(np.prod(shape))
+    env = {}
+    for (param, cptname, symname), array in zip(names, arrays):
+        env[symname] = np.broadcast_to(array, shape).ravel()
+
+    # The circuit is solved once for all the outputs of the same kind
+    # and once for each input port of the transfer functions.
+    solutions = {}
+
+    def solution(key):
+        if key not in solutions:
+            if key[0] is None:
+                solutions[key] = _solve_numeric(symcct, key[1], env, P)
+            else:
+                # Apply an impulse to the input port; its transform is 1.
+                new = symcct.kill()
+                new._add('V1_ %s %s {DiracDelta(t)}' % key[0])
+                solutions[key] = _solve_numeric(new, key[1], env, P)
+        return solutions[key]
+
+    results = []
+    for output in outputs:
+        if callable(output):
+            result = _evaluate_callable(cct, output, names, env, P, kind)
+        elif isinstance(output, tuple) and len(output) == 4:
+            sub, X = solution((tuple(output[0:2]), 's'))
+            result = _node_drop(sub, X, output[2], output[3])
+        elif isinstance(output, tuple) and len(output) == 2:
+            sub, X = solution((None, kind))
+            result = _node_drop(sub, X, output[0], output[1])
+        elif isinstance(output, tuple):
+            raise ValueError('Output %s must be a tuple of 2 or 4 nodes' %
+                             (output, ))
+        else:
+            sub, X = solution((None, kind))
+            result = _node_drop(sub, X, output, 0)
+        results.append(result.reshape(shape))
+
+    if all([np.all(result.imag == 0) for result in results]):
+        results = [result.real for result in results]
+    return results
+
+
+def _evaluate_callable(cct, output, names, env, P, kind):
+    """Evaluate output, a function of the circuit, by solving the
+    circuit for each set of parameter values.  This is slow."""
+
+    othernames = [symname for param, cptname, symname in names
+                  if cptname is None]
+
+    result = np.zeros(P, dtype=complex)
+    for m in range(P):
+        values = dict([(cptname, repr(float(env[symname][m])))
+                       for param, cptname, symname in names
+                       if cptname is not None])
+        numcct = _substitute(cct, values, numeric=True)
+        expr = _output_expr(output(numcct), kind)
+        expr = _subs_frequency(expr, othernames)
+        func = _lambdify(expr, othernames)
+        result[m] = complex(func(*[env[name][m] for name in othernames]))
+    return result
+
+
+def param_sweep(cct, params, outputs, grid=True, kind=None, method='auto'):
+    """Evaluate outputs of circuit cct for each of the parameter values
+    specified by the dictionary params.  The keys of params are
+    component names (such as 'R1') or symbol names (such as 'f') and
+    the values are arrays.
+
+    If grid is True, the outputs are evaluated over the Cartesian grid
+    of the parameter values and have the shape (len(array1),
+    len(array2), ...).  Otherwise, the parameter arrays must have the
+    same length and the outputs are evaluated for each set of values.
+
+    Each output can be a node name (node voltage), a tuple of two
+    nodes (voltage drop), a tuple of four nodes (transfer function),
+    or a function that is given the circuit and returns an expression.
+    If an output has components in several transform domains, kind
+    selects the domain, for example, 'dc' or 's'.  For transfer
+    functions and other s-domain expressions, 'f' or 'omega' can be
+    swept.
+
+    method can be 'symbolic' to solve the circuit symbolically, once,
+    'numeric' to solve the circuit numerically for each set of
+    parameter values, or 'auto' to choose the symbolic method for
+    small circuits.  With the numeric method, outputs that are
+    functions of the circuit are evaluated by creating a new circuit
+    for each set of parameter values; this is slow.
+
+    If outputs is a list, a list of arrays is returned with one array
+    for each output.  Otherwise, a single array is returned."""
+
+    single = not isinstance(outputs, list)
+    if single:
+        outputs = [outputs]
+
+    if params == {}:
+        raise ValueError('No parameters to sweep')
+    names = _param_names(cct, params.keys())
+    arrays = [np.asarray(array, dtype=float) for array in params.values()]
+    if any([array.ndim != 1 for array in arrays]):
+        raise ValueError('Parameter values must be one-dimensional arrays')
+
+    if grid:
+        arrays = np.ix_(*arrays)
+    elif len(set([len(array) for array in arrays])) != 1:
+        raise ValueError('Parameter arrays must have the same length if'
+                         ' grid is False')
+
+    if method == 'auto':
+        size = 0
+        for sub in cct.sub.values():
+            sub._analyse()
+            size = max(size, sub._A.rows)
+        method = 'symbolic' if size <= max_symbolic_size else 'numeric'
+
+    if method == 'symbolic':
+        results = _evaluate_symbolic(cct, outputs, names, arrays, kind)
+    elif method == 'numeric':
+        results = _evaluate_numeric(cct, outputs, names, arrays, kind)
+    else:
+        raise ValueError('Unknown method %s, expecting symbolic, numeric, '
+                         'or auto' % method)
+
+    if single:
+        return results[0]
+    return results
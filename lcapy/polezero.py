@@ -0,0 +1,103 @@
+"""This module finds the poles and zeros of circuits numerically.
+Rather than finding the roots of the determinant of the MNA A matrix,
+the poles are found as the generalised eigenvalues of the matrix
+pencil G + s C, where A = G + s C.  The zeros of a transfer function
+are found as the generalised eigenvalues of the pencil for the system
+matrix
+
+   [G + s C  -b]
+   [   c      0]
+
+where b selects the input source and c selects the output voltage.
+
+The pencil has infinite eigenvalues if C is singular; these are
+discarded.  The frequencies are scaled so that G and C have similar
+norms to reduce the rounding errors.
+
+Copyright 2019 Michael Hayes, UCECE
+
+"""
+
+from __future__ import division
+import numpy as np
+
+__all__ = ('circuit_poles', 'transfer_zeros')
+
+# Scaled eigenvalues with a larger magnitude are deemed infinite.
+max_eigenvalue = 1 / (1e4 * np.finfo(float).eps)
+
+
+def _dense(M, name):
+
+    if not hasattr(M, 'toarray'):
+        raise ValueError('Cannot find %s numerically for symbolic'
+                         ' component values' % name)
+    return M.toarray()
+
+
+def _finite_eigenvalues(A, B):
+    """Return finite s where A + s B is singular."""
+
+    from scipy.linalg import eig
+
+    if A.shape[0] == 0:
+        return np.zeros(0, dtype=complex)
+
+    normA = np.abs(A).max()
+    normB = np.abs(B).max()
+    if normB == 0:
+        return np.zeros(0, dtype=complex)
+    scale = normA / normB if normA != 0 else 1.0
+
+    # A v = lambda (-scale B) v
+    w = eig(A, -scale * B, right=False, homogeneous_eigvals=True)
+    alpha, beta = w
+    finite = np.abs(alpha) < max_eigenvalue * np.abs(beta)
+    return np.sort_complex(alpha[finite] / beta[finite] * scale)
+
+
+def circuit_poles(cct):
+    """Return NumPy array of the poles of circuit cct.  These are the
+    natural frequencies of the circuit with all the independent
+    sources killed.  The component values must be numerical."""
+
+    G = _dense(cct.G_matrix, 'poles')
+    C = _dense(cct.C_matrix, 'poles')
+    return _finite_eigenvalues(G, C)
+
+
+def transfer_zeros(cct, N1p, N1m, N2p, N2m):
+    """Return NumPy array of the zeros of the voltage transfer function
+    V2 / V1 of circuit cct, where V1 is V[N1p] - V[N1m] and V2 is
+    V[N2p] - V[N2m].  See Netlist.transfer.  The component values must
+    be numerical."""
+
+    new = cct.kill()
+    new._add('V1_ %s %s 0' % (N1p, N1m))
+
+    G = _dense(new.G_matrix, 'zeros')
+    C = _dense(new.C_matrix, 'zeros')
+
+    sub = new._pencil_netlist
+    num_nodes = len(sub.node_list) - 1
+    N = G.shape[0]
+
+    b = np.zeros(N)
+    b[num_nodes + sub._branch_index('V1_')] = 1
+
+    c = np.zeros(N)
+    for node, sign in ((N2p, 1), (N2m, -1)):
+        node = '%s' % node
+        if node not in sub.node_map:
+            raise ValueError('Unknown node %s' % node)
+        index = sub._node_index(node)
+        if index >= 0:
+            c[index] += sign
+
+    A = np.zeros((N + 1, N + 1))
+    A[0:N, 0:N] = G
+    A[0:N, N] = -b
+    A[N, 0:N] = c
+    B = np.zeros((N + 1, N + 1))
+    B[0:N, 0:N] = C
+    return _finite_eigenvalues(A, B)
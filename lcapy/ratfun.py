@@ -181,6 +181,10 @@ class Ratfun(object):
 
         See also general, partfrac, mixedfrac, and ZPK"""
 
+        # A constant, such as a numerical phasor, is already canonical.
+        if not self.expr.has(self.var):
+            return self.expr
+
         try:
             N, D, delay = self.as_ratfun_delay()
         except ValueError:
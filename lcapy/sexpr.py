@@ -1,5 +1,5 @@
 from __future__ import division
-from .laplace import inverse_laplace_transform
+from .laplace import inverse_laplace_transform, inverse_laplace_talbot
 from .sfwexpr import sfwExpr
 from .sym import ssym, tsym, j, pi
 from .vector import Vector
@@ -7,6 +7,8 @@ from .ratfun import _zp2tf, Ratfun
 import sympy as sym
 import numpy as np
 
+transient_methods = ('symbolic', 'talbot')
+
 
 class sExpr(sfwExpr):
     """s-domain expression or symbol."""
@@ -63,10 +65,18 @@ class sExpr(sfwExpr):
         If ac=True or dc=True the result is extrapolated for t < 0.
         Otherwise the result is only known for t >= 0.
 
+        If numeric=True the poles and residues of rational functions
+        are found numerically and the result has float coefficients.
+        This is used automatically if the coefficients are numbers
+        and SymPy cannot find all the roots of the denominator.
+
         """
 
+        numeric = assumptions.pop('numeric', False)
         if assumptions == {}:
             assumptions = self.assumptions.copy()
+        if numeric:
+            assumptions['numeric'] = True
 
         result = inverse_laplace_transform(self.expr, self.var, tsym, **assumptions)
 
@@ -99,24 +109,50 @@ class sExpr(sfwExpr):
 
         return self.time(**assumptions).phasor(**assumptions)
 
-    def transient_response(self, tvector=None):
-        """Evaluate transient (impulse) response."""
+    def transient_response(self, tvector=None, method=None):
+        """Evaluate transient (impulse) response.
+
+        If method is 'symbolic', the time-domain expression is found
+        and evaluated.  If method is 'talbot', the response is
+        evaluated numerically from the s-domain expression using the
+        fixed Talbot method; this is suitable for expressions with
+        irrational terms, such as transmission line models, that
+        cannot be inverse Laplace transformed.  The response is then
+        assumed to be causal and cannot have Dirac deltas.  By
+        default, the symbolic method is used and the Talbot method is
+        only used if the inverse Laplace transform cannot be found."""
+
+        if method not in (None, ) + transient_methods:
+            raise ValueError('Unknown method %s, expecting one of %s' %
+                             (method, ', '.join(transient_methods)))
 
         if tvector is None:
+            if method == 'talbot':
+                raise ValueError('Need tvector for method talbot')
             return self.time()
 
-        return self.time().evaluate(tvector)
+        if method == 'talbot':
+            return inverse_laplace_talbot(self.expr, self.var, tvector)
+
+        try:
+            texpr = self.time()
+        except ValueError:
+            # The inverse Laplace transform cannot be found.
+            if method == 'symbolic':
+                raise
+            return inverse_laplace_talbot(self.expr, self.var, tvector)
+        return texpr.evaluate(tvector)
 
-    def impulse_response(self, tvector=None):
+    def impulse_response(self, tvector=None, method=None):
         """Evaluate transient (impulse) response."""
 
-        return self.transient_response(tvector)
+        return self.transient_response(tvector, method)
 
-    def step_response(self, tvector=None):
+    def step_response(self, tvector=None, method=None):
         """Evaluate step response."""
 
         H = self.__class__(self / self.var, **self.assumptions)
-        return H.transient_response(tvector)
+        return H.transient_response(tvector, method)
 
     def angular_frequency_response(self, wvector=None):
         """Convert to angular frequency domain and evaluate response if
@@ -147,53 +183,87 @@ class sExpr(sfwExpr):
         return X.evaluate(fvector)
 
     def response(self, x, t):
-        """Evaluate response to input signal x at times t."""
+        """Evaluate response to input signal x at times t.  The times must
+        be equally spaced and x is assumed to be zero before the first
+        time.
+
+        If the expression is a rational function, possibly with a
+        delay, the rational part is discretised into an IIR filter using
+        impulse invariance and the delay is applied with a
+        fractional-delay filter.  Otherwise, the impulse response is
+        evaluated and convolved with x using the FFT."""
+
+        from scipy.signal import lfilter, fftconvolve
+        from .discretise import poly_coeffs, impulse_invariant
+        from .discretise import fractional_delay
+
+        x = np.asarray(x, dtype=float)
+        t = np.asarray(t, dtype=float)
 
         if len(x) != len(t):
             raise ValueError('x must have same length as t')
 
         dt = t[1] - t[0]
         if not np.allclose(np.diff(t), np.ones(len(t) - 1) * dt):
-            raise (ValueError, 't values not equally spaced')
-
-        # Perform polynomial long division so expr = Q + M / D                
-        N, D, delay = self.decompose()
-        Q, M = sym.div(N, D)
-        expr = M / D
-
-        N = len(t)
-
-        # Evaluate transient response.
-        th = np.arange(N) * dt - dt
-        h = sExpr(expr).transient_response(th)
-
-        print('Convolving...')
-        ty = t
-        y = np.convolve(x, h)[0:N] * dt
-
-        if Q:
+            raise ValueError('t values not equally spaced')
+
+        try:
+            N, D, delay = self.decompose()
+        except ValueError:
+            # Not a rational function so convolve with the impulse
+            # response.
+            th = np.arange(len(t)) * dt
+            h = sExpr(self.expr).transient_response(th)
+            return fftconvolve(x, h)[0:len(t)] * dt
+
+        # Perform polynomial long division so expr = Q + M / D
+        Q, M = sym.div(N, D, self.var)
+
+        y = np.zeros(len(t))
+        if M != 0:
+            b = poly_coeffs(M, self.var)
+            a = poly_coeffs(D, self.var)
+            bz, az = impulse_invariant(b / a[0], a / a[0], dt)
+            y = lfilter(bz, az, x)
+
+        if Q != 0:
             # Handle Dirac deltas and their derivatives.
-            C = Q.all_coeffs()
-            for n, c in enumerate(C):
+            C = poly_coeffs(Q, self.var)
+            for n, c in enumerate(C[::-1]):
 
                 y += c * x
 
                 x = np.diff(x) / dt
                 x = np.hstack((x, 0))
 
-        from scipy.interpolate import interp1d
-
-        if delay != 0.0:
-            print('Interpolating...')
-            # Try linear interpolation; should oversample first...
-            y = interp1d(ty, y, bounds_error=False, fill_value=0)
-            y = y(t - delay)
+        if delay != 0:
+            y = fractional_delay(y, float(delay) / dt)
 
         return y
 
+    def discretize(self, fs, method='bilinear'):
+        """Return DigitalFilter object approximating the transfer function
+        for the sampling frequency fs.  The method can be 'bilinear',
+        'zoh' (zero-order hold), or 'impulse' (impulse invariance).
+        The filter keeps its state between calls of its process method,
+        for example,
+
+        >>> filt = H.discretize(1e3)
+        >>> y1 = filt.process(x1)
+        >>> y2 = filt.process(x2)
+        """
+
+        from .discretise import poly_coeffs, discretise, DigitalFilter
+
+        N, D, delay = self.decompose()
+        b = poly_coeffs(N, self.var)
+        a = poly_coeffs(D, self.var)
+        bz, az = discretise(b, a, float(delay), 1 / fs, method)
+        return DigitalFilter(bz, az, fs)
+
     def decompose(self):
 
-        N, D, delay = Ratfun(self, s).as_ratfun_delay()                
+        N, D, delay = Ratfun(self.expr, self.var).as_ratfun_delay()
 
         return N, D, delay
 
@@ -0,0 +1,388 @@
+"""This module provides linear equation solvers for the MNA equations.
+Rather than inverting the A matrix, the matrix is factored once and
+the factors are reused for each right hand side vector.  The elements
+of the solution are only found when they are required.
+
+The available strategies are:
+
+'lu' : LU factorisation with row pivoting.  The elements are kept in
+canonical (cancelled) form as the elimination proceeds.
+
+'bareiss' : Fraction-free (Bareiss) LU factorisation (the default).
+The rows of A are first scaled so that the elements are polynomials
+and then all the divisions performed during the elimination are exact.  This avoids
+expression swell when the elements are symbolic.
+
+'inv' : Explicit matrix inversion.  This is the slowest but is
+retained for comparison.
+
+Copyright 2019 Michael Hayes, UCECE
+
+"""
+
+from __future__ import division
+import sympy as sym
+
+__all__ = ('solver_make', 'solvers', 'Solution')
+
+
+def _is_zero(expr):
+
+    if expr == 0:
+        return True
+    if expr.is_Add:
+        return sym.cancel(expr) == 0
+    return False
+
+
+def _sparse_rows(A):
+    """Convert SymPy matrix A into a list of dictionaries, one for each
+    row, keyed by the column index of the non-zero elements."""
+
+    rows = [{} for m in range(A.rows)]
+
+    if hasattr(A, '_smat'):
+        for (i, j), value in A._smat.items():
+            if value != 0:
+                rows[i][j] = value
+        return rows
+
+    for i in range(A.rows):
+        for j in range(A.cols):
+            value = A[i, j]
+            if value != 0:
+                rows[i][j] = value
+    return rows
+
+
+def _columns(Z):
+    """Convert SymPy matrix Z into a list of rows, where each row is a
+    list of the column values."""
+
+    return [[Z[i, j] for j in range(Z.cols)] for i in range(Z.rows)]
+
+
+class Solution(object):
+    """Solution X of A X = Z where the rows of X are only evaluated
+    when required.  solution[i] returns a list of the elements of the
+    i-th row of X, one for each column of Z."""
+
+    def __init__(self, size, cols):
+
+        self.size = size
+        self.cols = cols
+        self._rows = {}
+
+    def _evaluate(self, i):
+        raise NotImplementedError('_evaluate method not implemented')
+
+    def __getitem__(self, i):
+
+        if i not in self._rows:
+            self._rows[i] = self._evaluate(i)
+        return self._rows[i]
+
+    def __len__(self):
+
+        return self.size
+
+    def matrix(self):
+        """Return X as a SymPy matrix; this evaluates every row."""
+
+        return sym.Matrix(self.size, self.cols, lambda i, j: self[i][j])
+
+
+class RowSolution(Solution):
+    """Solution where each row is found with the function func."""
+
+    def __init__(self, size, cols, func):
+
+        super(RowSolution, self).__init__(size, cols)
+        self.func = func
+
+    def _evaluate(self, i):
+
+        return self.func(i)
+
+
+class BackSubstitution(Solution):
+    """Solution found from U X = b, where U is upper triangular, using
+    back substitution.  Only the rows of X that the requested row
+    depends on are evaluated.  If scale is not 1, U (scale * X) =
+    scale * b is solved; this keeps fraction-free back substitution
+    exact."""
+
+    def __init__(self, U, b, scale=1):
+
+        super(BackSubstitution, self).__init__(len(U), len(b[0]) if b else 0)
+        self.U = U
+        self.b = b
+        self.scale = scale
+        self._y = {}
+
+    def _back_substitute(self, i):
+
+        row = self.U[i]
+        yi = [self.scale * bim for bim in self.b[i]]
+        for j, u in row.items():
+            if j <= i:
+                continue
+            yi = [yim - u * yjm for yim, yjm in zip(yi, self._y[j])]
+        return [sym.cancel(yim / row[i]) for yim in yi]
+
+    def _evaluate(self, i):
+
+        # Find the rows that row i depends upon.
+        needed = set()
+        stack = [i]
+        while stack != []:
+            k = stack.pop()
+            if k in needed or k in self._y:
+                continue
+            needed.add(k)
+            stack.extend([j for j in self.U[k] if j > k])
+
+        for k in sorted(needed, reverse=True):
+            self._y[k] = self._back_substitute(k)
+
+        if self.scale == 1:
+            return self._y[i]
+        return [yim / self.scale for yim in self._y[i]]
+
+
+class Solver(object):
+    """Base class for the linear equation solvers.  The matrix A is
+    factored when the solver is created.  The solve method can then
+    be called for each right hand side."""
+
+    def __init__(self, A):
+
+        if A.rows != A.cols:
+            raise ValueError('Matrix is not square')
+        self.size = A.rows
+        self._factor(A)
+
+    def _factor(self, A):
+        raise NotImplementedError('_factor method not implemented')
+
+    def solution(self, Z):
+        """Return Solution object for A X = Z.  Z can have multiple
+        columns.  The rows of X are only evaluated when required."""
+
+        raise NotImplementedError('solution method not implemented')
+
+    def solve(self, Z):
+        """Solve A X = Z for X.  Z can have multiple columns."""
+
+        return self.solution(Z).matrix()
+
+    def determinant(self):
+        """Return the determinant of A."""
+
+        raise NotImplementedError('determinant method not implemented')
+
+    def _pivot(self, rows, k):
+        """Find row index of pivot for column k."""
+
+        for i in range(k, self.size):
+            value = rows[i].get(k, 0)
+            if not _is_zero(value):
+                return i
+        raise ValueError('Matrix is singular')
+
+
+class InvSolver(Solver):
+    """Solver using explicit matrix inversion."""
+
+    def _factor(self, A):
+
+        self.A = sym.Matrix(A)
+        self.Ainv = self.A.inv()
+
+    def determinant(self):
+
+        return self.A.det()
+
+    def solution(self, Z):
+
+        Z = sym.Matrix(Z)
+        return RowSolution(self.size, Z.cols,
+                           lambda i: list(self.Ainv[i, :] * Z))
+
+
+class LUSolver(Solver):
+    """Solver using LU factorisation with row pivoting."""
+
+    def _factor(self, A):
+
+        N = self.size
+        rows = _sparse_rows(A)
+        swaps = []
+        multipliers = []
+
+        for k in range(N):
+            p = self._pivot(rows, k)
+            rows[k], rows[p] = rows[p], rows[k]
+            swaps.append(p)
+
+            pivot = rows[k][k]
+            mults = {}
+            for i in range(k + 1, N):
+                a = rows[i].pop(k, 0)
+                if a == 0:
+                    continue
+
+                l = sym.cancel(a / pivot)
+                mults[i] = l
+                row = rows[i]
+                for j, u in rows[k].items():
+                    if j <= k:
+                        continue
+                    value = sym.cancel(row.get(j, 0) - l * u)
+                    if value == 0:
+                        row.pop(j, None)
+                    else:
+                        row[j] = value
+            multipliers.append(mults)
+
+        self.U = rows
+        self.swaps = swaps
+        self.multipliers = multipliers
+
+    def solution(self, Z):
+
+        N = self.size
+        b = _columns(Z)
+
+        # Forward substitution, replaying the row operations.
+        for k in range(N):
+            p = self.swaps[k]
+            b[k], b[p] = b[p], b[k]
+            for i, l in self.multipliers[k].items():
+                b[i] = [bi - l * bk for bi, bk in zip(b[i], b[k])]
+
+        return BackSubstitution(self.U, b)
+
+    def determinant(self):
+
+        det = sym.S.One
+        for k, p in enumerate(self.swaps):
+            det *= self.U[k][k]
+            if p != k:
+                det = -det
+        return sym.cancel(det)
+
+
+class BareissSolver(Solver):
+    """Solver using fraction-free (Bareiss) LU factorisation."""
+
+    def _factor(self, A):
+
+        N = self.size
+        rows = _sparse_rows(A)
+
+        # Scale each row so that the elements are polynomials.
+        scales = []
+        for row in rows:
+            dens = [sym.fraction(sym.together(value))[1]
+                    for value in row.values()]
+            scale = sym.lcm(dens) if dens != [] else sym.S.One
+            scales.append(scale)
+            if scale != 1:
+                for j, value in row.items():
+                    row[j] = sym.cancel(value * scale)
+
+        swaps = []
+        multipliers = []
+        pivots = []
+
+        prev = sym.S.One
+        for k in range(N):
+            p = self._pivot(rows, k)
+            rows[k], rows[p] = rows[p], rows[k]
+            swaps.append(p)
+
+            pivot = rows[k][k]
+            mults = {}
+            for i in range(k + 1, N):
+                row = rows[i]
+                a = row.pop(k, 0)
+                if a != 0:
+                    mults[i] = a
+
+                cols = set(row.keys()) | set(rows[k].keys())
+                for j in cols:
+                    if j <= k:
+                        continue
+                    value = pivot * row.get(j, 0)
+                    if a != 0:
+                        value -= a * rows[k].get(j, 0)
+                    value = sym.cancel(value / prev)
+                    if value == 0:
+                        row.pop(j, None)
+                    else:
+                        row[j] = value
+            multipliers.append(mults)
+            pivots.append((pivot, prev))
+            prev = pivot
+
+        self.U = rows
+        self.scales = scales
+        self.swaps = swaps
+        self.multipliers = multipliers
+        self.pivots = pivots
+
+    def solution(self, Z):
+
+        N = self.size
+        b = _columns(Z)
+        if N == 0:
+            return BackSubstitution(self.U, b)
+
+        b = [[value * scale for value in bi]
+             for bi, scale in zip(b, self.scales)]
+
+        # Forward elimination, replaying the row operations.
+        for k in range(N):
+            p = self.swaps[k]
+            b[k], b[p] = b[p], b[k]
+            pivot, prev = self.pivots[k]
+            mults = self.multipliers[k]
+            for i in range(k + 1, N):
+                a = mults.get(i, 0)
+                b[i] = [sym.cancel((pivot * bi - a * bk) / prev)
+                        for bi, bk in zip(b[i], b[k])]
+
+        # Fraction-free back substitution.  The last pivot is the
+        # determinant of the scaled matrix.
+        return BackSubstitution(self.U, b, scale=self.U[N - 1][N - 1])
+
+    def determinant(self):
+
+        N = self.size
+        if N == 0:
+            return sym.S.One
+
+        # The last pivot is the determinant of the scaled matrix with
+        # its rows swapped.
+        det = self.U[N - 1][N - 1]
+        for k, p in enumerate(self.swaps):
+            if p != k:
+                det = -det
+        return sym.cancel(det / sym.Mul(*self.scales))
+
+
+solvers = {'lu': LUSolver, 'bareiss': BareissSolver, 'inv': InvSolver}
+
+
+def solver_make(A, method='bareiss'):
+    """Factor matrix A using the specified method ('bareiss', 'lu',
+    or 'inv') and return a solver object.  This raises a ValueError
+    if A is singular."""
+
+    try:
+        cls = solvers[method]
+    except KeyError:
+        raise ValueError('Unknown solver %s, expecting one of %s' %
+                         (method, ', '.join(sorted(solvers.keys()))))
+    return cls(A)
@@ -0,0 +1,294 @@
+"""This module finds state-space models of circuits.  The MNA
+equations are stamped once in the s-domain as G + s C so that
+
+   C x' = -G x + B u
+      y = H x
+
+where u is the vector of the selected independent sources and y is
+the vector of the selected outputs.  This descriptor system is
+reduced to the standard state-space form
+
+   z' = A z + B u
+   y  = C z + D u
+
+by eliminating the unknowns that do not have derivatives.  The states
+are the node voltages of the nodes with capacitors and the currents
+through the inductors.  If this reduction fails, say because of a
+capacitor that is not connected to ground, numerical models are
+reduced using the singular value decomposition of C; the states are
+then linear combinations of the unknowns.
+
+Copyright 2019 Michael Hayes, UCECE
+
+"""
+
+from __future__ import division
+from .sym import ssym, symsimplify
+import numpy as np
+import sympy as sym
+
+__all__ = ('StateSpace', 'state_space')
+
+
+class StateSpace(object):
+    """This class stores the matrices of the state-space model
+
+       z' = A z + B u
+       y  = C z + D u
+
+    The attributes inputs, outputs, and states name the elements of u,
+    y, and z.  The states are None if they do not correspond to node
+    voltages and branch currents.  The matrices are NumPy arrays if
+    the component values are numerical; otherwise they are SymPy
+    matrices.
+
+    The matrices can be unpacked with A, B, C, D = cct.ss()."""
+
+    def __init__(self, A, B, C, D, inputs, outputs, states):
+
+        self.A = A
+        self.B = B
+        self.C = C
+        self.D = D
+        self.inputs = inputs
+        self.outputs = outputs
+        self.states = states
+
+    @property
+    def is_numeric(self):
+
+        return isinstance(self.A, np.ndarray)
+
+    def __iter__(self):
+
+        return iter((self.A, self.B, self.C, self.D))
+
+    def eigenvalues(self):
+        """Return the eigenvalues of A; these are the poles of the
+        circuit."""
+
+        if self.is_numeric:
+            return np.linalg.eigvals(self.A)
+        return self.A.eigenvals()
+
+    def scipy(self):
+        """Return scipy.signal.StateSpace object."""
+
+        from scipy.signal import StateSpace as ScipyStateSpace
+
+        if not self.is_numeric:
+            raise ValueError('Cannot convert symbolic state-space model')
+        return ScipyStateSpace(self.A, self.B, self.C, self.D)
+
+    def __repr__(self):
+
+        return '%s(%d states, %d inputs, %d outputs)' % (
+            self.__class__.__name__, self.A.shape[0], len(self.inputs),
+            len(self.outputs))
+
+
+def _split_symbolic(G, C):
+    """Convert the SymPy sparse matrices G and C to dense matrices."""
+
+    for expr in G._smat.values():
+        if ssym in sym.sympify(expr).free_symbols:
+            raise ValueError('Cannot find state-space model for'
+                             ' admittance %s that is not linear in s' % expr)
+    return sym.Matrix(G), sym.Matrix(C)
+
+
+def _output_row(sub, output, N):
+    """Return list of (index, coefficient) for output."""
+
+    num_nodes = len(sub.node_list) - 1
+
+    def node(name):
+        if isinstance(name, int):
+            name = '%d' % name
+        if name not in sub.node_map:
+            raise ValueError('Unknown node %s' % name)
+        index = sub._node_index(sub.node_map[name])
+        return [(index, 1)] if index >= 0 else []
+
+    if isinstance(output, tuple):
+        if len(output) != 2:
+            raise ValueError('Output %s must be a tuple of 2 nodes' %
+                             (output, ))
+        return node(output[0]) + [(index, -coeff) for index, coeff in
+                                  node(output[1])]
+
+    if output in sub.elements:
+        elt = sub.elements[output]
+        if output in sub.unknown_branch_currents:
+            return [(num_nodes + sub._branch_index(output), 1)]
+        if elt.type == 'R':
+            Y = sym.sympify(elt.Y.expr)
+            n1, n2 = elt.nodes[0:2]
+            return ([(index, Y) for index, coeff in node(n1)] +
+                    [(index, -Y) for index, coeff in node(n2)])
+        raise ValueError('Cannot find current through %s for state-space'
+                         ' model' % output)
+    return node(output)
+
+
+def _reduce_structural(E, G, B, H, numeric):
+    """Eliminate the unknowns without derivatives by partitioning.
+    Return (A, B, C, D, states) or None if the partition of E is
+    singular."""
+
+    N = E.shape[0]
+    p = [i for i in range(N) if any([E[i, j] != 0 for j in range(N)])]
+    q = [i for i in range(N) if i not in p]
+
+    if numeric:
+        Epp = E[np.ix_(p, p)]
+        if np.linalg.matrix_rank(Epp) < len(p):
+            return None
+        Gpp, Gpq = G[np.ix_(p, p)], G[np.ix_(p, q)]
+        Gqp, Gqq = G[np.ix_(q, p)], G[np.ix_(q, q)]
+        try:
+            Kx = np.linalg.solve(Gqq, Gqp) if q else np.zeros((0, len(p)))
+            Ku = np.linalg.solve(Gqq, B[q]) if q else np.zeros((0, B.shape[1]))
+        except np.linalg.LinAlgError:
+            raise ValueError('Cannot find state-space model; the circuit'
+                             ' may have capacitor loops or inductor cutsets'
+                             ' with sources')
+        Ar = np.linalg.solve(Epp, -Gpp + Gpq.dot(Kx))
+        Br = np.linalg.solve(Epp, B[p] - Gpq.dot(Ku))
+        Cr = H[:, p] - H[:, q].dot(Kx)
+        Dr = H[:, q].dot(Ku)
+        return Ar, Br, Cr, Dr, p
+
+    Epp = E.extract(p, p)
+    if Epp.det() == 0:
+        return None
+    Gpp, Gpq = G.extract(p, p), G.extract(p, q)
+    Gqp, Gqq = G.extract(q, p), G.extract(q, q)
+    Bp, Bq = B.extract(p, list(range(B.cols))), B.extract(q, list(range(B.cols)))
+    Hp, Hq = H.extract(list(range(H.rows)), p), H.extract(list(range(H.rows)), q)
+    if q:
+        if Gqq.det() == 0:
+            raise ValueError('Cannot find state-space model; the circuit'
+                             ' may have capacitor loops or inductor cutsets'
+                             ' with sources')
+        Kx = Gqq.LUsolve(Gqp)
+        Ku = Gqq.LUsolve(Bq)
+    else:
+        Kx = sym.zeros(0, len(p))
+        Ku = sym.zeros(0, B.cols)
+    Ar = Epp.LUsolve(-Gpp + Gpq * Kx)
+    Br = Epp.LUsolve(Bp - Gpq * Ku)
+    Cr = Hp - Hq * Kx
+    Dr = Hq * Ku
+    return Ar, Br, Cr, Dr, p
+
+
+def _reduce_svd(E, G, B, H):
+    """Eliminate the unknowns without derivatives using the singular
+    value decomposition of E."""
+
+    U, S, Vh = np.linalg.svd(E)
+    tol = S.max() * max(E.shape) * np.finfo(float).eps if len(S) else 0
+    r = int(np.sum(S > tol))
+    V = Vh.T
+
+    At = U.T.dot(-G).dot(V)
+    Bt = U.T.dot(B)
+    Ht = H.dot(V)
+
+    A11, A12 = At[:r, :r], At[:r, r:]
+    A21, A22 = At[r:, :r], At[r:, r:]
+    try:
+        Kx = np.linalg.solve(A22, A21)
+        Ku = np.linalg.solve(A22, Bt[r:])
+    except np.linalg.LinAlgError:
+        raise ValueError('Cannot find state-space model; the circuit'
+                         ' may have capacitor loops or inductor cutsets'
+                         ' with sources')
+    Sinv = 1 / S[:r]
+    Ar = Sinv[:, None] * (A11 - A12.dot(Kx))
+    Br = Sinv[:, None] * (Bt[:r] - A12.dot(Ku))
+    Cr = Ht[:, :r] - Ht[:, r:].dot(Kx)
+    Dr = -Ht[:, r:].dot(Ku)
+    return Ar, Br, Cr, Dr
+
+
+def state_space(cct, inputs=None, outputs=None):
+    """Return StateSpace object for circuit cct.  inputs is a list of
+    the names of independent sources (by default all of them).
+    outputs is a list of node names, tuples of two node names (voltage
+    drops), or names of components (currents); by default these are
+    the node voltages."""
+
+    from .netlist import GroupNetlist
+
+    # All the sources are zeroed; they are the inputs.
+    sub = GroupNetlist(cct, (), 's')
+    sub._analyse()
+
+    sources = [name for name, elt in sub.elements.items()
+               if elt.independent_source]
+    if inputs is None:
+        inputs = sources
+    for name in inputs:
+        if name not in sources:
+            raise ValueError('Input %s is not an independent source' % name)
+    if outputs is None:
+        outputs = [node for node in sub.node_list[1:]]
+
+    Gs, Es = sub._split_pencil()
+    numeric = all([sym.sympify(value).free_symbols <= set((ssym, ))
+                   for value in list(Gs._smat.values()) +
+                   list(Es._smat.values())])
+    if numeric:
+        from .sweep import _split_matrix
+        G, E, extra = _split_matrix(sub, np.zeros(1))
+        if extra != []:
+            raise ValueError('Cannot find state-space model for'
+                             ' admittances that are not linear in s')
+        if not (np.allclose(G.imag, 0) and np.allclose(E.imag, 0)):
+            raise ValueError('The MNA matrices are not real')
+        G, E = G.real, E.real
+    else:
+        G, E = _split_symbolic(Gs, Es)
+
+    N = G.shape[0]
+    num_nodes = len(sub.node_list) - 1
+
+    B = np.zeros((N, len(inputs))) if numeric else sym.zeros(N, len(inputs))
+    for k, name in enumerate(inputs):
+        elt = sub.elements[name]
+        if elt.type == 'V':
+            B[num_nodes + elt.branch_index, k] = 1
+        else:
+            n1, n2 = elt.node_indexes
+            if n1 >= 0:
+                B[n1, k] = 1
+            if n2 >= 0:
+                B[n2, k] = -1
+
+    H = np.zeros((len(outputs), N)) if numeric else sym.zeros(len(outputs), N)
+    for k, output in enumerate(outputs):
+        for index, coeff in _output_row(sub, output, N):
+            H[k, index] += complex(coeff).real if numeric else coeff
+
+    unknowns = (['V_' + node for node in sub.node_list[1:]] +
+                ['I_' + name for name in sub.unknown_branch_currents])
+
+    result = _reduce_structural(E, G, B, H, numeric)
+    if result is not None:
+        A, B, C, D, p = result
+        states = [unknowns[i] for i in p]
+    elif numeric:
+        A, B, C, D = _reduce_svd(E, G, B, H)
+        states = None
+    else:
+        raise ValueError('Cannot find symbolic state-space model; try'
+                         ' numerical component values')
+
+    if not numeric:
+        policy, budget = cct.simplify_policy, cct.simplify_budget
+        A, B, C, D = [M.applyfunc(lambda x: symsimplify(x, policy, budget))
+                      for M in (A, B, C, D)]
+
+    return StateSpace(A, B, C, D, list(inputs), list(outputs), states)
@@ -0,0 +1,134 @@
+"""This module solves the MNA equations for the superposition groups
+of a netlist (DC, AC, s-domain, and noise) using a single
+factorisation.  The A matrix is stamped once in the s-domain and
+factored.  The Z vectors of the groups are solved as multiple right
+hand sides and then s is replaced by 0 for DC analysis or by j omega
+for AC and noise analysis.
+
+Copyright 2019 Michael Hayes, UCECE
+
+"""
+
+from __future__ import division
+from .solver import solver_make, RowSolution
+from .sym import ssym, omegasym
+import sympy as sym
+
+__all__ = ('SuperpositionSolver', )
+
+
+def _svalue(kind):
+    """Return the value of s for analysis kind or None if the solution
+    cannot be found from the s-domain solution, say for an initial
+    value problem."""
+
+    if isinstance(kind, str):
+        if kind == 's':
+            return ssym
+        if kind == 'dc':
+            return sym.S.Zero
+        if kind[0] == 'n':
+            return sym.I * omegasym
+        return None
+    # AC analysis, kind is the angular frequency.
+    return sym.I * sym.sympify(getattr(kind, 'expr', kind))
+
+
+def _is_finite(expr):
+
+    return not expr.has(sym.zoo, sym.nan, sym.oo, -sym.oo)
+
+
+class SuperpositionSolver(object):
+    """Solver shared by the superposition groups of a netlist.  The
+    factorisation is performed when the first group is solved.  If
+    the A matrix of a group is singular, or the netlist cannot be
+    analysed in the s-domain, solution returns None and the group is
+    solved by itself."""
+
+    def __init__(self, netlist, groups):
+
+        self.netlist = netlist
+        self.groups = groups
+
+        # Mutual inductances are not stamped in the s-domain for DC
+        # analysis.
+        kinds = []
+        if not any([elt.type == 'K' for elt in netlist.elements.values()]):
+            kinds = [kind for kind in groups if _svalue(kind) is not None]
+        # There is nothing to gain for a single group.
+        self.kinds = kinds if len(kinds) > 1 else []
+
+    def _factor(self):
+
+        if hasattr(self, '_usable'):
+            return self._usable
+        self._usable = False
+
+        from .netlist import GroupNetlist
+
+        # All the sources are zeroed; their values are in the Z
+        # vectors of the groups.
+        template = GroupNetlist(self.netlist, (), 's')
+        template._analyse()
+
+        columns = []
+        Zlist = []
+        for kind in self.kinds:
+            group = self.groups[kind]
+            group._analyse()
+            if (group.node_list != template.node_list or
+                group.unknown_branch_currents !=
+                template.unknown_branch_currents):
+                continue
+            # The numerical solver is faster for these.
+            if group._use_numeric():
+                continue
+            columns.append(kind)
+            Zlist.append(sym.Matrix(group._Z))
+
+        if len(columns) < 2:
+            return False
+
+        try:
+            self._Asolver = solver_make(template._A, self.netlist.solver)
+        except ValueError:
+            return False
+
+        self.size = template._A.rows
+        self.columns = columns
+        self._det = self._Asolver.determinant()
+        self._solution = self._Asolver.solution(sym.Matrix.hstack(*Zlist))
+        self._usable = True
+        return True
+
+    def _nonsingular(self, s0):
+        """Return True if A is not singular when s is s0."""
+
+        if s0 == ssym:
+            return True
+        det = self._det.subs(ssym, s0)
+        return _is_finite(det) and sym.cancel(det) != 0
+
+    def solution(self, group):
+        """Return Solution object for the MNA equations of group or None
+        if the shared factorisation cannot be used."""
+
+        if group.kind not in self.kinds or not self._factor():
+            return None
+        if group.kind not in self.columns:
+            return None
+
+        s0 = _svalue(group.kind)
+        if not self._nonsingular(s0):
+            return None
+
+        col = self.columns.index(group.kind)
+
+        def row(i):
+            value = self._solution[i][col]
+            if s0 != ssym:
+                value = sym.cancel(value).subs(ssym, s0)
+            return [value]
+
+        return RowSolution(self.size, 1, row)
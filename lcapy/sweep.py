@@ -0,0 +1,213 @@
+"""This module performs numerical frequency sweeps of circuits.  The
+MNA A matrix is stamped once in the s-domain as G + s C.
+The equations are then solved for all the frequencies at once using
+batched matrix operations.
+
+Copyright 2019 Michael Hayes, UCECE
+
+"""
+
+from __future__ import division
+from .sym import ssym
+import numpy as np
+import sympy as sym
+
+__all__ = ('SweepResult', 'frequency_sweep', 'batched_solve')
+
+# Maximum number of bytes used for the stacked A matrices.  The
+# frequencies are processed in chunks to keep within this limit.
+max_batch_bytes = 64 * 1024 ** 2
+
+
+def _evaluate(expr, svector):
+    """Evaluate s-domain expression for each value in svector."""
+
+    expr = sym.sympify(expr)
+    symbols = expr.free_symbols - set((ssym, ))
+    if symbols != set():
+        raise ValueError('Cannot sweep expression %s with symbols %s' %
+                         (expr, ', '.join([str(s) for s in symbols])))
+
+    func = sym.lambdify(ssym, expr, modules='numpy')
+    # If expr is a constant, func returns a scalar.
+    return np.ones(len(svector), dtype=complex) * func(svector)
+
+
+def _source_values(value, svector):
+    """Evaluate the AC and s-domain components of a source for each
+    value in svector.  The DC and noise components are ignored."""
+
+    values = np.zeros(len(svector), dtype=complex)
+    for kind, component in value.decompose().items():
+        if kind == 'dc' or (isinstance(kind, str) and kind[0] == 'n'):
+            continue
+        # The AC phasors are applied at every frequency.
+        values += _evaluate(component.expr, svector)
+    return values
+
+
+def _split_matrix(sub, svector):
+    """Return NumPy arrays G and C where the MNA A matrix of sub is G + s
+    C.  The elements of A that are not linear in s are evaluated for
+    each s and returned as a list of (i, j, values)."""
+
+    Gs, Cs = sub._split_pencil()
+    N = Gs.rows
+    G = np.zeros((N, N), dtype=complex)
+    C = np.zeros((N, N), dtype=complex)
+    extra = []
+
+    for (i, j), expr in Cs._smat.items():
+        expr = sym.sympify(expr)
+        if expr.free_symbols != set():
+            # This raises an exception for the symbols.
+            _evaluate(expr, svector)
+        C[i, j] = complex(expr)
+
+    for (i, j), expr in Gs._smat.items():
+        expr = sym.sympify(expr)
+        if expr.free_symbols == set():
+            G[i, j] = complex(expr)
+        else:
+            extra.append((i, j, _evaluate(expr, svector)))
+
+    return G, C, extra
+
+
+def batched_solve(G, C, extra, Z, svector):
+    """Solve (G + s C) X = Z for each s in svector.  Z has shape
+    (N, len(svector)) and extra is a list of (i, j, values) where
+    values is an array of the additional A matrix element for each s."""
+
+    N, F = Z.shape
+    X = np.zeros((N, F), dtype=complex)
+    if N == 0:
+        return X
+
+    chunk = max(1, int(max_batch_bytes // (16 * N * N)))
+    for start in range(0, F, chunk):
+        sl = slice(start, start + chunk)
+        A = G[None, :, :] + svector[sl, None, None] * C[None, :, :]
+        for i, j, values in extra:
+            A[:, i, j] += values[sl]
+        try:
+            X[:, sl] = np.linalg.solve(A, Z[:, sl].T[:, :, None])[:, :, 0].T
+        except np.linalg.LinAlgError:
+            raise ValueError('The MNA A matrix is singular for s in'
+                             ' the range %s to %s' %
+                             (svector[sl][0], svector[sl][-1]))
+    return X
+
+
+class SweepResult(object):
+    """This class stores the results of a frequency sweep.  The
+    attribute V is an array of the node voltages with shape (nodes,
+    frequencies) and the attribute I is an array of the branch
+    currents with shape (branches, frequencies).  The node names are
+    given by the attribute nodes and the component names by the
+    attribute branches.
+
+    The voltage at node 2 is given by result[2] and the current
+    through R1 is given by result.get_I('R1').
+
+    """
+
+    def __init__(self, f, nodes, V, branches, I, node_map):
+
+        self.f = f
+        self.nodes = nodes
+        self.V = V
+        self.branches = branches
+        self.I = I
+        self._node_map = node_map
+
+    def __getitem__(self, name):
+        """Return node voltages by node name."""
+
+        if isinstance(name, int):
+            name = '%d' % name
+        if name not in self._node_map:
+            raise ValueError('Unknown node %s' % name)
+        return self.V[self.nodes.index(self._node_map[name])]
+
+    def get_Vd(self, Np, Nm=0):
+        """Return voltage drop between nodes Np and Nm."""
+
+        return self[Np] - self[Nm]
+
+    def get_I(self, name):
+        """Return current through component."""
+
+        if name not in self.branches:
+            raise ValueError('Unknown component %s' % name)
+        return self.I[self.branches.index(name)]
+
+    def __repr__(self):
+
+        return '%s(%d nodes, %d branches, %d frequencies)' % (
+            self.__class__.__name__, len(self.nodes), len(self.branches),
+            len(self.f))
+
+
+def frequency_sweep(cct, f=None, omega=None):
+    """Solve circuit cct for each of the frequencies in f (or each of
+    the angular frequencies in omega) and return a SweepResult
+    object.  The component values must be numerical."""
+
+    from .netlist import GroupNetlist
+
+    if (f is None) == (omega is None):
+        raise ValueError('Need to specify one of f or omega')
+    if omega is None:
+        omega = 2 * np.pi * np.asarray(f, dtype=float)
+    omega = np.atleast_1d(np.asarray(omega, dtype=float))
+    f = omega / (2 * np.pi)
+    svector = 1j * omega
+
+    # All the sources are zeroed; their values are only needed for
+    # the excitation.
+    sub = GroupNetlist(cct, (), 's')
+    sub._analyse()
+
+    G, C, extra = _split_matrix(sub, svector)
+
+    num_nodes = len(sub.node_list) - 1
+    Z = np.zeros((sub._A.rows, len(svector)), dtype=complex)
+    source_values = {}
+    for name, elt in sub.elements.items():
+        if not elt.independent_source:
+            continue
+        cpt = cct.elements[name].cpt
+        if elt.type == 'V':
+            values = _source_values(cpt.Voc, svector)
+            Z[num_nodes + elt.branch_index] += values
+        elif elt.type == 'I':
+            values = _source_values(cpt.Isc, svector)
+            n1, n2 = elt.node_indexes
+            if n1 >= 0:
+                Z[n1] += values
+            if n2 >= 0:
+                Z[n2] -= values
+        source_values[name] = values
+
+    X = batched_solve(G, C, extra, Z, svector)
+
+    V = np.zeros((num_nodes + 1, len(svector)), dtype=complex)
+    V[1:] = X[0:num_nodes]
+    nodes = list(sub.node_list)
+
+    branches = list(sub.unknown_branch_currents)
+    I = [X[num_nodes + m] for m in range(len(branches))]
+
+    for name, elt in sub.elements.items():
+        if elt.type in ('R', 'C'):
+            n1, n2 = sub.node_map[elt.nodes[0]], sub.node_map[elt.nodes[1]]
+            Vd = V[nodes.index(n1)] - V[nodes.index(n2)]
+            I.append(Vd * _evaluate(1 / elt.Z.expr, svector))
+            branches.append(name)
+        elif elt.type == 'I':
+            I.append(source_values[name])
+            branches.append(name)
+
+    I = np.array(I, dtype=complex).reshape(len(branches), len(svector))
+    return SweepResult(f, nodes, V, branches, I, dict(sub.node_map))
@@ -9,9 +9,11 @@ from sympy import Basic, Symbol, Expr, Atom
 from sympy.core.function import AppliedUndef
 import sympy as sym
 import re
+import signal
+import threading
 from .context import context
 
-__all__ = ('symsymbol', 'sympify', 'simplify')
+__all__ = ('symsymbol', 'sympify', 'simplify', 'set_simplify_policy')
 
 
 global_dict = {}
@@ -227,13 +229,111 @@ def symsymbol(name, **assumptions):
     return sympify(name, **assumptions)
 
 
-def symsimplify(expr):
+# Simplification policies, from cheapest to most expensive.
+simplify_policies = ('none', 'cancel', 'factor', 'full')
+
+# Global simplification policy and wall-clock budget in seconds (None
+# for no limit); see set_simplify_policy.
+simplify_policy = 'full'
+simplify_budget = None
+
+
+def set_simplify_policy(policy='full', budget=None):
+    """Set the global simplification policy used for the results of
+    circuit analysis and transforms:
+
+    'none' -- no simplification
+    'cancel' -- cancel common factors of rational functions
+    'factor' -- factor the numerator and denominator
+    'full' -- use SymPy's simplify (default)
+
+    If budget is not None, it specifies the time in seconds allowed for
+    each simplification.  If this is exceeded, the expression is only
+    cancelled.  The budget is only enforced in the main thread of
+    platforms that support SIGALRM."""
+
+    global simplify_policy, simplify_budget
+
+    if policy not in simplify_policies:
+        raise ValueError('Unknown simplify policy %s, expecting one of %s' %
+                         (policy, ', '.join(simplify_policies)))
+    if budget is not None and budget <= 0:
+        raise ValueError('Simplify budget must be positive')
+    simplify_policy = policy
+    simplify_budget = budget
+
+
+def get_simplify_policy():
+    """Return the global simplification policy and budget; see
+    set_simplify_policy."""
+
+    return simplify_policy, simplify_budget
+
+
+class SimplifyTimeout(Exception):
+    pass
+
+
+def _timeout_handler(signum, frame):
+    raise SimplifyTimeout()
+
+
+def _can_timeout():
+
+    return hasattr(signal, 'setitimer') and \
+        threading.current_thread() is threading.main_thread() and \
+        signal.getitimer(signal.ITIMER_REAL)[0] == 0
+
+
+def _simplify(expr, policy):
+
+    if policy == 'none':
+        return expr
+    try:
+        if policy == 'cancel':
+            return sym.cancel(expr)
+        if policy == 'factor':
+            return sym.factor(expr)
+    except sym.PolynomialError:
+        return expr
+    return sym.simplify(expr)
+
+
+def _simplify_budget(expr, policy, budget):
+
+    previous = signal.signal(signal.SIGALRM, _timeout_handler)
+    signal.setitimer(signal.ITIMER_REAL, budget)
+    try:
+        return _simplify(expr, policy)
+    except SimplifyTimeout:
+        pass
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+    if policy == 'cancel':
+        return expr
+    return _simplify(expr, 'cancel')
+
+
+def symsimplify(expr, policy=None, budget=None):
     """Simplify a SymPy expression.  This is a hack to work around
-    problems with SymPy's simplify API."""
+    problems with SymPy's simplify API.
+
+    policy and budget default to the global simplification policy; see
+    set_simplify_policy."""
+
+    if policy is None:
+        policy = simplify_policy
+    elif policy not in simplify_policies:
+        raise ValueError('Unknown simplify policy %s, expecting one of %s' %
+                         (policy, ', '.join(simplify_policies)))
+    if budget is None:
+        budget = simplify_budget
 
     # Handle Matrix types
     if hasattr(expr, 'applyfunc'):
-        return expr.applyfunc(lambda x: symsimplify(x))
+        return expr.applyfunc(lambda x: symsimplify(x, policy, budget))
     
     try:
         if expr.is_Function and expr.func in (sym.Heaviside, sym.DiracDelta):
@@ -241,15 +341,19 @@ def symsimplify(expr):
     except:
         pass
 
-    expr = sym.simplify(expr)
-    return expr
+    if budget is not None and policy != 'none' and _can_timeout():
+        return _simplify_budget(expr, policy, budget)
+    return _simplify(expr, policy)
 
 
-def simplify(expr):
-    """Simplify an Lcapy expression."""
+def simplify(expr, policy=None, budget=None):
+    """Simplify an Lcapy expression.  policy and budget default to the
+    global simplification policy; see set_simplify_policy."""
 
     try:
-        return expr.simplify()
+        if policy is None and budget is None:
+            return expr.simplify()
+        return expr.simplify(policy, budget)
     except:
         pass
     
@@ -257,7 +361,7 @@ def simplify(expr):
         expr = expr.expr
     except:
         pass
-    return symsimplify(expr)
+    return symsimplify(expr, policy, budget)
 
 
 def is_sympy(expr):
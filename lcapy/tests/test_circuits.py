@@ -1,5 +1,5 @@
 from lcapy import Circuit, R, C, L, V, I, v, exp, Heaviside, Vs, Vn, Vt, It, sqrt, u
-from lcapy import Zs, s, t
+from lcapy import Zs, s, t, omega
 import unittest
 import sympy as sym
 
@@ -342,6 +342,46 @@ class LcapyTester(unittest.TestCase):
         bn = b.noisy()
         self.assertEqual(an[1].V.n.expr, bn[1].V.n.expr, "Incorrect noise")
 
+    def test_noise_analysis(self):
+        """Lcapy: check adjoint noise analysis"""
+
+        import numpy as np
+
+        a = Circuit()
+        a.add('V1 1 0 noise 3')
+        a.add('V2 2 1 noise 4')
+        a.add('R1 2 3 5')
+        a.add('C1 3 0 2')
+        a.add('I1 3 0 noise 2')
+        r = a.noise_analysis(3)
+        self.assertEqual(r.sources, ['V1', 'V2', 'I1'], "Incorrect sources")
+        self.assertEqual(r.transfers['I1'], 5 / (10 * s + 1),
+                         "Incorrect transfer function")
+        self.assertEqual(r['V2'].expr, 4 / sqrt(100 * omega**2 + 1),
+                         "Incorrect contribution")
+        self.assertEqual(r.total.expr, a[3].V.n.expr, "Incorrect total")
+
+        fv = np.array((0, 0.01, 1))
+        rn = a.noise_analysis(3, f=fv)
+        self.assertEqual(np.allclose(rn.total,
+                                     a[3].V.n.evaluate(2 * np.pi * fv)),
+                         True, "Incorrect numerical total")
+        self.assertEqual(np.allclose(rn.transfers['V1'],
+                                     1 / (1 + 20j * np.pi * fv)),
+                         True, "Incorrect numerical transfer function")
+
+        b = Circuit()
+        b.add('R1 1 0 1e3')
+        b.add('R2 1 2 1e3')
+        b.add('R3 2 0 2e3')
+        bn = b.noisy()
+        params = {'k': 1.38e-23, 'T': 300}
+        rn = bn.noise_analysis(2, f=[1, 1e3], params=params)
+        self.assertEqual(np.allclose(rn.total,
+                                     np.sqrt(4 * 1.38e-23 * 300 * 1e3)),
+                         True, "Incorrect thermal noise")
+        self.assertRaises(ValueError, bn.noise_analysis, 2, f=[1])
+
     def test_causal1(self):
 
         a = Circuit()
@@ -390,3 +430,604 @@ class LcapyTester(unittest.TestCase):
         self.assertEqual(a.V1.v, Vt('5*cos(t)'), "V1 voltage incorrect")
         self.assertEqual(a.R1.i, It('(4*sin(t)+3*cos(t))/5'), "R1 current incorrect")
         
+
+    def test_A_matrix(self):
+        """Lcapy: check MNA A matrix and Z vector
+
+        """
+
+        a = Circuit()
+        a.add('V1 1 0 5')
+        a.add('R1 1 2 2')
+        a.add('R2 2 0 4')
+        sub = a.sub['time']
+        self.assertEqual(sub.A, sym.Matrix([[sym.Rational(1, 2), -sym.Rational(1, 2), 1],
+                                            [-sym.Rational(1, 2), sym.Rational(3, 4), 0],
+                                            [1, 0, 0]]), "A incorrect")
+        self.assertEqual(sub.ZV, sym.Matrix([0, 0, 5]), "Z incorrect")
+        self.assertEqual(len(sub._A._smat), 6, "A not sparse")
+
+    def test_solvers(self):
+        """Lcapy: check MNA solvers
+
+        """
+
+        a = Circuit()
+        a.add('V1 1 0 s 10')
+        a.add('R1 1 2')
+        a.add('C1 2 0')
+        a.add('L1 2 3')
+        a.add('R2 3 0')
+
+        V2 = a[2].V
+        for solver in ('lu', 'inv'):
+            b = a.copy()
+            b.solver = solver
+            self.assertEqual(b[2].V, V2, "Node voltage incorrect for %s" % solver)
+            self.assertEqual(b.L1.I, a.L1.I, "Current incorrect for %s" % solver)
+
+        def set_solver():
+            a.solver = 'foo'
+        self.assertRaises(ValueError, set_solver)
+
+        b = Circuit()
+        b.add('V1 1 0 2')
+        b.add('V2 1 0 3')
+        b.add('R1 1 0 2')
+        for solver in ('lu', 'bareiss', 'inv'):
+            b.solver = solver
+            with self.assertRaises(ValueError):
+                b.V1.I
+
+    def test_numeric(self):
+        """Lcapy: check numeric MNA solver
+
+        """
+
+        a = Circuit(numeric=True)
+        a.add('V1 1 0 {5 * u(t)}')
+        a.add('I1 0 2 2')
+        a.add('R1 1 2 2')
+        a.add('R2 2 0 4')
+
+        b = a.copy()
+        self.assertEqual(b.numeric, True, "numeric not copied")
+        b.numeric = False
+
+        for expr1, expr2 in ((a[2].v, b[2].v), (a.R1.i, b.R1.i),
+                             (a.V1.i, b.V1.i)):
+            diff = (expr1 - expr2).expr
+            self.assertEqual(abs(diff.subs(t.expr, 1)) < 1e-12, True,
+                             "Numeric solution incorrect")
+
+        c = Circuit()
+        c.add('V1 1 0 ac 5.0 0.0 3.0')
+        c.add('R1 1 2 4.7e3')
+        c.add('C1 2 0 1.5e-9')
+        self.assertEqual(c.sub[3]._use_numeric(), True,
+                         "Numeric solver not used for float values")
+        self.assertEqual(abs(complex(c[2].V[3].expr) - (5 - 1.0575e-4j)) < 1e-8,
+                         True, "Numeric phasor incorrect")
+
+        c = Circuit()
+        c.add('V1 1 0 10.0')
+        c.add('R1 1 2 1e3')
+        c.add('R2 2 0 4e3')
+        self.assertEqual(c.sub['time']._use_numeric(), True,
+                         "Numeric solver not used for float DC values")
+        self.assertEqual(abs(float(c[2].V.dc.expr) - 8) < 1e-12, True,
+                         "Numeric DC voltage incorrect")
+
+        c = Circuit()
+        c.add('V1 1 0 10')
+        c.add('R1 1 2 2.0')
+        c.add('R2 2 0 1')
+        self.assertEqual(c.sub['time']._use_numeric(), False,
+                         "Numeric solver used for exact values")
+        self.assertEqual(c[2].V.dc, sym.Rational(10, 3), "Exact solution incorrect")
+
+        d = Circuit(numeric=True)
+        d.add('V1 1 0 step 5')
+        d.add('R1 1 2 2')
+        d.add('C1 2 0 4')
+        self.assertEqual(d.sub['s']._use_numeric(), False,
+                         "Numeric solver used for Laplace analysis")
+        self.assertEqual2(d[2].V.s, Vs('5 / (8 * (s**2 + s / 8))'),
+                         "Laplace solution incorrect")
+
+        e = Circuit(numeric=True)
+        e.add('V1 1 0 2')
+        e.add('V2 1 0 3')
+        e.add('R1 1 0 2')
+        with self.assertRaises(ValueError):
+            e.V1.I
+
+    def test_sweep(self):
+        """Lcapy: check frequency sweep
+
+        """
+        import numpy as np
+
+        a = Circuit()
+        a.add('V1 1 0 s 1')
+        a.add('R1 1 2 1000')
+        a.add('L1 2 3 1e-3')
+        a.add('C1 3 0 1e-6')
+
+        fv = np.logspace(1, 6, 11)
+        result = a.sweep(f=fv)
+        self.assertEqual(result.V.shape, (4, 11), "V shape incorrect")
+        self.assertEqual(result.I.shape, (4, 11), "I shape incorrect")
+        H = a[3].V.s
+        self.assertEqual(np.allclose(result[3], H.frequency_response(fv)),
+                         True, "Node voltage incorrect")
+        self.assertEqual(np.allclose(result.get_I('R1'), result.get_I('L1')),
+                         True, "Branch current incorrect")
+
+        b = Circuit()
+        b.add('V1 1 0 ac 2 0 3')
+        b.add('R1 1 2 3')
+        b.add('L1 2 0 4')
+        result = b.sweep(omega=3)
+        self.assertEqual(np.allclose(result.get_Vd(2, 0)[0],
+                                     complex(b[2].V[3].expr)),
+                         True, "AC node voltage incorrect")
+
+        c = Circuit()
+        c.add('V1 1 0 ac 1')
+        c.add('R1 1 0')
+        with self.assertRaises(ValueError):
+            c.sweep(f=[1, 2])
+
+    def test_transient(self):
+        """Lcapy: check transient simulation
+
+        """
+        import numpy as np
+
+        a = Circuit()
+        a.add('V1 1 0 step 10')
+        a.add('R1 1 2 1000')
+        a.add('C1 2 0 1e-6')
+        result = a.transient(5e-3, 1e-6)
+        self.assertEqual(result.V.shape, (3, 5001), "V shape incorrect")
+        expected = a.C1.V(t).evaluate(result.t)
+        self.assertEqual(np.allclose(result[2], expected, atol=1e-4), True,
+                         "Trapezoidal response incorrect")
+        current = a.C1.I(t).evaluate(result.t[1:])
+        self.assertEqual(np.allclose(result.get_I('C1')[1:], current,
+                                     rtol=0, atol=1e-7), True,
+                         "Trapezoidal capacitor current incorrect")
+        result = a.transient(5e-3, 1e-6, method='backward-euler')
+        self.assertEqual(np.allclose(result[2], expected, atol=1e-2), True,
+                         "Backward Euler response incorrect")
+
+        b = Circuit()
+        b.add('C1 1 0 1e-3 5')
+        b.add('L1 1 2 1e-3 0')
+        b.add('R1 2 0 0.5')
+        result = b.transient(1e-2, 1e-6)
+        self.assertEqual(np.allclose(result[1], b.C1.V(t).evaluate(result.t),
+                                     atol=1e-4), True,
+                         "Initial value response incorrect")
+
+        e = Circuit()
+        e.add('C1 1 0 1e-3 0')
+        e.add('L1 1 2 1e-3 2')
+        e.add('R1 2 0 0.5')
+        result = e.transient(1e-3, 1e-6)
+        self.assertEqual(np.allclose((result[1][0], result[2][0],
+                                      result.get_I('L1')[0]), (0, 1, 2),
+                                     rtol=0, atol=1e-12), True,
+                         "Initial values incorrect")
+
+        c = Circuit()
+        c.add('V1 1 0 step 1')
+        c.add('R1 1 2 1')
+        c.add('L1 2 0 1e-3')
+        c.add('L2 3 0 1e-3')
+        c.add('K1 L1 L2 0.5')
+        c.add('R2 3 0 1')
+        result = c.transient(5e-3, 1e-6)
+        self.assertEqual(np.allclose(result[3], c.R2.V(t).evaluate(result.t),
+                                     atol=1e-4), True,
+                         "Coupled inductor response incorrect")
+
+        d = Circuit()
+        d.add('V1 1 0 ac 1 0 1000')
+        d.add('R1 1 2 100')
+        d.add('C1 2 0 1e-5')
+        result = d.transient(1e-2, 1e-6)
+        self.assertEqual(np.allclose(result[2], d.C1.V(t).evaluate(result.t),
+                                     atol=1e-4), True,
+                         "AC steady state response incorrect")
+        self.assertEqual(np.allclose(result.get_I('C1'),
+                                     d.C1.I(t).evaluate(result.t),
+                                     rtol=0, atol=1e-7), True,
+                         "AC steady state capacitor current incorrect")
+
+    def test_pencil(self):
+        """Lcapy: check G and C matrices
+
+        """
+        import numpy as np
+
+        a = Circuit()
+        a.add('V1 1 0 step 1')
+        a.add('R1 1 2 2')
+        a.add('L1 2 0 1e-3')
+        a.add('L2 3 0 4e-3')
+        a.add('K1 L1 L2 0.5')
+        a.add('C1 3 0 1e-6')
+        G = a.G_matrix.toarray()
+        C = a.C_matrix.toarray()
+        self.assertEqual(G.shape, (6, 6), "G shape incorrect")
+        self.assertEqual(np.allclose(G[0:3, 0:3], [[0.5, -0.5, 0],
+                                                   [-0.5, 0.5, 0],
+                                                   [0, 0, 0]]), True,
+                         "G incorrect")
+        self.assertEqual(np.allclose(C[0:3, 0:3], np.diag([0, 0, 1e-6])),
+                         True, "C capacitance incorrect")
+        self.assertEqual(np.allclose(C[4:6, 4:6], [[-1e-3, -1e-3],
+                                                   [-1e-3, -4e-3]]), True,
+                         "C inductance incorrect")
+        A = a.sub['s'].A.subs(s.var, 2j).evalf()
+        self.assertEqual(np.allclose(np.array(A.tolist(), dtype=complex),
+                                     G + 2j * C), True, "A != G + s C")
+
+        b = Circuit()
+        b.add('V1 1 0 step 1')
+        b.add('R1 1 2 R')
+        b.add('C1 2 0 C')
+        Rs, Cs = sym.symbols('R C', positive=True)
+        self.assertEqual(sym.Matrix(b.G_matrix)[0:2, 0:2],
+                         sym.Matrix([[1 / Rs, -1 / Rs], [-1 / Rs, 1 / Rs]]),
+                         "Symbolic G incorrect")
+        self.assertEqual(sym.Matrix(b.C_matrix)[1, 1], Cs,
+                         "Symbolic C incorrect")
+
+    def test_poles_zeros(self):
+        """Lcapy: check numerical poles and zeros
+
+        """
+        import numpy as np
+
+        a = Circuit()
+        a.add('V1 1 0 step 1')
+        a.add('R1 1 2 1e3')
+        a.add('L1 2 3 1e-3')
+        a.add('C1 3 0 1e-9')
+        a.add('R2 3 0 1e4')
+        expected = np.roots([1e-12, 1.1e-6, 1.1])
+        self.assertEqual(np.allclose(np.sort_complex(a.poles()),
+                                     np.sort_complex(expected)), True,
+                         "Poles incorrect")
+
+        # Twin-T notch filter
+        b = Circuit()
+        b.add('R1 1 2 1e3')
+        b.add('R2 2 3 1e3')
+        b.add('C3 2 0 2e-6')
+        b.add('C1 1 4 1e-6')
+        b.add('C2 4 3 1e-6')
+        b.add('R3 4 0 500')
+        b.add('R4 3 0 1e6')
+        zeros = b.zeros(1, 0, 3, 0)
+        for zero in (1000j, -1000j):
+            self.assertEqual(np.min(abs(zeros - zero)) < 1e-6, True,
+                             "Zero %s not found" % zero)
+
+        # The poles of a 12th order ladder filter are beyond the reach
+        # of the symbolic root finder.
+        c = Circuit()
+        c.add('R0 1 0 1')
+        for k in range(12):
+            c.add('L%d %d %d 1' % (k, k + 1, k + 2))
+            c.add('C%d %d 0 1' % (k, k + 2))
+        c.add('RL 13 0 1')
+        poles = c.poles()
+        self.assertEqual(len(poles), 24, "Number of poles incorrect")
+        self.assertEqual(np.all(poles.real < 0), True, "Unstable poles")
+        self.assertEqual(len(c.zeros(1, 0, 13, 0)), 0, "Zeros incorrect")
+
+    def test_ss(self):
+        """Lcapy: check state-space models
+
+        """
+        import numpy as np
+        from scipy.signal import lsim
+
+        a = Circuit()
+        a.add('V1 1 0 step 10')
+        a.add('R1 1 2 1000')
+        a.add('L1 2 3 1e-3')
+        a.add('C1 3 0 1e-6')
+        ss = a.ss(['V1'], [3, 'L1'])
+        self.assertEqual(ss.states, ['V_3', 'I_L1'], "states incorrect")
+        self.assertEqual(np.allclose(np.sort(ss.eigenvalues()),
+                                     np.sort(np.roots([1e-9, 1e-3, 1]))),
+                         True, "eigenvalues incorrect")
+        tv = np.linspace(0, 5e-3, 1001)
+        _, y, _ = lsim(ss.scipy(), 10 * np.ones(len(tv)), tv)
+        self.assertEqual(np.allclose(y[:, 0], a.C1.V(t).evaluate(tv),
+                                     atol=1e-6), True, "Response incorrect")
+
+        b = Circuit()
+        b.add('V1 1 0 step')
+        b.add('R1 1 2 R')
+        b.add('C1 2 0 C')
+        ss = b.ss(outputs=[2])
+        Rs, Cs = sym.symbols('R C', positive=True)
+        self.assertEqual(ss.A, sym.Matrix([[-1 / (Cs * Rs)]]), "A incorrect")
+        self.assertEqual(ss.B, sym.Matrix([[1 / (Cs * Rs)]]), "B incorrect")
+        self.assertEqual(ss.C, sym.Matrix([[1]]), "C incorrect")
+        self.assertEqual(ss.D, sym.Matrix([[0]]), "D incorrect")
+
+        # The capacitor is not connected to ground.
+        c = Circuit()
+        c.add('V1 1 0 step')
+        c.add('R1 1 2 1')
+        c.add('C1 2 3 1')
+        c.add('R2 3 0 1')
+        ss = c.ss(outputs=[3])
+        self.assertEqual(np.allclose(ss.eigenvalues(), [-0.5]), True,
+                         "Floating capacitor eigenvalue incorrect")
+        self.assertEqual(np.allclose(ss.D, [[0.5]]), True,
+                         "Floating capacitor D incorrect")
+
+    def test_param_sweep(self):
+        """Lcapy: check parameter sweep
+
+        """
+        import numpy as np
+
+        a = Circuit()
+        a.add('V1 1 0 10')
+        a.add('R1 1 2 1000')
+        a.add('R2 2 0 2000')
+
+        R1 = np.array([100, 200, 500])
+        R2 = np.array([1000, 3000])
+        expected = 10 * R2[None, :] / (R1[:, None] + R2[None, :])
+        for method in ('symbolic', 'numeric'):
+            V2, V12 = a.param_sweep({'R1': R1, 'R2': R2}, [2, (1, 2)],
+                                    method=method)
+            self.assertEqual(V2.shape, (3, 2), "Grid shape incorrect")
+            self.assertEqual(np.allclose(V2, expected), True,
+                             "Node voltage incorrect for %s" % method)
+            self.assertEqual(np.allclose(V12, 10 - expected), True,
+                             "Voltage drop incorrect for %s" % method)
+
+        V2 = a.param_sweep({'R1': R1[0:2], 'R2': R2}, 2, grid=False)
+        self.assertEqual(np.allclose(V2, [expected[0, 0], expected[1, 1]]),
+                         True, "Zipped sweep incorrect")
+
+        V1 = a.param_sweep({'R1': R1}, lambda cct: cct.R1.V, method='numeric')
+        self.assertEqual(np.allclose(V1, 10 * R1 / (R1 + 2000)), True,
+                         "Callable output incorrect")
+
+        b = Circuit()
+        b.add('R1 1 2 1000')
+        b.add('C1 2 0 1e-6')
+        fv = np.logspace(1, 5, 5)
+        H = b.transfer(1, 0, 2, 0)
+        for method in ('symbolic', 'numeric'):
+            result = b.param_sweep({'C1': [1e-6, 2e-6], 'f': fv},
+                                   (1, 0, 2, 0), method=method)
+            self.assertEqual(np.allclose(result[0], H.frequency_response(fv)),
+                             True, "Transfer function incorrect for %s" % method)
+
+        with self.assertRaises(ValueError):
+            a.param_sweep({'R1': R1, 'R2': R2}, 2, grid=False)
+
+    def test_monte_carlo(self):
+        """Lcapy: check Monte Carlo analysis
+
+        """
+        import numpy as np
+
+        a = Circuit()
+        a.add('V1 1 0 10')
+        a.add('R1 1 2 1000')
+        a.add('R2 2 0 2000')
+
+        result = a.monte_carlo({'R*': 0.01}, 1000, [2, (1, 2)], seed=1)
+        R1 = result.values['R1']
+        R2 = result.values['R2']
+        self.assertEqual(len(R1), 1000, "Number of samples incorrect")
+        self.assertEqual(np.all(abs(R1 - 1000) <= 10), True,
+                         "R1 values outside tolerance")
+        self.assertEqual(np.allclose(result[0], 10 * R2 / (R1 + R2)), True,
+                         "Node voltage incorrect")
+        self.assertEqual(np.allclose(result[0] + result[1], 10), True,
+                         "Voltage drop incorrect")
+        summary = result.summary()[0]
+        self.assertEqual(abs(summary['p50'] - 20 / 3) < 0.01, True,
+                         "Median incorrect")
+        self.assertEqual(result.yield_fraction(0, 6, 7), 1.0,
+                         "Yield incorrect")
+
+        from lcapy import paramsweep
+        solve = paramsweep._solve_numeric
+        calls = []
+
+        def counted(*args):
+            calls.append(args)
+            return solve(*args)
+
+        paramsweep._solve_numeric = counted
+        try:
+            a.monte_carlo({'R*': 0.01}, 10, [1, 2, (1, 2)], seed=1)
+        finally:
+            paramsweep._solve_numeric = solve
+        self.assertEqual(len(calls), 1, "Samples solved for each output")
+
+        with self.assertRaises(ValueError):
+            a.monte_carlo({'C*': 0.01}, 10, 2)
+
+    def test_lazy_solve(self):
+        """Lcapy: check unknowns are only found when required
+
+        """
+
+        a = Circuit()
+        a.add('V1 1 0 s 10')
+        a.add('R1 1 2')
+        a.add('C1 2 0')
+        a.add('L1 2 3')
+        a.add('R2 3 0')
+
+        sub = a.sub['s']
+        V3 = sub.Vdict['3']
+        self.assertEqual(len(sub._solution._rows), 1,
+                         "Unrequested unknowns found")
+        self.assertEqual(V3, Vs('10 * R2 / (C1 * L1 * R1 * s**2 + C1 * R1 * R2 * s + L1 * s + R1 + R2)'),
+                         "Node voltage incorrect")
+        self.assertEqual(sorted(sub.Vdict.keys()), ['0', '1', '2', '3'],
+                         "Nodes incorrect")
+        self.assertEqual((a.R1.I - a.L1.I - a.C1.I).s.simplify(), 0,
+                         "Currents incorrect")
+
+    def test_simplify_policy(self):
+        """Lcapy: check simplification policy
+
+        """
+
+        a = Circuit()
+        a.add('V1 1 0 s 10')
+        a.add('R1 1 2')
+        a.add('C1 2 0')
+        a.simplify_policy = 'none'
+
+        self.assertEqual(a.sub['s']._simplify_policy, 'none',
+                         "Policy not propagated")
+        self.assertEqual(a[2].V.s.simplify(),
+                         Vs('10 / (C1 * R1 * s + 1)').simplify(),
+                         "Node voltage incorrect")
+
+        b = a.copy()
+        b.simplify_policy = 'cancel'
+        b.simplify_budget = 10
+        self.assertEqual(b[2].V.s, Vs('10 / (C1 * R1 * s + 1)'),
+                         "Node voltage incorrect")
+
+        from lcapy import set_simplify_policy
+        from lcapy.laplace import laplace_transform
+        from lcapy.sym import tsym, ssym
+        expr = (sym.exp(-tsym) + sym.exp(-2 * tsym)) * sym.Heaviside(tsym)
+        try:
+            set_simplify_policy('none')
+            V = Vs('(s**2 - 1) / (s - 1)')
+            self.assertEqual(V.simplify(), V, "Policy ignored by simplify")
+            self.assertEqual(V.simplify('full'), Vs('s + 1'),
+                             "Explicit policy ignored")
+            X1 = laplace_transform(expr, tsym, ssym)
+            set_simplify_policy('full')
+            X2 = laplace_transform(expr, tsym, ssym)
+        finally:
+            set_simplify_policy()
+        self.assertEqual(X2, (2 * ssym + 3) / ((ssym + 1) * (ssym + 2)),
+                         "Transform cached for another policy")
+        self.assertEqual(sym.simplify(X1 - X2), 0, "Transform incorrect")
+
+        with self.assertRaises(ValueError):
+            a.simplify_policy = 'fast'
+        with self.assertRaises(ValueError):
+            a.simplify_budget = 0
+
+    def test_superposition_shared(self):
+        """Lcapy: check superposition groups share factorisation
+
+        """
+
+        a = Circuit()
+        a.add('I1 1 0 dc 2')
+        a.add('I2 1 0 ac 3')
+        a.add('I3 1 0 s {4 / s}')
+        a.add('R1 1 2')
+        a.add('C1 2 0')
+        a.add('L1 1 0')
+
+        self.assertEqual(len(a.sub), 3, "Incorrect number of groups")
+        shared = a.sub['dc']._shared
+        for kind, group in a.sub.items():
+            self.assertEqual(group._shared is shared, True,
+                             "Factorisation not shared for %s" % kind)
+
+        b = a.copy()
+        for group in b.sub.values():
+            # Solve each group separately.
+            group._invalidate()
+
+        for kind in a.sub.keys():
+            for node in ('1', '2'):
+                Va = a.sub[kind].Vdict[node]
+                Vb = b.sub[kind].Vdict[node]
+                self.assertEqual((Va - Vb).simplify(), 0,
+                                 "Voltage at node %s incorrect for %s" %
+                                 (node, kind))
+
+    def test_clone(self):
+        """Lcapy: check components are copied without re-parsing
+
+        """
+
+        a = Circuit()
+        a.add('V1 1 0 dc 10')
+        a.add('I1 1 0 ac 3')
+        a.add('R1 1 2')
+        a.add('C1 2 0 C1 5')
+
+        b = a.copy()
+        self.assertEqual(str(b), str(a), "Copy netlist incorrect")
+        self.assertEqual(b.R1.cpt is a.R1.cpt, True, "Component re-parsed")
+        self.assertEqual(b.R1.cct is b, True, "Component parent incorrect")
+
+        c = a.select(('V1', ), 'dc')
+        self.assertEqual(str(c.I1), 'I1 1 0 ac 0', "Zeroed source incorrect")
+        self.assertEqual(str(c.C1), 'C1 2 0 C1', "Initial condition not killed")
+        self.assertEqual(c.V1.cpt is a.V1.cpt, True, "Source re-parsed")
+
+        d = a.renumber({'0': '0', '1': '5', '2': '6'})
+        self.assertEqual(str(d.R1), 'R1 5 6', "Renumbered netlist incorrect")
+        self.assertEqual(d[5].V, a[1].V, "Renumbered node voltage incorrect")
+
+        e = Circuit()
+        e.add('W 1 2')
+        e.add('V 2 0 5')
+        e.add('R 1 0 2')
+        f = e.kill()
+        self.assertEqual(sorted(f.elements.keys()),
+                         ['Ranon1', 'Wanon1', 'Wanon2'],
+                         "Anonymous names incorrect")
+
+        e = Circuit()
+        e.add('V 2 0 5')
+        e.add('W 1 2')
+        e.add('R 1 0 2')
+        f = e.kill()
+        self.assertEqual(str(f.Wanon2), 'Wanon2 1 2',
+                         "Renamed anonymous component incorrect")
+
+    def test_equipotential_nodes(self):
+        """Lcapy: check nodes connected by wires are merged
+
+        """
+
+        a = Circuit()
+        a.add('V1 1 0 10')
+        a.add('W 1 2')
+        a.add('W 4 3')
+        a.add('W 3 2')
+        a.add('R1 4 5 2')
+        a.add('W 5 6')
+        a.add('R2 6 0_1 3')
+        a.add('W 0_1 0')
+
+        enodes = a.equipotential_nodes
+        self.assertEqual(sorted(enodes.keys()), ['0', '1', '5'],
+                         "Incorrect equipotential nodes")
+        self.assertEqual(enodes['1'], ['1', '2', '3', '4'],
+                         "Incorrect equipotential nodes")
+        self.assertEqual(a.node_map['6'], '5', "Incorrect node map")
+        self.assertEqual(a[6].V.dc, 6, "Incorrect node voltage")
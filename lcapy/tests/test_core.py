@@ -319,6 +319,137 @@ class LcapyTester(unittest.TestCase):
         self.assertEqual(a.evaluate(0j), 0j, "Evaluate fail for sqrt(0j)")
         self.assertEqual(a.evaluate(2j), 1 + 1j, "Evaluate fail for sqrt(1+1j)")
         self.assertEqual(a.evaluate(4), 2, "Evaluate fail for sqrt(4)")
+        self.assertEqual(a.evaluate((-4, 4))[0], 2j, "Evaluate fail for sqrt(-4)")
+
+        import numpy as np
+        from lcapy.evaluate import lambdify_cache
+        tv = np.linspace(-1, 1, 201)
+        a = exp(-t) * Heaviside(t) + 2
+        v = a.evaluate(tv)
+        self.assertEqual(v.shape, tv.shape, "Evaluate shape")
+        self.assertEqual(v[0], 2.0, "Evaluate fail for Heaviside")
+        self.assertEqual(np.allclose(v[100:], np.exp(-tv[100:]) + 2), True,
+                         "Evaluate fail for vector")
+        misses = lambdify_cache.info().misses
+        a.evaluate(tv)
+        self.assertEqual(lambdify_cache.info().misses, misses,
+                         "Compiled function not cached")
+        self.assertEqual(np.all((t * 0 + 3).evaluate(tv) == 3), True,
+                         "Evaluate fail for constant")
+
+    def test_compile(self):
+        """Lcapy: check compile
+
+        """
+
+        import numpy as np
+        import pickle
+
+        a = expr('exp(-t / (R1 * C1))')
+        func = a.compile(('R1', 'C1'))
+        self.assertEqual(a.compile(('R1', 'C1')) is func, True,
+                         "Compiled function not cached")
+        tv = np.array([0, 1e-3])
+        v = func(tv, R1=1e3, C1=np.array([1e-6, 1e-3])[:, None])
+        self.assertEqual(v.shape, (2, 2), "Compile not broadcast")
+        self.assertEqual(np.allclose(v[:, 1], np.exp([-1, -1e-3])), True,
+                         "Compile fail")
+        func2 = pickle.loads(pickle.dumps(func))
+        self.assertEqual(func2(1e-3, R1=1, C1=1e-3), func(1e-3, R1=1, C1=1e-3),
+                         "Unpickled function fail")
+        with self.assertRaises(ValueError):
+            a.compile(('R1', ))
+        with self.assertRaises(ValueError):
+            func(tv, R1=1)
+
+    def test_response(self):
+        """Lcapy: check response
+
+        """
+
+        import numpy as np
+
+        tv = np.arange(0, 10, 1e-3)
+        x = np.ones(len(tv))
+        y = (1 / (s + 1)).response(x, tv)
+        self.assertEqual(np.allclose(y, 1 - np.exp(-tv), atol=2e-3), True,
+                         "IIR response incorrect")
+
+        y = ((s + 2) / (s + 1)).response(x, tv)
+        self.assertEqual(np.allclose(y, 2 - np.exp(-tv), atol=2e-3), True,
+                         "Improper response incorrect")
+
+        y = (exp(-0.5005 * s) / (s + 1)).response(x, tv)
+        td = tv - 0.5005
+        self.assertEqual(np.allclose(y, (1 - np.exp(-td)) * (td >= 0),
+                                     atol=2e-3), True,
+                         "Delayed response incorrect")
+
+        with self.assertRaises(ValueError):
+            (1 / (s + 1)).response(x, tv[0:-1])
+
+    def test_transient_response_talbot(self):
+        """Lcapy: check numerical inverse Laplace transform
+
+        """
+
+        import numpy as np
+
+        tv = np.linspace(0, 5, 21)
+        H = 1 / (s**2 + 2 * s + 5)
+        self.assertEqual(np.allclose(H.transient_response(tv, method='talbot'),
+                                     H.transient_response(tv), atol=1e-8),
+                         True, "Rational function incorrect")
+
+        H = exp(-s) / (s + 1)
+        expected = np.where(tv >= 1, np.exp(1 - tv), 0)
+        self.assertEqual(np.allclose(H.transient_response(tv, method='talbot'),
+                                     expected, atol=1e-8), True,
+                         "Delay incorrect")
+
+        # Semi-infinite RC transmission line
+        H = exp(-sqrt(s))
+        expected = np.exp(-1 / (4 * tv[1:])) / (2 * np.sqrt(np.pi) *
+                                                 tv[1:]**1.5)
+        self.assertEqual(np.allclose(H.transient_response(tv[1:],
+                                                          method='talbot'),
+                                     expected, atol=1e-8), True,
+                         "Irrational function incorrect")
+        with self.assertRaises(ValueError):
+            H.transient_response(tv[1:], method='symbolic')
+
+        # Open-circuit RC transmission line
+        H = 1 / TxLine(1, 0, 0, 1).B11
+        n = np.arange(200)[:, None]
+        expected = 1 - 4 / np.pi * np.sum((-1)**n / (2 * n + 1) * np.exp(
+            -(2 * n + 1)**2 * np.pi**2 / 4 * tv[1:]), axis=0)
+        self.assertEqual(np.allclose(sExpr(H).step_response(tv[1:]),
+                                     expected, atol=1e-8), True,
+                         "Transmission line incorrect")
+
+    def test_discretize(self):
+        """Lcapy: check discretize
+
+        """
+
+        import numpy as np
+
+        fs = 1e3
+        tv = np.arange(0, 10, 1 / fs)
+        x = np.ones(len(tv))
+        H = exp(-0.5005 * s) / (s + 1)
+        td = tv - 0.5005
+        expected = (1 - np.exp(-td)) * (td >= 0)
+        for method in ('bilinear', 'zoh', 'impulse'):
+            filt = H.discretize(fs, method)
+            y = np.hstack([filt.process(chunk) for chunk in np.split(x, 10)])
+            self.assertEqual(np.allclose(y, expected, atol=2e-3), True,
+                             "Discretize %s incorrect" % method)
+
+        with self.assertRaises(ValueError):
+            H.discretize(fs, 'foo')
+        with self.assertRaises(ValueError):
+            (s + 1).discretize(fs)
 
     def test_zp2k(self):
 
@@ -345,6 +476,37 @@ class LcapyTester(unittest.TestCase):
         self.assertEqual((1 / (s + 1))(j * omega).inverse_fourier(), exp(-t) * Heaviside(t))
         self.assertEqual((1 / (s + 1))(j * omega)(2 * pi * f).inverse_fourier(), exp(-t) * Heaviside(t))
 
+    def test_inverse_fourier_fft(self):
+
+        import numpy as np
+
+        tv = np.linspace(-5, 5, 201)
+        x = exp(-pi * f**2).inverse_fourier(tv)
+        self.assertEqual(np.allclose(x, np.exp(-np.pi * tv**2)), True,
+                         "Gaussian")
+        self.assertEqual(x.dtype, np.float64, "Real result")
+
+        R = Vn(3 / sqrt(1 + omega**2)).autocorrelation(tv)
+        self.assertEqual(np.allclose(R, 9 / 4 * np.exp(-abs(tv)), atol=0.03),
+                         True, "Autocorrelation")
+
+        tv = np.linspace(0.5, 5, 91)
+        h = (1 / (s + 1))(j * omega).inverse_fourier(tv, window='hann')
+        self.assertEqual(np.allclose(h, np.exp(-tv), atol=1e-3), True,
+                         "Exponential")
+
+        self.assertRaises(ValueError, (f * 0 + 1).inverse_fourier,
+                          np.array((0, 1, 3)))
+        self.assertRaises(ValueError, (f * 0 + 1).inverse_fourier,
+                          tv, window='kaiser')
+
+    def test_autocorrelation(self):
+
+        V = Vn(3 / sqrt(1 + omega**2))
+        R = V.autocorrelation()
+        self.assertEqual(R, 9 * exp(-t) / 4, "Autocorrelation")
+        self.assertEqual(R.subs(0), V.rms()**2, "Autocorrelation at zero lag")
+
     def test_rms(self):
 
         self.assertEqual(Vconst(2).rms(), Vt(2))
@@ -41,4 +41,116 @@ class LcapyTester(unittest.TestCase):
         self.assertEqual(Vs('10 * V(s) * exp(-5 * s)').inverse_laplace(causal=True), Vt('10 * v(t - 5)'), "10 * V(s) * exp(-5 * s)")
         self.assertEqual(Vt('v(t)').laplace().inverse_laplace(causal=True),
                          Vt('v(t)'), "v(t)")
+        self.assertEqual((1 / (s + 1)**2).inverse_laplace(causal=True),
+                         t * exp(-t) * Heaviside(t), "1 / (s + 1)**2")
+        self.assertEqual((1 / (s + 1)**3).inverse_laplace(causal=True),
+                         t**2 * exp(-t) * Heaviside(t) / 2, "1 / (s + 1)**3")
                          
+
+    def test_inverse_laplace_numeric(self):
+        import numpy as np
+        import sympy as sym
+        from scipy.signal import impulse
+
+        tv = np.linspace(0, 5, 11)
+
+        H = (s + 2) / (s**2 + 2 * s + 5)
+        h1 = H.inverse_laplace(causal=True, numeric=True)
+        h2 = H.inverse_laplace(causal=True)
+        self.assertEqual(np.allclose(h1.evaluate(tv), h2.evaluate(tv)), True,
+                         "Complex poles")
+
+        H = s / (s + 1)**3
+        h1 = H.inverse_laplace(causal=True, numeric=True)
+        h2 = H.inverse_laplace(causal=True)
+        self.assertEqual(np.allclose(h1.evaluate(tv), h2.evaluate(tv)), True,
+                         "Repeated poles")
+
+        H = 1 / (s + 1)**5
+        h1 = H.inverse_laplace(causal=True, numeric=True)
+        h2 = H.inverse_laplace(causal=True)
+        self.assertEqual(np.allclose(h1.evaluate(tv), h2.evaluate(tv)), True,
+                         "Fifth order repeated pole")
+
+        H = 1 / ((s + 1) * (s + 2) * (s + 3) * (s + 4) * (s + 5))
+        h = H.inverse_laplace(causal=True)
+        self.assertEqual(h.expr.has(sym.Float), False,
+                         "Numeric path used for exact poles")
+
+        # This is used automatically since SymPy cannot find the
+        # roots of the denominator.
+        H = 1 / (s**5 + 2 * s**4 + 3 * s**3 + 3 * s**2 + 2 * s + 1)
+        h = H.inverse_laplace(causal=True)
+        _, expected = impulse(([1], [1, 2, 3, 3, 2, 1]), T=tv)
+        self.assertEqual(np.allclose(h.evaluate(tv).real, expected), True,
+                         "Fifth order")
+
+    def test_cache(self):
+
+        from lcapy.cache import Cache, caches
+
+        c = Cache('test', maxsize=2)
+        c['a'] = 1
+        c['b'] = 2
+        self.assertEqual(c.get('a'), 1, "Cache get")
+        c['c'] = 3
+        self.assertEqual('b' in c, False, "LRU entry not evicted")
+        self.assertEqual('a' in c, True, "Recent entry evicted")
+        self.assertEqual(c.get('b'), None, "Cache miss")
+        info = c.info()
+        self.assertEqual((info.hits, info.misses, info.evictions, info.size),
+                         (1, 1, 1, 2), "Cache counters")
+        c.set_limits(maxsize=None, maxbytes=0)
+        self.assertEqual(len(c), 0, "Memory bound not enforced")
+        c.clear()
+        self.assertEqual(c.info().evictions, 0, "Cache not cleared")
+        del caches['test']
+
+        clear_caches()
+        Vt('3 * u(t)').laplace()
+        Vt('3 * u(t)').laplace()
+        info = cache_info()['laplace']
+        self.assertEqual(info.hits >= 1, True, "Laplace cache not used")
+
+    def test_persistent_cache(self):
+
+        import tempfile
+        import shutil
+
+        directory = tempfile.mkdtemp()
+        try:
+            set_cache_dir(directory)
+            a = Circuit()
+            a.add('V1 1 0 {3 * u(t)}')
+            a.add('R1 1 2 R')
+            a.add('C1 2 0 C')
+            V1 = a.C1.V(t)
+
+            clear_caches()
+            b = Circuit()
+            b.add('V1 1 0 {3 * u(t)}')
+            b.add('R1 1 2 R')
+            b.add('C1 2 0 C')
+            self.assertEqual(b.C1.V(t), V1, "Persistent result incorrect")
+            info = cache_info()
+            self.assertEqual(info['mna'].persistent_hits, 1,
+                             "MNA solution not read from disk")
+            self.assertEqual(info['inverse_laplace'].persistent_hits >= 1,
+                             True, "Transform not read from disk")
+
+            clear_caches(persistent_cache=True)
+            b.C1.V(s)
+            self.assertEqual(cache_info()['mna'].persistent_hits, 0,
+                             "Persistent cache not cleared")
+        finally:
+            set_cache_dir(None)
+            shutil.rmtree(directory)
+
+        clear_caches()
+        c = Circuit()
+        c.add('V1 1 0 {3 * u(t)}')
+        c.add('R1 1 2 R')
+        c.add('C1 2 0 C')
+        c.C1.V(s)
+        self.assertEqual(cache_info()['mna'].size, 0,
+                         "MNA solution cached without a cache directory")
@@ -0,0 +1,286 @@
+"""This module performs numerical transient analysis of circuits by
+time stepping, similar to SPICE.  The MNA A matrix is stamped once in
+the s-domain as G + s C, where C contains the capacitances
+and the self and mutual inductances.  The equations C x' + G x = b(t)
+are integrated with the backward Euler or trapezoidal rule.  This is
+equivalent to replacing each capacitor and inductor with its
+companion model.  Since the time step is fixed, the matrix G + C / h
+(or G + 2 C / h) is factored once with a sparse LU decomposition and
+the factors are reused at every time step.
+
+The state for t < 0 is the steady-state response to the DC and AC
+components of the sources unless the circuit has initial conditions.
+For an initial value problem, the sources are assumed to start at t =
+0 and the capacitor voltages and inductor currents are given by the
+initial conditions.  The other unknowns at t = 0 are found by
+replacing the capacitors and inductors with voltage and current
+sources of their initial values.
+
+Copyright 2019 Michael Hayes, UCECE
+
+"""
+
+from __future__ import division
+from .sweep import SweepResult
+from .sym import ssym
+import numpy as np
+import sympy as sym
+
+__all__ = ('TransientResult', 'transient')
+
+methods = ('trapezoidal', 'backward-euler')
+
+
+class TransientResult(SweepResult):
+    """This class stores the results of a transient analysis.  The
+    attribute t is the array of the times, the attribute V is an array
+    of the node voltages with shape (nodes, times) and the attribute I
+    is an array of the branch currents with shape (branches, times).
+
+    The voltage at node 2 is given by result[2] and the current
+    through R1 is given by result.get_I('R1').
+
+    """
+
+    def __init__(self, t, nodes, V, branches, I, node_map):
+
+        super(TransientResult, self).__init__(None, nodes, V, branches, I,
+                                              node_map)
+        self.t = t
+
+    def __repr__(self):
+
+        return '%s(%d nodes, %d branches, %d times)' % (
+            self.__class__.__name__, len(self.nodes), len(self.branches),
+            len(self.t))
+
+
+def _real_matrix(M, name):
+
+    if not hasattr(M, 'tocsc'):
+        raise ValueError('Cannot simulate circuit with symbolic'
+                         ' component values')
+    M = M.tocsc()
+    if M.dtype == complex:
+        if not np.allclose(M.data.imag, 0.0):
+            raise ValueError('The %s matrix is not real' % name)
+        M = M.real
+    return M
+
+
+def _source_stamp(sub, elt, values, Z):
+    """Add values of independent source elt to the rows of Z."""
+
+    if elt.type == 'V':
+        Z[len(sub.node_list) - 1 + elt.branch_index] += values
+    else:
+        n1, n2 = elt.node_indexes
+        if n1 >= 0:
+            Z[n1] += values
+        if n2 >= 0:
+            Z[n2] -= values
+
+
+def _source_value(cct, name):
+
+    cpt = cct.elements[name].cpt
+    return cpt.Voc if cct.elements[name].type == 'V' else cpt.Isc
+
+
+def _capacitance(elt):
+
+    return complex(sym.sympify(elt.Y.expr).diff(ssym)).real
+
+
+def _voltage_drop(sub, name, x):
+
+    n1, n2 = sub.elements[name].node_indexes
+    return (x[n1] if n1 >= 0 else 0) - (x[n2] if n2 >= 0 else 0)
+
+
+def _capacitor_current(Vd, C, i0, dt, method):
+    """Return the current through capacitance C with voltage Vd given
+    by the companion model of the integration method.  The first step
+    of the trapezoidal method is a backward Euler step."""
+
+    I = np.zeros(len(Vd))
+    I[0] = i0
+    # Backward Euler: i[n] = C (v[n] - v[n - 1]) / h
+    I[1:] = C * np.diff(Vd) / dt
+    if method == 'trapezoidal':
+        # i[n] = 2 C (v[n] - v[n - 1]) / h - i[n - 1]
+        for n in range(2, len(Vd)):
+            I[n] = 2 * I[n] - I[n - 1]
+    return I
+
+
+def _initial_state(cct, sub, G, C):
+    """Return the steady-state solution for t < 0 due to the DC and AC
+    components of the sources and the capacitor currents at t = 0 as
+    a dictionary."""
+
+    from scipy.sparse.linalg import splu
+
+    N = G.shape[0]
+    x0 = np.zeros(N)
+    dx0 = np.zeros(N)
+    rhs = {}
+    for name, elt in sub.elements.items():
+        if not elt.independent_source:
+            continue
+        for kind, value in _source_value(cct, name).decompose().items():
+            if kind == 's' or (isinstance(kind, str) and kind[0] == 'n'):
+                continue
+            if kind not in rhs:
+                rhs[kind] = np.zeros(N, dtype=complex)
+            _source_stamp(sub, elt, complex(value.expr), rhs[kind])
+
+    for kind, Z in rhs.items():
+        omega = 0 if kind == 'dc' else float(sym.sympify(kind))
+        try:
+            X = splu((G + 1j * omega * C).astype(complex).tocsc()).solve(Z)
+        except RuntimeError:
+            raise ValueError('Cannot determine the initial state for %s'
+                             ' analysis; the MNA A matrix is singular' % kind)
+        x0 += X.real
+        dx0 += (1j * omega * X).real
+
+    currents = {}
+    for name, elt in sub.elements.items():
+        if elt.type == 'C':
+            currents[name] = _capacitance(elt) * _voltage_drop(sub, name, dx0)
+    return x0, currents
+
+
+def _initial_value(cct, sub, G, b):
+    """Return the solution at t = 0 for an initial value problem and
+    the capacitor currents at t = 0 as a dictionary.  Each capacitor is replaced by a voltage source of its initial
+    voltage and each inductor by a current source of its initial
+    current; G is then solved for the other unknowns."""
+
+    from scipy.sparse import lil_matrix
+    from scipy.sparse.linalg import splu
+
+    N = G.shape[0]
+    num_nodes = len(sub.node_list) - 1
+    caps = [name for name, elt in sub.elements.items() if elt.type == 'C']
+
+    A = lil_matrix((N + len(caps), N + len(caps)))
+    A[0:N, 0:N] = G
+    Z = np.zeros(N + len(caps))
+    Z[0:N] = b
+
+    for name, elt in sub.elements.items():
+        if elt.type != 'L':
+            continue
+        # The initial conditions are removed from the s-domain model.
+        cpt = cct.elements[name].cpt
+        m = num_nodes + elt.branch_index
+        A[m, :] = 0
+        A[m, m] = 1
+        Z[m] = float(cpt.i0.expr) if cpt.hasic else 0
+
+    for m, name in enumerate(caps):
+        cpt = cct.elements[name].cpt
+        # The extra unknown is the capacitor current.
+        for n, sign in zip(sub.elements[name].node_indexes, (1, -1)):
+            if n >= 0:
+                A[n, N + m] = sign
+                A[N + m, n] = sign
+        Z[N + m] = float(cpt.v0.expr) if cpt.hasic else 0
+
+    try:
+        X = splu(A.tocsc()).solve(Z)
+    except RuntimeError:
+        raise ValueError('Cannot determine the initial state; the initial'
+                         ' conditions are inconsistent or incomplete')
+    return X[0:N], dict(zip(caps, X[N:]))
+
+
+def transient(cct, t_stop, dt, method='trapezoidal'):
+    """Simulate circuit cct from t = 0 to t_stop with the time step dt
+    and return a TransientResult object.  The method can be
+    'trapezoidal' or 'backward-euler'.  The first step of the
+    trapezoidal method is performed with the backward Euler method.
+    The component values must be numerical."""
+
+    from scipy.sparse.linalg import splu
+
+    if method not in methods:
+        raise ValueError('Unknown method %s, expecting one of %s' %
+                         (method, ', '.join(methods)))
+    if dt <= 0 or t_stop <= 0:
+        raise ValueError('t_stop and dt must be positive')
+
+    steps = int(round(t_stop / dt))
+    t = np.arange(steps + 1) * dt
+
+    # All the sources are zeroed; their values are only needed for
+    # the excitation.
+    sub = cct._pencil_netlist
+    G = _real_matrix(cct.G_matrix, 'G')
+    C = _real_matrix(cct.C_matrix, 'C')
+
+    N = G.shape[0]
+    Z = np.zeros((N, len(t)))
+    source_values = {}
+    for name, elt in sub.elements.items():
+        if elt.independent_source:
+            values = np.real(_source_value(cct, name).time().evaluate(t))
+            _source_stamp(sub, elt, values, Z)
+            source_values[name] = values
+
+    def factor(h):
+        try:
+            return splu((G + C / h).tocsc())
+        except RuntimeError:
+            raise ValueError('The MNA A matrix is singular for time step %s'
+                             % h)
+
+    X = np.zeros((N, len(t)))
+    if cct.is_ivp:
+        X[:, 0], currents = _initial_value(cct, sub, G, Z[:, 0])
+    else:
+        X[:, 0], currents = _initial_state(cct, sub, G, C)
+    q = C.dot(X[:, 0])
+
+    lu_be = factor(dt)
+    if method == 'trapezoidal':
+        lu_tr = factor(dt / 2)
+
+    if steps > 0:
+        X[:, 1] = lu_be.solve(q / dt + Z[:, 1])
+
+    if method == 'trapezoidal':
+        # (G + 2 C / h) x[n] = (2 C / h - G) x[n - 1] + b[n] + b[n - 1]
+        H = (2 * C / dt - G).tocsc()
+        for n in range(2, steps + 1):
+            X[:, n] = lu_tr.solve(H.dot(X[:, n - 1]) + Z[:, n] + Z[:, n - 1])
+    else:
+        for n in range(2, steps + 1):
+            X[:, n] = lu_be.solve(C.dot(X[:, n - 1]) / dt + Z[:, n])
+
+    num_nodes = len(sub.node_list) - 1
+    V = np.zeros((num_nodes + 1, len(t)))
+    V[1:] = X[0:num_nodes]
+    nodes = list(sub.node_list)
+
+    branches = list(sub.unknown_branch_currents)
+    I = [X[num_nodes + m] for m in range(len(branches))]
+
+    for name, elt in sub.elements.items():
+        if elt.type in ('R', 'C'):
+            n1, n2 = sub.node_map[elt.nodes[0]], sub.node_map[elt.nodes[1]]
+            Vd = V[nodes.index(n1)] - V[nodes.index(n2)]
+            if elt.type == 'R':
+                I.append(Vd * float(sym.sympify(elt.Y.expr)))
+            else:
+                I.append(_capacitor_current(Vd, _capacitance(elt),
+                                            currents[name], dt, method))
+            branches.append(name)
+        elif elt.type == 'I':
+            I.append(source_values[name])
+            branches.append(name)
+
+    I = np.array(I).reshape(len(branches), len(t))
+    return TransientResult(t, nodes, V, branches, I, dict(sub.node_map))
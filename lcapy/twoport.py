@@ -14,6 +14,7 @@ from .vector import Vector
 from .matrix import Matrix
 from .oneport import OnePort, I, V, Y, Z
 from .network import Network
+from .functions import exp, sqrt
 
 
 # This needs to be generalised for superpositions.
@@ -2485,7 +2486,7 @@ class GeneralTxLine(TwoPortBModel):
         gamma = sExpr(gamma)
         l = cExpr(l)
 
-        H = sym.exp(gamma * l)
+        H = exp(gamma * l)
 
         B11 = 0.5 * (H + 1 / H)
         B12 = 0.5 * (1 / H - H) * Z0
@@ -2526,7 +2527,7 @@ class TxLine(GeneralTxLine):
 
         Z = R + s * L
         Y = G + s * C
-        gamma = sym.sqrt(Z * Y)
-        Z0 = sym.sqrt(Z / Y)
+        gamma = sqrt(Z * Y)
+        Z0 = sqrt(Z / Y)
 
         super(TxLine, self).__init__(Z0, gamma, l)
@@ -16,12 +16,17 @@ setup(name='lcapy', version='0.30.1',
                   'lcapy.schemgraph', 'lcapy.mnacpts', 'lcapy.sympify',
                   'lcapy.acdc', 'lcapy.network', 'lcapy.circuit',
                   'lcapy.netfile', 'lcapy.system', 'lcapy.laplace',
-                  'lcapy.fourier', 'lcapy.ratfun', 'lcapy.utils', 'lcapy.expr',
-                  'lcapy.sexpr', 'lcapy.vector', 'lcapy.matrix',
+                  'lcapy.fourier', 'lcapy.ratfun', 'lcapy.utils',
+                  'lcapy.expr', 'lcapy.sexpr', 'lcapy.vector', 'lcapy.matrix',
                   'lcapy.symbols', 'lcapy.cexpr', 'lcapy.texpr',
                   'lcapy.fexpr', 'lcapy.omegaexpr', 'lcapy.sfwexpr',
                   'lcapy.noiseexpr', 'lcapy.phasor', 'lcapy.super',
                   'lcapy.context', 'lcapy.sym', 'lcapy.functions',
-                  'lcapy.printing', 'lcapy.config', 'lcapy.transform'
+                  'lcapy.printing', 'lcapy.config', 'lcapy.transform',
+                  'lcapy.solver', 'lcapy.numeric', 'lcapy.sweep',
+                  'lcapy.paramsweep', 'lcapy.montecarlo',
+                  'lcapy.superposition', 'lcapy.cache', 'lcapy.evaluate',
+                  'lcapy.discretise', 'lcapy.transient', 'lcapy.statespace',
+                  'lcapy.polezero', 'lcapy.adjoint'
       ], scripts=['scripts/schtex.py'],
       license='LGPL' )